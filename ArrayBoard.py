@@ -0,0 +1,83 @@
+from Board import Board, COORD_MAP
+from MoveTables import BOARD_COLS, BOARD_ROWS, SQUARES
+from PieceConstants import BLUE
+
+# piece type codes are packed in to one byte per space by get_code and BatchMoves, the color bit is set for blue
+BLUE_BIT = 8
+
+
+class ArrayBoard(Board):
+    """
+    Represents the board of the game using a flat 90 element list of pieces indexed by row * 9 + col instead
+    of a dictionary keyed by coordinates. Has the same public methods as Board so the game and pieces can use
+    either one, and copies with a single list slice.
+    """
+    def __init__(self, squares: list = None):
+        """
+        Initializes an empty visual board, the coordinate map, and the spaces.
+        param squares: list of the piece on each space to use, or None for an empty board
+        """
+        self._visual_board = [['   '] * BOARD_COLS for _ in range(BOARD_ROWS)]
+        self._coord_map = COORD_MAP
+        self._squares = [None] * len(SQUARES) if squares is None else squares
+
+    def get_board(self) -> dict:
+        """
+        Builds a dictionary of every space and the piece on it. Slower than the Board version since the
+        dictionary is built on each call, and changes to it do not affect the board.
+        return: board spaces dictionary
+        """
+        return dict(zip(SQUARES, self._squares))
+
+    def set_board(self, board: dict) -> None:
+        """
+        Replaces every space with the pieces in the dictionary. Used for reverting the board to a previous state.
+        param board: dictionary of coordinates to pieces or None
+        return: None
+        """
+        squares = [None] * len(SQUARES)
+        for coord, piece in board.items():
+            squares[coord[0] * BOARD_COLS + coord[1]] = piece
+        self._squares = squares
+
+    def copy(self):
+        """
+        Creates a new board with the same pieces. Only the list is copied, the pieces are shared.
+        return: ArrayBoard object
+        """
+        return ArrayBoard(self._squares[:])
+
+    def set_piece(self, piece) -> None:
+        """
+        Sets the piece on the board at its location, replacing anything already there.
+        param piece: piece object
+        return: None
+        """
+        coord = piece.get_location()
+        self._squares[coord[0] * BOARD_COLS + coord[1]] = piece
+
+    def remove_piece(self, coord: tuple) -> None:
+        """
+        Removes piece at the current location. Used when a piece is captured.
+        return: None
+        """
+        self._squares[coord[0] * BOARD_COLS + coord[1]] = None
+
+    def get_piece(self, coord: tuple):
+        """
+        Returns the piece residing at the passed in location.
+        param coord: location to check
+        return: piece at the location if it is occupied, else None
+        """
+        return self._squares[coord[0] * BOARD_COLS + coord[1]]
+
+    def get_code(self, coord: tuple) -> int:
+        """
+        Returns the packed color and type code of the space, the form BatchMoves stores boards in.
+        param coord: location to check
+        return: 0 when the space is empty, else the type code with BLUE_BIT set for blue pieces
+        """
+        piece = self._squares[coord[0] * BOARD_COLS + coord[1]]
+        if piece is None:
+            return 0
+        return piece.get_type_code() | (BLUE_BIT if piece.get_color_code() == BLUE else 0)
@@ -0,0 +1,335 @@
+"""
+Legal move generation for many positions at once with NumPy. Positions are an (N, 10, 9) int8 array using the
+ArrayBoard codes: 0 for an empty space, else the piece's type code with BLUE_BIT set for blue pieces, along with
+an (N,) array of the color code to move.
+
+Every move any piece could ever make is listed once as a candidate: its from and to squares, the kind of move,
+and the squares between that must be empty (or, for a cannon, hold exactly one screen). Counting the pieces on
+the between squares of every candidate in every position is then a single matrix product, and the rules become
+elementwise tests on (positions, candidates) arrays. Moves that leave the mover in check are removed by playing
+every pseudo-legal move at once and testing the candidates that can reach the mover's palace.
+
+NumPy is optional; the rest of the game does not need it, and the functions here raise ImportError without it.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ArrayBoard import BLUE_BIT
+from MoveTables import BOARD_COLS, BOARD_ROWS, COLORS, ELEPHANT_MOVES, HORSE_MOVES, PALACE_MOVES, PALACES, \
+    SLIDING_RAYS, SOLDIER_MOVES, SQUARES
+from PieceConstants import BLUE, CANNON, CHARIOT, ELEPHANT, GENERAL, GUARD, HORSE, RED, SOLDIER
+
+# kinds of candidate moves
+SLIDE = 0
+HORSE_JUMP = 1
+ELEPHANT_JUMP = 2
+SOLDIER_STEP = 3
+PALACE_STEP = 4
+
+# positions handled at a time, keeps the (positions, candidates) arrays small
+CHUNK = 512
+
+
+def _index(coord: tuple) -> int:
+    """
+    Returns the flat index of a coordinate.
+    """
+    return coord[0] * BOARD_COLS + coord[1]
+
+
+def _build_candidates() -> tuple:
+    """
+    Lists every move a piece could make on an empty board, from the move tables, grouped by kind.
+    return: tuple of lists of from index, to index, kind, color (-1 for either), and between indexes
+    """
+    moves = []
+    for square in SQUARES:
+        for ray in SLIDING_RAYS[square]:
+            for distance, target in enumerate(ray):
+                moves.append((SLIDE, square, target, -1, ray[:distance]))
+        for target, leg in HORSE_MOVES[square]:
+            moves.append((HORSE_JUMP, square, target, -1, (leg,)))
+        for target, legs in ELEPHANT_MOVES[square]:
+            moves.append((ELEPHANT_JUMP, square, target, -1, legs))
+        for color in COLORS:
+            for target in SOLDIER_MOVES[color][square]:
+                moves.append((SOLDIER_STEP, square, target, color, ()))
+            for target in PALACE_MOVES[color][square]:
+                moves.append((PALACE_STEP, square, target, color, ()))
+    moves.sort(key=lambda move: move[0])
+    return ([_index(move[1]) for move in moves], [_index(move[2]) for move in moves], [move[0] for move in moves],
+            [move[3] for move in moves], [[_index(space) for space in move[4]] for move in moves])
+
+
+class _Candidates:
+    """
+    Arrays describing a set of candidate moves, either all of them or the ones ending on one square. The
+    candidates are sorted by kind so the rules of each kind are applied to a slice of the columns.
+    """
+    def __init__(self, origins, targets, kinds, colors, betweens):
+        """
+        Builds the arrays, including the (90, candidates) matrix of between squares.
+        """
+        self.origins = np.array(origins, dtype=np.intp)
+        self.targets = np.array(targets, dtype=np.intp)
+        self.kinds = np.array(kinds, dtype=np.int8)
+        self.colors = np.array(colors, dtype=np.int8)
+        self.between = np.zeros((len(SQUARES), len(origins)), dtype=np.float32)
+        for column, between in enumerate(betweens):
+            self.between[between, column] = 1.0
+        self._set_slices()
+
+    def _set_slices(self) -> None:
+        """
+        Finds the columns of each kind.
+        """
+        bounds = np.searchsorted(self.kinds, np.arange(PALACE_STEP + 2))
+        self.slices = [slice(bounds[kind], bounds[kind + 1]) for kind in range(PALACE_STEP + 1)]
+
+    def subset(self, keep):
+        """
+        Returns the candidates selected by a boolean array.
+        """
+        subset = _Candidates.__new__(_Candidates)
+        subset.origins = self.origins[keep]
+        subset.targets = self.targets[keep]
+        subset.kinds = self.kinds[keep]
+        subset.colors = self.colors[keep]
+        subset.between = self.between[:, keep]
+        subset._set_slices()
+        return subset
+
+
+_tables = {}
+
+
+def _get_tables() -> dict:
+    """
+    Builds the candidate arrays on first use.
+    return: dictionary with all candidates under 'all' and, by square index, the candidates that end on each
+    palace square, where a general can be attacked
+    """
+    if np is None:
+        raise ImportError('BatchMoves needs numpy')
+    if not _tables:
+        candidates = _Candidates(*_build_candidates())
+        _tables['all'] = candidates
+        for color in COLORS:
+            for square in PALACES[color]:
+                _tables[_index(square)] = candidates.subset(candidates.targets == _index(square))
+    return _tables
+
+
+def get_candidates() -> tuple:
+    """
+    Returns the from and to square indexes of the candidate moves, the columns of the masks from
+    legal_move_masks. A square index is row * 9 + col.
+    return: tuple of two (candidates,) arrays
+    """
+    candidates = _get_tables()['all']
+    return candidates.origins, candidates.targets
+
+
+def encode_game(game):
+    """
+    Writes a game's position as a board array.
+    param game: JanggiGame object
+    return: tuple of a (10, 9) int8 array and the color code to move
+    """
+    if np is None:
+        raise ImportError('BatchMoves needs numpy')
+    board = np.zeros((BOARD_ROWS, BOARD_COLS), dtype=np.int8)
+    for piece in game.get_pieces():
+        row, col = piece.get_location()
+        board[row, col] = piece.get_type_code() | (BLUE_BIT if piece.get_color_code() == BLUE else 0)
+    return board, BLUE if game.get_player_turn() == 'blue' else RED
+
+
+def encode_games(games) -> tuple:
+    """
+    Writes the positions of several games as one array.
+    param games: iterable of JanggiGame objects
+    return: tuple of an (N, 10, 9) int8 array and an (N,) int8 array of the colors to move
+    """
+    encoded = [encode_game(game) for game in games]
+    boards = np.array([board for board, _ in encoded], dtype=np.int8).reshape(-1, BOARD_ROWS, BOARD_COLS)
+    return boards, np.array([turn for _, turn in encoded], dtype=np.int8)
+
+
+def _pseudo_legal(cells, turns, candidates):
+    """
+    Tests each candidate move in each position against the movement rules, without regard to check.
+    param cells: (N, 90) int8 array of square codes
+    param turns: (N,) array of the colors to move
+    param candidates: _Candidates to test
+    return: (N, candidates) boolean array
+    """
+    occupied = cells != 0
+    types = cells & 7
+    own = occupied & ((cells >> 3) == turns[:, None])
+    rules = np.zeros((len(cells), len(candidates.origins)), dtype=bool)
+    slide, horse, elephant, soldier, palace = candidates.slices
+
+    # pieces on the between squares of every sliding and jumping candidate
+    jumps = slice(slide.start, elephant.stop)
+    between = occupied.astype(np.float32) @ candidates.between[:, jumps]
+    clear = between == 0
+
+    if slide.stop > slide.start:
+        movers = types[:, candidates.origins[slide]]
+        count = between[:, :slide.stop - slide.start]
+        cannons = (types == CANNON).astype(np.float32) @ candidates.between[:, slide]
+        rules[:, slide] = ((movers == CHARIOT) & (count == 0)) | \
+            ((movers == CANNON) & (count == 1) & (cannons == 0) & (types[:, candidates.targets[slide]] != CANNON))
+    for kind, piece_type in ((horse, HORSE), (elephant, ELEPHANT)):
+        rules[:, kind] = (types[:, candidates.origins[kind]] == piece_type) & \
+            clear[:, kind.start - jumps.start:kind.stop - jumps.start]
+    rules[:, soldier] = (types[:, candidates.origins[soldier]] == SOLDIER) & \
+        (candidates.colors[soldier] == turns[:, None])
+    movers = types[:, candidates.origins[palace]]
+    rules[:, palace] = ((movers == GENERAL) | (movers == GUARD)) & (candidates.colors[palace] == turns[:, None])
+    return rules & own[:, candidates.origins] & ~own[:, candidates.targets]
+
+
+def _is_attacked(cells, defenders):
+    """
+    Tests whether the general of the given color is attacked in each position.
+    param cells: (N, 90) int8 array of square codes
+    param defenders: (N,) array of the color codes of the generals to test
+    return: (N,) boolean array
+    """
+    tables = _get_tables()
+    attacked = np.zeros(len(cells), dtype=bool)
+    codes = np.where(defenders == BLUE, GENERAL | BLUE_BIT, GENERAL).astype(cells.dtype)
+    generals = np.argmax(cells == codes[:, None], axis=1)
+
+    # group positions by the general's square so only the candidates ending there are tested
+    for color in COLORS:
+        for square in PALACES[color]:
+            rows = np.nonzero((generals == _index(square)) & (defenders == color))[0]
+            if len(rows):
+                attackers = np.full(len(rows), 1 - color, dtype=cells.dtype)
+                attacked[rows] = _pseudo_legal(cells[rows], attackers, tables[_index(square)]).any(axis=1)
+    return attacked
+
+
+def _play(cells, rows, origins, targets):
+    """
+    Plays one move in each of a set of positions.
+    param cells: (N, 90) int8 array of square codes
+    param rows: position of each move
+    param origins: from square of each move
+    param targets: to square of each move
+    return: (moves, 90) array of the positions after each move
+    """
+    after = cells[rows]
+    moves = np.arange(len(rows))
+    after[moves, targets] = after[moves, origins]
+    after[moves, origins] = 0
+    return after
+
+
+def _legal_chunk(cells, turns) -> tuple:
+    """
+    Finds the legal moves of a chunk of positions.
+    param cells: (N, 90) int8 array of square codes
+    param turns: (N,) array of the colors to move
+    return: tuple of the (N, candidates) legal move mask and the (N,) mask of positions where passing is legal
+    """
+    candidates = _get_tables()['all']
+    mask = _pseudo_legal(cells, turns, candidates)
+    rows, columns = np.nonzero(mask)
+    after = _play(cells, rows, candidates.origins[columns], candidates.targets[columns])
+    checked = _is_attacked(after, turns[rows])
+    mask[rows[checked], columns[checked]] = False
+    return mask, ~_is_attacked(cells, turns)
+
+
+def legal_move_masks(boards, turns) -> tuple:
+    """
+    Finds the legal moves of many positions. Matches JanggiGame.generate_legal_moves, except that the game
+    state is not known, so a mated position simply has no moves.
+    param boards: (N, 10, 9) int8 array of positions
+    param turns: (N,) array of the color codes to move
+    return: tuple of an (N, candidates) boolean array with a column for each move from get_candidates, and an
+    (N,) boolean array of the positions where passing is legal
+    """
+    tables = _get_tables()
+    cells = np.ascontiguousarray(boards, dtype=np.int8).reshape(-1, len(SQUARES))
+    turns = np.asarray(turns, dtype=np.int8)
+    masks = np.zeros((len(cells), len(tables['all'].origins)), dtype=bool)
+    passes = np.zeros(len(cells), dtype=bool)
+    for start in range(0, len(cells), CHUNK):
+        stop = start + CHUNK
+        masks[start:stop], passes[start:stop] = _legal_chunk(cells[start:stop], turns[start:stop])
+    return masks, passes
+
+
+def legal_moves(boards, turns) -> list:
+    """
+    Finds the legal moves of many positions as lists of coordinates like JanggiGame.generate_legal_moves,
+    with a pass written as the general's space to itself.
+    param boards: (N, 10, 9) int8 array of positions
+    param turns: (N,) array of the color codes to move
+    return: list of lists of (current coordinate, destination coordinate) tuples
+    """
+    masks, passes = legal_move_masks(boards, turns)
+    origins, targets = get_candidates()
+    cells = np.asarray(boards, dtype=np.int8).reshape(-1, len(SQUARES))
+    moves = []
+    for row in range(len(masks)):
+        columns = np.nonzero(masks[row])[0]
+        position = [(SQUARES[origin], SQUARES[target]) for origin, target in zip(origins[columns], targets[columns])]
+        if passes[row]:
+            code = GENERAL | (BLUE_BIT if turns[row] == BLUE else 0)
+            general = SQUARES[int(np.argmax(cells[row] == code))]
+            position.append((general, general))
+        moves.append(position)
+    return moves
+
+
+def perft(boards, turns, depth: int):
+    """
+    Counts the move sequences of the given depth from each position, expanding a whole level of positions at
+    a time. Matches JanggiGame.perft.
+    param boards: (N, 10, 9) int8 array of positions
+    param turns: (N,) array of the color codes to move
+    param depth: number of moves to play
+    return: (N,) int64 array of leaf counts
+    """
+    candidates = _get_tables()['all']
+    cells = np.ascontiguousarray(boards, dtype=np.int8).reshape(-1, len(SQUARES))
+    turns = np.asarray(turns, dtype=np.int8)
+
+    # root of each position at the current level
+    roots = np.arange(len(cells))
+    counts = np.zeros(len(cells), dtype=np.int64)
+    if depth <= 0:
+        return counts + 1
+    for level in range(depth):
+        last = level == depth - 1
+        next_cells, next_turns, next_roots = [], [], []
+        for start in range(0, len(cells), CHUNK):
+            chunk = slice(start, start + CHUNK)
+            mask, passes = _legal_chunk(cells[chunk], turns[chunk])
+
+            # the last level only needs counting
+            if last:
+                np.add.at(counts, roots[chunk], mask.sum(axis=1) + passes)
+                continue
+            rows, columns = np.nonzero(mask)
+            next_cells.append(_play(cells[chunk], rows, candidates.origins[columns], candidates.targets[columns]))
+            next_turns.append(1 - turns[chunk][rows])
+            next_roots.append(roots[chunk][rows])
+
+            # a pass leaves the board as it is
+            next_cells.append(cells[chunk][passes])
+            next_turns.append(1 - turns[chunk][passes])
+            next_roots.append(roots[chunk][passes])
+        if not last:
+            cells = np.concatenate(next_cells) if next_cells else cells[:0]
+            turns = np.concatenate(next_turns).astype(np.int8) if next_turns else turns[:0]
+            roots = np.concatenate(next_roots) if next_roots else roots[:0]
+    return counts
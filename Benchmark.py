@@ -0,0 +1,171 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from JanggiGame import JanggiGame, START_FEN
+from Perft import REFERENCE_POSITIONS, setup_game
+from ScriptedGames import SCRIPTED_GAMES
+from SelfPlay import run_self_play
+
+# positions for timing update_valid_moves, the midgame is the last perft reference position
+# the endgame was reached at ply 372 of a random self-play game, run_self_play seed 123
+ENDGAME_FEN = '4a1S2/4g4/9/9/R8/9/6s2/4A1s2/8c/1h3G3 b -'
+
+# positions where the player to move is in check, with whether it is mate
+MATE_POSITIONS = [
+    ('R3g4/R8/9/9/9/9/9/9/4G4/9 r r', 'red', True),
+    ('R8/4g3R/R8/9/9/9/9/9/4G4/9 r r', 'red', True),
+    ('reha1aehr/4g4/1c5c1/s1s2ss1s/9/9/S1S1S1S1S/3HC2C1/4G4/RE1A1AEHR r r', 'red', False),
+]
+
+# default share a result may be worse than the baseline before it counts as a regression
+THRESHOLD = 0.1
+
+
+def scripted_games() -> list:
+    """
+    Collects the move lists of the scripted games in ScriptedGames along with a few seeded random games.
+    return: list of move lists
+    """
+    games = [list(moves) for moves in SCRIPTED_GAMES.values()]
+    games.extend(record['moves'] for record in run_self_play(4, workers=1, seed=1, max_moves=150))
+    return games
+
+
+def measure(func, number: int, repeat: int = 5) -> float:
+    """
+    Times a function, taking the fastest of several runs to lessen noise from the rest of the machine.
+    param func: function to call with no arguments
+    param number: calls per run
+    param repeat: number of runs
+    return: seconds per call of the fastest run
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        seconds = (time.perf_counter() - start) / number
+        if best is None or seconds < best:
+            best = seconds
+    return best
+
+
+def play(moves: list) -> JanggiGame:
+    """
+    Plays a move list from the starting setup with make_move.
+    param moves: list of (move from, move to) algebraic pairs
+    return: the game after the moves
+    """
+    game = JanggiGame()
+    for move_from, move_to in moves:
+        game.make_move(move_from, move_to)
+    return game
+
+
+def run_benchmarks(quick: bool = False) -> dict:
+    """
+    Runs every benchmark.
+    param quick: when True uses fewer calls per run, for a fast check that is noisier
+    return: dictionary of benchmark name to a dictionary of its value, unit, and whether higher is better
+    """
+    scale = 1 if quick else 10
+    results = {}
+
+    def add(name, value, unit, higher_is_better=False):
+        results[name] = {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+    add('construct', measure(JanggiGame, 20 * scale), 's')
+
+    positions = {'opening': JanggiGame.from_fen(START_FEN),
+                 'midgame': setup_game(REFERENCE_POSITIONS[-1]['moves']),
+                 'endgame': JanggiGame.from_fen(ENDGAME_FEN)}
+    for name, game in positions.items():
+        add('update_valid_moves_' + name, measure(game.update_valid_moves, 20 * scale), 's')
+
+    games = scripted_games()
+    moves = sum(len(game_moves) for game_moves in games)
+
+    def play_all():
+        for game_moves in games:
+            play(game_moves)
+    add('make_move_throughput', moves / (measure(play_all, 1, 1 + scale // 2) or 1e-9), 'moves/s', True)
+
+    for index, (fen, color, _) in enumerate(MATE_POSITIONS):
+        game = JanggiGame.from_fen(fen)
+        add('is_mate_%d' % index, measure(lambda: game.is_mate(color), 20 * scale), 's')
+
+    # peak memory of a game played through the longest scripted sequence
+    longest = max(games, key=len)
+    tracemalloc.start()
+    play(longest)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    add('peak_memory_per_game', peak, 'bytes')
+    return results
+
+
+def compare(baseline: dict, current: dict, threshold: float = THRESHOLD) -> list:
+    """
+    Finds benchmarks that got worse than the baseline by more than the threshold.
+    param baseline: results from run_benchmarks, or a results file's 'results'
+    param current: results to check
+    param threshold: share a result may be worse, 0.1 allows 10% slower or larger
+    return: list of dictionaries with the benchmark name, baseline and current values, and the change as a share
+    of the baseline, worse results positive
+    """
+    regressions = []
+    for name, result in sorted(current.items()):
+        if name not in baseline or not baseline[name]['value']:
+            continue
+        old = baseline[name]['value']
+        change = (result['value'] - old) / old
+        if result['higher_is_better']:
+            change = -change
+        if change > threshold:
+            regressions.append({'name': name, 'baseline': old, 'current': result['value'], 'change': change})
+    return regressions
+
+
+def main(args=None) -> int:
+    """
+    Command line entry point. Runs the benchmarks, writes them to a file, and compares with a baseline file.
+    param args: command line arguments, sys.argv when None
+    return: exit status, 1 when a benchmark regressed
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the Janggi rules engine.')
+    parser.add_argument('--output', help='file to write results to as JSON')
+    parser.add_argument('--compare', help='baseline results file to compare with')
+    parser.add_argument('--current', help='results file to compare instead of running the benchmarks')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='allowed share worse than baseline')
+    parser.add_argument('--quick', action='store_true', help='fewer calls per run, faster but noisier')
+    options = parser.parse_args(args)
+
+    if options.current:
+        with open(options.current) as current_file:
+            results = json.load(current_file)['results']
+    else:
+        results = run_benchmarks(options.quick)
+    for name, result in results.items():
+        print('%-28s %14.6g %s' % (name, result['value'], result['unit']))
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump({'python': platform.python_version(), 'platform': platform.platform(),
+                       'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}, output, indent=2)
+
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file)['results'], results, options.threshold)
+        for regression in regressions:
+            print('REGRESSION %s %.6g -> %.6g (%+.0f%%)' % (regression['name'], regression['baseline'],
+                  regression['current'], regression['change'] * 100), file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
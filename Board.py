@@ -1,3 +1,10 @@
+# Janggi algebraic rows and files to coordinate values
+COORD_MAP = {
+    '1': 0, '2': 1, '3': 2, '4': 3, '5': 4, '6': 5, '7': 6, '8': 7, '9': 8, '10': 9,
+    'a': 0, 'b': 1, 'c': 2, 'd': 3, 'e': 4, 'f': 5, 'g': 6, 'h': 7, 'i': 8
+}
+
+
 class Board:
     """
     Represents the board of the game. Includes a visual representation of the
@@ -48,10 +55,7 @@ class Board:
             (9, 5): None, (9, 6): None, (9, 7): None, (9, 8): None
         }
 
-        self._coord_map = {
-            '1': 0, '2': 1, '3': 2, '4': 3, '5': 4, '6': 5, '7': 6, '8': 7, '9': 8, '10': 9,
-            'a': 0, 'b': 1, 'c': 2, 'd': 3, 'e': 4, 'f': 5, 'g': 6, 'h': 7, 'i': 8
-        }
+        self._coord_map = COORD_MAP
 
     def get_board(self) -> dict:
         """
@@ -67,6 +71,15 @@ class Board:
         """
         self._board_spaces = board
 
+    def copy(self):
+        """
+        Creates a new board with the same pieces on the same spaces. The pieces are shared, not copied.
+        return: Board object
+        """
+        board = Board()
+        board.set_board(self._board_spaces.copy())
+        return board
+
     def convert_coords(self, coord: str):
         """
         Converts Janggi algebraic notation in to coordinates.
@@ -87,6 +100,14 @@ class Board:
                 col_coord = self._coord_map[coord[0]]
                 return row_coord, col_coord
 
+    def convert_to_algebraic(self, coord: tuple) -> str:
+        """
+        Converts coordinates in to Janggi algebraic notation. Reverse of convert_coords.
+        param coord: tuple of coordinates on the board
+        return: Janggi algebraic board location
+        """
+        return 'abcdefghi'[coord[1]] + str(coord[0] + 1)
+
     def display_board(self) -> None:
         """
         Prints the board to output. Used in game loop.
@@ -110,9 +131,9 @@ class Board:
         """
         # clear board before updating
         self._visual_board = [['   ' for _ in range(9)] for _ in range(10)]
-        for coord in self._board_spaces:
-            if self._board_spaces[coord] is not None:
-                self._visual_board[coord[0]][coord[1]] = self._board_spaces[coord].get_name()
+        for coord, piece in self.get_board().items():
+            if piece is not None:
+                self._visual_board[coord[0]][coord[1]] = piece.get_name()
     
     def set_piece(self, piece) -> None:
         """
@@ -1,10 +1,14 @@
 from MasterPiece import MasterPiece
+from MoveTables import SLIDING_RAYS
+from PieceConstants import CANNON
 
 class Cannon(MasterPiece):
     """
     Represents a cannon piece. Inherits from MasterPiece. Will be instantiated in the Game class and contained
     in the Board class.
     """
+    __slots__ = ()
+
     def __init__(self, color: str, name: str, type: str, location: tuple):
         """
         Uses MasterPiece method to initialize the piece.
@@ -42,11 +46,11 @@ class Cannon(MasterPiece):
         param board: the current game board
         return: True if piece is blocked, else False
         """
-        if board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_color() == self._color:
+        if board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_color_code() == self._color:
             return True
         
         # cannot capture another cannon
-        elif board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_type() == 'cannon':
+        elif board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_type_code() == CANNON:
             return True
 
         cur_loc = self._location
@@ -66,7 +70,7 @@ class Cannon(MasterPiece):
             else:
                 cur_loc = (cur_loc[0], cur_loc[1] - 1)
             while cur_loc[1] != next_loc[1]:
-                if board.get_piece(cur_loc) is not None and board.get_piece(cur_loc).get_type() == 'cannon':
+                if board.get_piece(cur_loc) is not None and board.get_piece(cur_loc).get_type_code() == CANNON:
                     return True
                 elif board.get_piece(cur_loc) is not None:
                     counter += 1
@@ -86,7 +90,7 @@ class Cannon(MasterPiece):
             else:
                 cur_loc = (cur_loc[0] - 1, cur_loc[1])
             while cur_loc[0] != next_loc[0]:
-                if board.get_piece(cur_loc) is not None and board.get_piece(cur_loc).get_type() == 'cannon':
+                if board.get_piece(cur_loc) is not None and board.get_piece(cur_loc).get_type_code() == CANNON:
                     return True
                 elif board.get_piece(cur_loc) is not None:
                     counter += 1
@@ -104,10 +108,44 @@ class Cannon(MasterPiece):
         # handle traversing the palace diagonals
         # can jump over occupied center space so long as it isn't occupied by cannon
         if cur_loc in red_palace_x and next_loc in red_palace_x and board.get_piece((1, 4)) is not None \
-        and board.get_piece((1, 4)).get_type() != 'cannon':
+        and board.get_piece((1, 4)).get_type_code() != CANNON:
             return False
             
         if cur_loc in blue_palace_x and next_loc in blue_palace_x and board.get_piece((8, 4)) is not None \
-        and board.get_piece((8, 4)).get_type() != 'cannon':
+        and board.get_piece((8, 4)).get_type_code() != CANNON:
             return False
-        return True       
+        return True
+
+    def set_valid_moves(self, board) -> None:
+        """
+        Walks outward along each line the cannon can slide on. The first occupied space is the screen, which
+        may not be a cannon. Spaces past the screen are added until the next occupied space, which is added
+        when it holds an opposing piece that is not a cannon. Records the spaces read.
+        return: None
+        """
+        self.clear_moves()
+        watched = []
+
+        for ray in SLIDING_RAYS[self._location]:
+            screened = False
+            for space in ray:
+                watched.append(space)
+                piece = board.get_piece(space)
+
+                # look for a piece to jump over
+                if not screened:
+                    if piece is not None:
+                        if piece.get_type_code() == CANNON:
+                            break
+                        screened = True
+                    continue
+
+                if piece is None:
+                    self.add_move(space)
+                    continue
+
+                # cannot capture same color or another cannon
+                if piece.get_color_code() != self._color and piece.get_type_code() != CANNON:
+                    self.add_move(space)
+                break
+        self._watched = watched
@@ -1,10 +1,13 @@
 from MasterPiece import MasterPiece
+from MoveTables import SLIDING_RAYS
 
 class Chariot(MasterPiece):
     """
     Represents a chariot piece. Inherits from MasterPiece. Will be instantiated in the Game class and contained
     in the Board class.
     """
+    __slots__ = ()
+
     def __init__(self, color: str, name: str, type: str, location: tuple):
         """
         Uses MasterPiece method to initialize the piece.
@@ -41,7 +44,7 @@ class Chariot(MasterPiece):
         param board: the current game board
         return: True if piece is blocked, else False
         """
-        if board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_color() == self._color:
+        if board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_color_code() == self._color:
             return True
 
         cur_loc = self._location
@@ -88,3 +91,26 @@ class Chariot(MasterPiece):
         if cur_loc in blue_palace_x and next_loc in blue_palace_x and board.get_piece((8, 4)) is not None:
             return True
         return False
+
+    def set_valid_moves(self, board) -> None:
+        """
+        Walks outward along each line the chariot can slide on, adding empty spaces until the first occupied
+        space. The occupied space is added when it holds an opposing piece. Records the spaces read.
+        return: None
+        """
+        self.clear_moves()
+        watched = []
+
+        for ray in SLIDING_RAYS[self._location]:
+            for space in ray:
+                watched.append(space)
+                piece = board.get_piece(space)
+                if piece is None:
+                    self.add_move(space)
+                    continue
+
+                # first occupied space ends the line, capture it when it is an opposing piece
+                if piece.get_color_code() != self._color:
+                    self.add_move(space)
+                break
+        self._watched = watched
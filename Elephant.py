@@ -1,10 +1,13 @@
 from MasterPiece import MasterPiece
+from MoveTables import ELEPHANT_MOVES
 
 class Elephant(MasterPiece):
     """
     Represents an elephant piece. Inherits from MasterPiece. Will be instantiated by Game class and contained
     in the Board class. 
     """
+    __slots__ = ()
+
     def __init__(self, color: str, name: str, type: str, location: tuple):
         """
         Uses MasterPiece method to initialize the piece.
@@ -38,7 +41,7 @@ class Elephant(MasterPiece):
         param board: the current game board
         return: True if piece is blocked, else False
         """
-        if board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_color() == self._color:
+        if board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_color_code() == self._color:
             return True
 
         cur_loc = self._location
@@ -74,5 +77,23 @@ class Elephant(MasterPiece):
         # check spot for occupation
         if board.get_piece(cur_loc) is not None:
             return True  
-        return False  
-        
\ No newline at end of file
+        return False
+
+    def set_valid_moves(self, board) -> None:
+        """
+        Looks up the elephant's destinations and adds each one whose two intermediate spaces are empty and
+        which is not occupied by a piece of the same color. Records the spaces read.
+        return: None
+        """
+        self.clear_moves()
+        watched = []
+
+        for space, legs in ELEPHANT_MOVES[self._location]:
+            watched.extend(legs)
+            if board.get_piece(legs[0]) is not None or board.get_piece(legs[1]) is not None:
+                continue
+            watched.append(space)
+            piece = board.get_piece(space)
+            if piece is None or piece.get_color_code() != self._color:
+                self.add_move(space)
+        self._watched = watched
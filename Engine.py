@@ -0,0 +1,350 @@
+import time
+
+from Evaluation import PIECE_VALUES, evaluate
+from JanggiGame import JanggiGame
+from TranspositionTable import TranspositionTable, EXACT, LOWER, UPPER
+
+MATE_SCORE = 100000
+MAX_PLY = 64
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time budget runs out. Iterative deepening catches it and keeps the
+    result of the last finished depth.
+    """
+    pass
+
+
+class Engine:
+    """
+    Picks moves for the player to move in a JanggiGame. Uses negamax alpha-beta search with iterative
+    deepening under a time budget and a quiescence search over captures at the leaves. Moves are ordered
+    with captures first by most valuable victim / least valuable attacker, then killer moves, then the
+    history table. Moves are made and taken back on the game itself with push_move and pop_move, so the
+    board is never copied. Results are kept in a transposition table so positions reached by different move
+    orders are not searched again.
+    """
+    def __init__(self, game: JanggiGame, table: TranspositionTable = None, table_mb: float = 16, book=None):
+        """
+        Initializes the engine for a game along with its search statistics and move ordering tables.
+        param game: game to search, left in the same position after each search
+        param table: transposition table to use, may be shared between engines
+        param table_mb: memory cap of the transposition table created when none is given
+        param book: OpeningBook to take moves from before searching, or None
+        """
+        self._game = game
+        self._book = book
+        self._board = game.get_board()
+        self._table = table if table is not None else TranspositionTable(table_mb)
+        self._nodes = 0
+        self._seconds = 0.0
+        self._depth = 0
+        self._score = 0
+        self._deadline = None
+        self._killers = [[None, None] for _ in range(MAX_PLY)]
+        self._history = {}
+        self._iterations = []
+
+    def get_nodes(self) -> int:
+        """
+        Returns the number of positions visited by the last search.
+        """
+        return self._nodes
+
+    def get_nps(self) -> float:
+        """
+        Returns the nodes searched per second by the last search.
+        """
+        return self._nodes / self._seconds if self._seconds else 0.0
+
+    def get_table(self) -> TranspositionTable:
+        """
+        Returns the engine's transposition table, for its statistics.
+        """
+        return self._table
+
+    def get_depth(self) -> int:
+        """
+        Returns the deepest depth finished by the last search.
+        """
+        return self._depth
+
+    def get_score(self) -> int:
+        """
+        Returns the score of the last search's best move for the player to move, in hundredths of a soldier.
+        """
+        return self._score
+
+    def get_iterations(self) -> list:
+        """
+        Returns the result of each depth finished by the last search.
+        return: list of (depth, score, best move) tuples, moves as (current coordinate, destination coordinate)
+        """
+        return self._iterations
+
+    def search(self, time_limit: float = 1.0, max_depth: int = MAX_PLY - 1, root_moves: list = None):
+        """
+        Searches the current position one depth at a time until the time runs out or max_depth is finished.
+        When the engine has an opening book with a move for the position, the book move is played instead.
+        param time_limit: seconds to search for
+        param max_depth: deepest depth to search
+        param root_moves: legal moves to choose between as (current coordinate, destination coordinate)
+        tuples, every legal move when None, used to split the root moves between several engines
+        return: best move as a (move from, move to) pair in the algebraic notation make_move accepts, or
+        None when the player to move has no legal moves
+        """
+        start = time.perf_counter()
+        self._deadline = start + time_limit
+        self._nodes = 0
+        self._depth = 0
+        self._killers = [[None, None] for _ in range(MAX_PLY)]
+        self._history = {}
+        self._iterations = []
+
+        # a book move needs no search
+        if self._book is not None and root_moves is None:
+            move = self._book.get_move(self._game)
+            if move is not None:
+                self._seconds = time.perf_counter() - start
+                return self._board.convert_to_algebraic(move[0]), self._board.convert_to_algebraic(move[1])
+
+        moves = self._game.generate_legal_moves()
+        if root_moves is not None:
+            legal = set(moves)
+            moves = [move for move in root_moves if move in legal]
+        best_move = moves[0] if moves else None
+
+        # a split of the root moves is searched even when it holds one move, so its score is known
+        if len(moves) > 1 or (moves and root_moves is not None):
+            for depth in range(1, max_depth + 1):
+                try:
+                    score, move = self._search_root(moves, depth, best_move)
+                except SearchTimeout:
+                    break
+                best_move = move
+                self._score = score
+                self._depth = depth
+                self._iterations.append((depth, score, move))
+
+                # a forced mate will not get any shorter
+                if abs(score) >= MATE_SCORE - MAX_PLY:
+                    break
+        self._seconds = time.perf_counter() - start
+
+        if best_move is None:
+            return None
+        return self._board.convert_to_algebraic(best_move[0]), self._board.convert_to_algebraic(best_move[1])
+
+    def evaluate(self) -> int:
+        """
+        Scores the current position for the player to move by material and piece-square tables. The game keeps
+        the score up to date on each move, so nothing is counted here.
+        return: score of the player to move minus the opponent's score
+        """
+        return evaluate(self._game)
+
+    def _search_root(self, moves: list, depth: int, best_move: tuple) -> tuple:
+        """
+        Searches each root move to the given depth, starting with the best move of the previous depth.
+        param moves: legal moves of the current position
+        param depth: depth to search
+        param best_move: move to search first
+        return: tuple of the best score and best move
+        """
+        game = self._game
+        alpha = -MATE_SCORE - 1
+        ordered = self._order_moves(moves, 0, best_move)
+        best = ordered[0]
+        for move in ordered:
+            game.push_move(move[0], move[1])
+            try:
+                score = -self._negamax(depth - 1, -MATE_SCORE - 1, -alpha, 1)
+            finally:
+                game.pop_move()
+            if score > alpha:
+                alpha = score
+                best = move
+        self._table.store(game.get_position_hash(), depth, alpha, EXACT, best)
+        return alpha, best
+
+    def _negamax(self, depth: int, alpha: int, beta: int, ply: int) -> int:
+        """
+        Alpha-beta search of the current position from the point of view of the player to move.
+        param depth: remaining depth, quiescence search starts at zero
+        param alpha: lower bound of the score
+        param beta: upper bound of the score
+        param ply: distance from the root
+        return: score of the position
+        """
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self._quiesce(alpha, beta, ply)
+        self._count_node()
+
+        # use a stored result when it is deep enough, otherwise just its move for ordering
+        game = self._game
+        key = game.get_position_hash()
+        entry = self._table.probe(key)
+        table_move = None
+        if entry is not None:
+            entry_depth, entry_score, bound, table_move = entry
+            if entry_depth >= depth:
+                entry_score = self._score_from_table(entry_score, ply)
+                if bound == EXACT or (bound == LOWER and entry_score >= beta) or (bound == UPPER and entry_score <= alpha):
+                    return entry_score
+
+        moves = game.generate_legal_moves()
+        if not moves:
+            return -MATE_SCORE + ply
+
+        original_alpha = alpha
+        best_move = None
+        for move in self._order_moves(moves, ply, table_move):
+            capture = self._board.get_piece(move[1]) if move[0] != move[1] else None
+            game.push_move(move[0], move[1])
+            try:
+                score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.pop_move()
+
+            if score >= beta:
+                # remember quiet moves that cause a cutoff
+                if capture is None:
+                    killers = self._killers[ply]
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                    self._history[move] = self._history.get(move, 0) + depth * depth
+                self._table.store(key, depth, self._score_to_table(beta, ply), LOWER, move)
+                return beta
+            if score > alpha:
+                alpha = score
+                best_move = move
+
+        bound = EXACT if alpha > original_alpha else UPPER
+        self._table.store(key, depth, self._score_to_table(alpha, ply), bound, best_move)
+        return alpha
+
+    @staticmethod
+    def _score_to_table(score: int, ply: int) -> int:
+        """
+        Converts a mate score to distance from the stored position instead of from the root.
+        param score: score from the search
+        param ply: distance of the position from the root
+        return: score to store
+        """
+        if score >= MATE_SCORE - MAX_PLY:
+            return score + ply
+        if score <= -MATE_SCORE + MAX_PLY:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_table(score: int, ply: int) -> int:
+        """
+        Converts a stored mate score back to distance from the root.
+        param score: stored score
+        param ply: distance of the position from the root
+        return: score for the search
+        """
+        if score >= MATE_SCORE - MAX_PLY:
+            return score - ply
+        if score <= -MATE_SCORE + MAX_PLY:
+            return score + ply
+        return score
+
+    def _quiesce(self, alpha: int, beta: int, ply: int) -> int:
+        """
+        Searches captures until the position is quiet so the score is not taken in the middle of an exchange.
+        When the player to move is in check every legal move is searched instead.
+        param alpha: lower bound of the score
+        param beta: upper bound of the score
+        param ply: distance from the root
+        return: score of the position
+        """
+        self._count_node()
+        game = self._game
+        color = game.get_player_turn()
+        in_check = game.is_check(color)
+        if in_check and ply >= MAX_PLY - 1:
+            return self.evaluate()
+
+        if in_check:
+            moves = game.generate_legal_moves()
+            if not moves:
+                return -MATE_SCORE + ply
+        else:
+            stand_pat = self.evaluate()
+            if stand_pat >= beta or ply >= MAX_PLY - 1:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            moves = self._captures(color)
+
+        for move in self._order_moves(moves, ply, None):
+            game.push_move(move[0], move[1])
+            try:
+                score = -self._quiesce(-beta, -alpha, ply + 1)
+            finally:
+                game.pop_move()
+            if score >= beta:
+                return beta
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _captures(self, color: str) -> list:
+        """
+        Generates the legal captures of the color.
+        param color: color of the capturing player
+        return: list of (current coordinate, destination coordinate) tuples
+        """
+        game = self._game
+        board = self._board
+        captures = []
+        for piece in list(game.get_pieces()):
+            if piece.get_color() != color:
+                continue
+            piece_loc = piece.get_location()
+            for move in piece.get_valid_moves():
+                if board.get_piece(move) is not None and not game.leaves_in_check(piece_loc, move, color):
+                    captures.append((piece_loc, move))
+        return captures
+
+    def _order_moves(self, moves: list, ply: int, best_move) -> list:
+        """
+        Sorts moves so the ones most likely to cause a cutoff are searched first: the given best move, then
+        captures by most valuable victim and least valuable attacker, then killer moves, then by history.
+        param moves: moves to sort
+        param ply: distance from the root, selects the killer moves
+        param best_move: move to put first, or None
+        return: sorted list of moves
+        """
+        board = self._board
+        killers = self._killers[ply]
+        history = self._history
+
+        def key(move):
+            if move == best_move:
+                return 10 ** 9
+            if move[0] != move[1]:
+                victim = board.get_piece(move[1])
+                if victim is not None:
+                    attacker = board.get_piece(move[0])
+                    return 10 ** 8 + PIECE_VALUES[victim.get_type()] * 16 - PIECE_VALUES[attacker.get_type()] // 100
+            if move == killers[0]:
+                return 10 ** 7 + 1
+            if move == killers[1]:
+                return 10 ** 7
+            return history.get(move, 0)
+
+        return sorted(moves, key=key, reverse=True)
+
+    def _count_node(self) -> None:
+        """
+        Counts a visited position and checks the clock. Nodes take long enough here that reading the clock at
+        every one costs little, and the search stops within a node of the time limit.
+        return: None
+        """
+        self._nodes += 1
+        if time.perf_counter() > self._deadline:
+            raise SearchTimeout()
@@ -0,0 +1,136 @@
+"""
+Static evaluation of positions: material plus piece-square scores, in hundredths of a soldier. Like the Zobrist
+hash, a position's score is a sum over its pieces of a table entry for the piece on its space, so JanggiGame keeps
+the score up to date on each move by subtracting the moving piece's old entry, adding its new one, and
+subtracting any captured piece's entry, instead of walking the board.
+
+Scores are stored with blue positive and red negative, so the sum is blue's score minus red's. evaluate_batch
+scores many positions at once from the board arrays of BatchMoves and needs NumPy, which the rest of the module
+does not.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ArrayBoard import BLUE_BIT
+from MoveTables import BOARD_COLS, BOARD_ROWS, SQUARES
+from PieceConstants import BLUE, CANNON, CHARIOT, COLOR_NAMES, ELEPHANT, GENERAL, HORSE, RED, SOLDIER, TYPE_NAMES
+
+# material values in hundredths of a soldier, the general is never captured
+PIECE_VALUES = {'general': 0, 'guard': 300, 'elephant': 300, 'horse': 500, 'cannon': 700, 'chariot': 1300,
+                'soldier': 200}
+
+
+def _bonus(piece_type: int, row: int, col: int) -> int:
+    """
+    Returns the piece-square bonus of a piece, with rows counted from the piece's own back rank.
+    param piece_type: type code of the piece
+    param row: rank from the piece's own side, 0 for its back rank
+    param col: file, 0 to 8
+    return: bonus in hundredths of a soldier
+    """
+    center = 4 - abs(col - 4)
+    if piece_type == SOLDIER:
+        # soldiers gain as they near the enemy palace, most on its center files
+        advance = (0, 0, 0, 0, 0, 20, 40, 60, 70, 40)[row]
+        return advance + (10 if row >= 6 and 3 <= col <= 5 else 0)
+    if piece_type == HORSE:
+        # horses are blocked on the edge and back rank, and reach more from the center
+        return 4 * center + 4 * min(row, 6) - (10 if col in (0, 8) else 0)
+    if piece_type == ELEPHANT:
+        return -10 if col in (0, 8) else 0
+    if piece_type == CHARIOT:
+        # chariots do most in the enemy half, and in the enemy palace along its diagonals
+        return (10 if row >= 5 else 0) + (10 if row >= 7 and 3 <= col <= 5 else 0)
+    if piece_type == CANNON:
+        # cannons on the center files bear on the palaces
+        return 10 if 3 <= col <= 5 else 0
+    if piece_type == GENERAL:
+        return 10 if (row, col) == (1, 4) else 0
+    return 0
+
+
+def _build_scores(color: int, piece_type: int) -> tuple:
+    """
+    Builds a color's table of material plus bonus for a type, signed so blue is positive and red negative.
+    param color: color code
+    param piece_type: type code
+    return: tuple of scores indexed by row * 9 + col
+    """
+    sign = 1 if color == BLUE else -1
+    value = PIECE_VALUES[TYPE_NAMES[piece_type]]
+    scores = []
+    for row, col in SQUARES:
+        # blue starts at the top of the board, so its own back rank is the last row
+        own_row = BOARD_ROWS - 1 - row if color == BLUE else row
+        scores.append(sign * (value + _bonus(piece_type, own_row, col)))
+    return tuple(scores)
+
+
+# indexed by color code, type code, then row * 9 + col
+SQUARE_SCORES = tuple(tuple(_build_scores(color, piece_type) if piece_type else (0,) * len(SQUARES)
+                            for piece_type, _ in enumerate(TYPE_NAMES))
+                      for color, _ in enumerate(COLOR_NAMES))
+
+# SQUARE_SCORES as an array indexed by ArrayBoard code for evaluate_batch, built when first needed
+_table = None
+
+
+def piece_score(piece, coord: tuple) -> int:
+    """
+    Returns the score of the piece standing on the coordinate.
+    param piece: piece object
+    param coord: coordinate of the piece
+    return: material plus bonus, positive for blue and negative for red
+    """
+    return SQUARE_SCORES[piece.get_color_code()][piece.get_type_code()][coord[0] * BOARD_COLS + coord[1]]
+
+
+def score_pieces(pieces) -> int:
+    """
+    Computes a position's score from scratch. Used to set the starting score and to check incremental updates.
+    param pieces: pieces on the board
+    return: blue's score minus red's
+    """
+    score = 0
+    for piece in pieces:
+        score += piece_score(piece, piece.get_location())
+    return score
+
+
+def evaluate(game) -> int:
+    """
+    Scores a game's position for the player to move.
+    param game: JanggiGame object
+    return: the player to move's score minus the opponent's
+    """
+    score = game.get_score()
+    return score if game.get_player_turn() == 'blue' else -score
+
+
+def evaluate_batch(boards, turns):
+    """
+    Scores many positions at once for the players to move.
+    param boards: (N, 10, 9) int8 array of ArrayBoard codes, as written by BatchMoves.encode_games
+    param turns: (N,) array of the color codes to move
+    return: (N,) int32 array of each player to move's score minus the opponent's
+    """
+    if np is None:
+        raise ImportError('evaluate_batch needs numpy')
+    cells = np.asarray(boards, dtype=np.int8).reshape(-1, len(SQUARES)).astype(np.intp)
+    scores = _code_table()[cells, np.arange(len(SQUARES))].sum(axis=1, dtype=np.int32)
+    return np.where(np.asarray(turns) == BLUE, scores, -scores).astype(np.int32)
+
+
+def _code_table():
+    """
+    Returns SQUARE_SCORES as a (16, 90) array indexed by ArrayBoard code, built the first time it is needed.
+    """
+    global _table
+    if _table is None:
+        _table = np.zeros((2 * BLUE_BIT, len(SQUARES)), dtype=np.int32)
+        for piece_type in range(GENERAL, SOLDIER + 1):
+            _table[piece_type] = SQUARE_SCORES[RED][piece_type]
+            _table[piece_type | BLUE_BIT] = SQUARE_SCORES[BLUE][piece_type]
+    return _table
@@ -0,0 +1,217 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+
+from MoveTables import BOARD_COLS, SQUARES
+
+# file layout: magic, game records, index of record offsets, trailer, all numbers little endian
+# a record is a header of move count and result followed by two bytes per move, the square indexes moved
+# from and to, where a pass moves from a square to itself
+MAGIC = b'JGA1'
+HEADER = struct.Struct('<HB')
+TRAILER = struct.Struct('<QQ4s')
+OFFSET = struct.Struct('<Q')
+
+RESULTS = ('UNFINISHED', 'RED_WON', 'BLUE_WON')
+RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+
+# squares in algebraic notation by index
+ALGEBRAIC = tuple('abcdefghi'[col] + str(row + 1) for row, col in SQUARES)
+ALGEBRAIC_INDEXES = {name: index for index, name in enumerate(ALGEBRAIC)}
+
+
+def encode_moves(moves) -> bytes:
+    """
+    Packs moves in to two bytes each.
+    param moves: iterable of (move from, move to) pairs, either algebraic strings or board coordinates
+    return: packed moves
+    """
+    packed = bytearray()
+    for move_from, move_to in moves:
+        for square in (move_from, move_to):
+            if isinstance(square, str):
+                packed.append(ALGEBRAIC_INDEXES[square])
+            else:
+                packed.append(square[0] * BOARD_COLS + square[1])
+    return bytes(packed)
+
+
+def decode_moves(packed):
+    """
+    Unpacks moves stored by encode_moves.
+    param packed: bytes-like object of packed moves
+    return: generator of (current coordinate, destination coordinate) tuples
+    """
+    for index in range(0, len(packed) - 1, 2):
+        yield SQUARES[packed[index]], SQUARES[packed[index + 1]]
+
+
+class GameArchiveWriter:
+    """
+    Writes games to a binary archive file one at a time, then the index of where each game starts when closed.
+    Can be used as a context manager.
+    """
+    def __init__(self, path: str):
+        """
+        Opens the archive file for writing.
+        param path: file to write
+        """
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._offsets = []
+        self._position = len(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_game(self, moves, result: str = 'UNFINISHED') -> int:
+        """
+        Appends a game to the archive.
+        param moves: iterable of (move from, move to) pairs, either algebraic strings or board coordinates
+        param result: final game state
+        return: index of the game in the archive
+        """
+        packed = encode_moves(moves)
+        if len(packed) // 2 > 0xFFFF:
+            raise ValueError('game has more moves than an archive record holds')
+        self._offsets.append(self._position)
+        self._file.write(HEADER.pack(len(packed) // 2, RESULT_CODES[result]))
+        self._file.write(packed)
+        self._position += HEADER.size + len(packed)
+        return len(self._offsets) - 1
+
+    def close(self) -> None:
+        """
+        Writes the index and trailer and closes the file.
+        return: None
+        """
+        if self._file.closed:
+            return
+        for offset in self._offsets:
+            self._file.write(OFFSET.pack(offset))
+        self._file.write(TRAILER.pack(len(self._offsets), self._position, MAGIC))
+        self._file.close()
+
+
+class GameArchive:
+    """
+    Reads a binary archive by memory mapping it, so only the pages holding the games read are loaded. Any game
+    can be found by index through the index at the end of the file. Its moves are returned as a copy of the
+    two bytes per move, so they stay usable after the archive is closed. Can be used as a context manager.
+    """
+    def __init__(self, path: str):
+        """
+        Maps the archive file and reads its trailer. Raises ValueError when the file is not a whole archive.
+        param path: file to read
+        """
+        self._file = open(path, 'rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < len(MAGIC) + TRAILER.size:
+                raise ValueError(path + ' is too short to be a game archive')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            count, index_offset, magic = TRAILER.unpack_from(self._map, size - TRAILER.size)
+            if self._map[:len(MAGIC)] != MAGIC or magic != MAGIC:
+                raise ValueError(path + ' is not a game archive')
+            if index_offset < len(MAGIC) or index_offset + count * OFFSET.size != size - TRAILER.size:
+                raise ValueError(path + ' is a truncated or damaged game archive')
+        except BaseException:
+            self.close()
+            raise
+        self._count = count
+        self._index_offset = index_offset
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield decode_moves(self.get_moves(index))
+
+    def get_moves(self, index: int) -> bytes:
+        """
+        Returns a copy of a game's packed moves, for decode_moves.
+        param index: index of the game
+        return: two bytes per move
+        """
+        offset = self._get_offset(index)
+        count = HEADER.unpack_from(self._map, offset)[0]
+        start = offset + HEADER.size
+        return self._map[start:start + count * 2]
+
+    def get_result(self, index: int) -> str:
+        """
+        Returns a game's recorded final game state.
+        param index: index of the game
+        """
+        return RESULTS[HEADER.unpack_from(self._map, self._get_offset(index))[1]]
+
+    def get_game(self, index: int) -> tuple:
+        """
+        Returns a game's moves and recorded result.
+        param index: index of the game
+        return: tuple of a list of (current coordinate, destination coordinate) tuples and the final game state
+        """
+        return list(decode_moves(self.get_moves(index))), self.get_result(index)
+
+    def _get_offset(self, index: int) -> int:
+        """
+        Reads where a game's record starts from the index.
+        param index: index of the game, negative to count from the end
+        return: offset of the record in the file
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('game index out of range')
+        return OFFSET.unpack_from(self._map, self._index_offset + index * OFFSET.size)[0]
+
+    def close(self) -> None:
+        """
+        Releases the mapping and closes the file.
+        return: None
+        """
+        if self._file.closed:
+            return
+        try:
+            if hasattr(self, '_map'):
+                self._map.close()
+        finally:
+            self._file.close()
+
+
+def main(args=None) -> int:
+    """
+    Command line entry point. Packs games from a file of JSON lines, such as SelfPlay output, in to an archive.
+    param args: command line arguments, sys.argv when None
+    return: exit status
+    """
+    parser = argparse.ArgumentParser(description='Pack Janggi games from JSON lines in to a binary archive.')
+    parser.add_argument('games', help='file of games, one JSON list of move pairs or SelfPlay game per line')
+    parser.add_argument('archive', help='archive file to write')
+    options = parser.parse_args(args)
+
+    with open(options.games) as game_file, GameArchiveWriter(options.archive) as writer:
+        for line in game_file:
+            if line.strip():
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    writer.add_game(record['moves'], record.get('result', 'UNFINISHED'))
+                else:
+                    writer.add_game(record)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,366 @@
+import argparse
+import asyncio
+import collections
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from JanggiGame import JanggiGame
+from MoveCache import MoveCache
+
+# latency samples kept per session for the percentiles
+LATENCY_SAMPLES = 256
+
+COMMANDS = ('NEW', 'MOVE', 'MOVES', 'STATE', 'STATS', 'CLOSE', 'QUIT')
+
+
+def check_move(fen: str, move_from: str, move_to: str) -> dict:
+    """
+    Makes a move on a copy of a position, run in a worker process so validation and the mate search do not
+    hold up the server. Valid moves are not tracked, so only the moving piece and a checked player's pieces
+    have their moves calculated.
+    param fen: position string of the session's game
+    param move_from: algebraic notation of the piece to move
+    param move_to: algebraic notation of the destination
+    return: dictionary with whether the move was legal, the position string after it, and the game state
+    """
+    game = JanggiGame.from_fen(fen, track_moves=False)
+    legal = game.make_move(move_from, move_to)
+    return {'legal': legal, 'fen': game.to_fen(), 'state': game.get_game_state()}
+
+
+def find_moves(fen: str) -> list:
+    """
+    Lists the legal moves of a position, run in a worker process so move generation does not hold up the server.
+    param fen: position string of the session's game
+    return: list of (move from, move to) algebraic pairs
+    """
+    return JanggiGame.from_fen(fen, track_moves=False).legal_moves()
+
+
+class Session:
+    """
+    One game hosted by the server. Holds the game, its state, a lock so moves in the session are handled one
+    at a time, and the time taken to answer each of the session's requests.
+    """
+    def __init__(self, session_id: str, game: JanggiGame):
+        """
+        Initializes the session with a game and empty latency statistics.
+        param session_id: id clients use to refer to the session
+        param game: game played in the session
+        """
+        self._id = session_id
+        self._game = game
+        self._state = game.get_game_state()
+        self._lock = asyncio.Lock()
+        self._requests = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+        self._latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    def get_id(self) -> str:
+        """
+        Returns the session id.
+        """
+        return self._id
+
+    def get_game(self) -> JanggiGame:
+        """
+        Returns the session's game.
+        """
+        return self._game
+
+    def get_state(self) -> str:
+        """
+        Returns the state of the session's game.
+        """
+        return self._state
+
+    def get_lock(self) -> asyncio.Lock:
+        """
+        Returns the lock held while a move is being made in the session.
+        """
+        return self._lock
+
+    def set_position(self, game: JanggiGame, state: str) -> None:
+        """
+        Replaces the session's game with the position after a move, along with its game state.
+        param game: game at the new position
+        param state: game state after the move
+        return: None
+        """
+        self._game = game
+        self._state = state
+
+    def describe(self) -> dict:
+        """
+        Returns the session's position for sending to clients.
+        """
+        return {'session': self._id, 'fen': self._game.to_fen(), 'turn': self._game.get_player_turn(),
+                'state': self._state, 'red_in_check': self._game.is_in_check('red'),
+                'blue_in_check': self._game.is_in_check('blue')}
+
+    def record(self, seconds: float) -> None:
+        """
+        Records the time taken to answer one of the session's requests.
+        param seconds: time from receiving the request to having the response ready
+        return: None
+        """
+        self._requests += 1
+        self._total_seconds += seconds
+        self._max_seconds = max(self._max_seconds, seconds)
+        self._latencies.append(seconds)
+
+    def get_stats(self) -> dict:
+        """
+        Returns the session's request count and latencies in milliseconds, with percentiles over the most
+        recent LATENCY_SAMPLES requests.
+        """
+        samples = sorted(self._latencies)
+
+        def percentile(share):
+            return samples[min(len(samples) - 1, int(share * len(samples)))] * 1000 if samples else 0.0
+
+        return {'requests': self._requests,
+                'mean_ms': self._total_seconds / self._requests * 1000 if self._requests else 0.0,
+                'max_ms': self._max_seconds * 1000, 'p50_ms': percentile(0.5), 'p95_ms': percentile(0.95)}
+
+
+class GameServer:
+    """
+    Hosts many games over a local TCP connection with a line protocol. Each request is one line of words and
+    each response is one line of JSON with 'ok' set to whether the request succeeded:
+
+        NEW [position string]        start a session, from the starting setup or a position string
+        MOVE <session> <from> <to>   make a move, in the algebraic notation make_move accepts
+        MOVES <session>              list the legal moves of the player to move
+        STATE <session>              show the position, player to move, checks, and game state
+        STATS <session>              show the session's request latencies
+        CLOSE <session>              end a session
+        QUIT                         close the connection
+
+    Sessions are not tied to a connection. Moves are checked and legal moves listed in a pool of worker
+    processes on a copy of the position, so a slow mate search in one session does not hold up requests for
+    other sessions. All games share one legal move cache.
+    """
+    def __init__(self, workers: int = None, max_sessions: int = 10000, cache_size: int = 4096):
+        """
+        Initializes the server without starting it.
+        param workers: number of worker processes, the number of cores when None, moves are checked in the
+        server's own process when 0
+        param max_sessions: most sessions open at once
+        param cache_size: positions kept in the legal move cache shared by all games
+        """
+        self._workers = workers
+        self._executor = None
+        self._max_sessions = max_sessions
+        self._move_cache = MoveCache(cache_size)
+        self._sessions = {}
+        self._next_id = 1
+        self._server = None
+        # writer of each open connection by the task handling it
+        self._clients = {}
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        """
+        Starts the worker pool and begins accepting connections.
+        param host: address to listen on
+        param port: port to listen on, any free port when 0
+        return: port the server is listening on
+        """
+        if self._workers != 0:
+            self._executor = ProcessPoolExecutor(self._workers)
+        self._server = await asyncio.start_server(self.handle_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """
+        Serves connections until cancelled.
+        return: None
+        """
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """
+        Stops accepting connections, closes the open ones and waits for their handlers to finish, then shuts
+        down the worker pool.
+        return: None
+        """
+        if self._server is not None:
+            self._server.close()
+        # closing a connection ends its handler's read, a handler waiting on a worker finishes that request first
+        for writer in self._clients.values():
+            writer.close()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def get_sessions(self) -> dict:
+        """
+        Returns the open sessions by id.
+        """
+        return self._sessions
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answers one connection's requests until it sends QUIT or disconnects.
+        param reader: stream of request lines
+        param writer: stream for response lines
+        return: None
+        """
+        task = asyncio.current_task()
+        self._clients[task] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode(errors='replace').split()
+                if words and words[0].upper() == 'QUIT':
+                    break
+                try:
+                    response = await self.handle_request(words)
+                except Exception as error:
+                    # a bad request, such as a space off the board, gets an error reply and the connection stays open
+                    response = {'ok': False, 'error': str(error)}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self._clients[task]
+            writer.close()
+
+    async def handle_request(self, words: list) -> dict:
+        """
+        Answers one request and records its latency on the session it refers to.
+        param words: words of the request line
+        return: response dictionary
+        """
+        start = time.perf_counter()
+        if not words or words[0].upper() not in COMMANDS:
+            return {'ok': False, 'error': 'unknown command, expected one of ' + ', '.join(COMMANDS)}
+        command = words[0].upper()
+        if command == 'NEW':
+            return self.new_session(' '.join(words[1:]))
+
+        session = self._sessions.get(words[1]) if len(words) > 1 else None
+        if session is None:
+            return {'ok': False, 'error': 'unknown session'}
+        if command == 'MOVE':
+            if len(words) != 4:
+                return {'ok': False, 'error': 'expected MOVE <session> <from> <to>'}
+            response = await self.make_move(session, words[2], words[3])
+        elif command == 'MOVES':
+            response = {'ok': True, 'session': session.get_id(), 'moves': await self.list_moves(session)}
+        elif command == 'STATE':
+            response = dict(session.describe(), ok=True)
+        elif command == 'STATS':
+            response = {'ok': True, 'session': session.get_id(), 'latency': session.get_stats()}
+        else:
+            del self._sessions[session.get_id()]
+            return {'ok': True, 'session': session.get_id()}
+        session.record(time.perf_counter() - start)
+        return response
+
+    def new_session(self, fen: str = '') -> dict:
+        """
+        Opens a session from the starting setup or a position string.
+        param fen: position string, see JanggiGame.from_fen, or empty for the starting setup
+        return: response dictionary with the session's position
+        """
+        if len(self._sessions) >= self._max_sessions:
+            return {'ok': False, 'error': 'too many sessions'}
+        try:
+            if fen:
+                game = JanggiGame.from_fen(fen, track_moves=False, move_cache=self._move_cache)
+            else:
+                game = JanggiGame(move_cache=self._move_cache)
+        except ValueError as error:
+            return {'ok': False, 'error': str(error)}
+        session = Session(str(self._next_id), game)
+        self._next_id += 1
+        self._sessions[session.get_id()] = session
+        return dict(session.describe(), ok=True)
+
+    async def list_moves(self, session: Session) -> list:
+        """
+        Lists the legal moves of the player to move. Positions in the shared move cache are answered straight
+        away, others are generated in the worker pool and added to the cache.
+        param session: session to list the moves of
+        return: list of (move from, move to) algebraic pairs, empty when the game is over
+        """
+        game = session.get_game()
+        if session.get_state() != 'UNFINISHED':
+            return []
+        if self._executor is None:
+            return game.legal_moves()
+        key = game.get_position_hash()
+        moves = self._move_cache.get(key)
+        if moves is None:
+            loop = asyncio.get_running_loop()
+            moves = tuple(await loop.run_in_executor(self._executor, find_moves, game.to_fen()))
+            self._move_cache.put(key, moves)
+        return list(moves)
+
+    async def make_move(self, session: Session, move_from: str, move_to: str) -> dict:
+        """
+        Checks a move in the worker pool and, when it is legal, moves the session to the resulting position.
+        Moves in the same session wait for each other so each is checked against the latest position.
+        param session: session to move in
+        param move_from: algebraic notation of the piece to move
+        param move_to: algebraic notation of the destination
+        return: response dictionary with the session's position
+        """
+        async with session.get_lock():
+            if session.get_state() != 'UNFINISHED':
+                return dict(session.describe(), ok=False, error='game is over')
+            fen = session.get_game().to_fen()
+            if self._executor is None:
+                result = check_move(fen, move_from, move_to)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, check_move, fen, move_from, move_to)
+            if not result['legal']:
+                return dict(session.describe(), ok=False, error='illegal move')
+            game = JanggiGame.from_fen(result['fen'], track_moves=False, move_cache=self._move_cache)
+            session.set_position(game, result['state'])
+            return dict(session.describe(), ok=True)
+
+
+def main(args=None) -> int:
+    """
+    Command line entry point. Runs the server until interrupted.
+    param args: command line arguments, sys.argv when None
+    return: exit status
+    """
+    parser = argparse.ArgumentParser(description='Host Janggi games over a local line protocol.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=7000, help='port to listen on')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, defaults to the core count')
+    parser.add_argument('--max-sessions', type=int, default=10000, help='most sessions open at once')
+    options = parser.parse_args(args)
+
+    async def run():
+        server = GameServer(options.workers, options.max_sessions)
+        port = await server.start(options.host, options.port)
+        print('listening on', options.host, port)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
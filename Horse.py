@@ -1,10 +1,13 @@
 from MasterPiece import MasterPiece
+from MoveTables import HORSE_MOVES
 
 class Horse(MasterPiece):
     """
     Represents a horse piece. Inherits from MasterPiece. Will be instantiated in the Game class and contained
     in the Board class.
     """
+    __slots__ = ()
+
     def __init__(self, color: str, name: str, type, location: tuple):
         """
         Uses MasterPiece method to initialize the piece.
@@ -38,7 +41,7 @@ class Horse(MasterPiece):
         param board: the current game board
         return: True if piece is blocked, else False
         """
-        if board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_color() == self._color:
+        if board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_color_code() == self._color:
             return True
 
         cur_loc = self._location
@@ -61,4 +64,23 @@ class Horse(MasterPiece):
         # only need to check the orthogonal move
         if board.get_piece(cur_loc) is not None:
             return True
-        return False   
+        return False
+
+    def set_valid_moves(self, board) -> None:
+        """
+        Looks up the horse's destinations and adds each one whose orthogonal leg is empty and which is not
+        occupied by a piece of the same color. Records the spaces read.
+        return: None
+        """
+        self.clear_moves()
+        watched = []
+
+        for space, leg in HORSE_MOVES[self._location]:
+            watched.append(leg)
+            if board.get_piece(leg) is not None:
+                continue
+            watched.append(space)
+            piece = board.get_piece(space)
+            if piece is None or piece.get_color_code() != self._color:
+                self.add_move(space)
+        self._watched = watched
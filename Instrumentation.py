@@ -0,0 +1,240 @@
+"""
+Opt-in counters and timers for the game's hot paths. Nothing is measured until enable is called or a profile
+block is entered: the wrappers that count and time calls are only installed on the classes then, and the
+original methods are put back by disable, so a disabled build runs exactly the uninstrumented code.
+
+    with profile() as result:
+        game.make_move('c10', 'd8')
+    print(result.report())
+"""
+import contextlib
+import json
+import time
+
+from ArrayBoard import ArrayBoard
+from Board import Board
+from Cannon import Cannon
+from Chariot import Chariot
+from Elephant import Elephant
+from General import General
+from Guard import Guard
+from Horse import Horse
+from JanggiGame import JanggiGame
+from Soldier import Soldier
+
+PIECE_CLASSES = (General, Guard, Elephant, Horse, Chariot, Cannon, Soldier)
+PIECE_METHODS = ('set_valid_moves',)
+BOARD_CLASSES = (Board, ArrayBoard)
+BOARD_METHODS = ('copy',)
+GAME_METHODS = ('make_move', 'play_move', 'push_move', 'pop_move', 'update_valid_moves', 'update_moves_after',
+                'generate_legal_moves', 'is_check', 'is_square_attacked', 'leaves_in_check', 'get_evasions',
+                'is_mate')
+
+# counted for each leaves_in_check call made inside is_mate
+MATE_TRIAL = 'is_mate trial moves'
+
+# added to a piece class's label for the count of board spaces its set_valid_moves read from the move tables
+SPACES_READ = ' spaces read'
+
+_active = None
+_originals = []
+
+
+class Profile:
+    """
+    Call counts and times collected while instrumentation is enabled, keyed by 'Class.method'. Times include
+    the time spent in instrumented methods called from inside the method.
+    """
+    def __init__(self):
+        """
+        Initializes empty statistics.
+        """
+        self._stats = {}
+        self._running = {}
+        self._seconds = 0.0
+
+    def enter(self, label: str) -> None:
+        """
+        Notes that an instrumented method has started.
+        param label: 'Class.method' name of the method
+        return: None
+        """
+        self._running[label] = self._running.get(label, 0) + 1
+
+    def leave(self, label: str, seconds: float) -> None:
+        """
+        Records a finished call of an instrumented method.
+        param label: 'Class.method' name of the method
+        param seconds: time the call took
+        return: None
+        """
+        self._running[label] -= 1
+        stats = self._stats.get(label)
+        if stats is None:
+            stats = self._stats[label] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += seconds
+        if seconds > stats[2]:
+            stats[2] = seconds
+        if label == 'JanggiGame.leaves_in_check' and self._running.get('JanggiGame.is_mate'):
+            self.count(MATE_TRIAL)
+
+    def count(self, label: str, amount: int = 1) -> None:
+        """
+        Adds to a counter that is not timed.
+        param label: name of the counter
+        param amount: number to add
+        return: None
+        """
+        stats = self._stats.get(label)
+        if stats is None:
+            stats = self._stats[label] = [0, 0.0, 0.0]
+        stats[0] += amount
+
+    def set_seconds(self, seconds: float) -> None:
+        """
+        Sets the wall time the profile covers, for the report.
+        param seconds: time from enabling to disabling
+        return: None
+        """
+        self._seconds = seconds
+
+    def get_calls(self, label: str) -> int:
+        """
+        Returns how many times a method was called, or the total of an untimed counter.
+        param label: 'Class.method' name of the method, or a counter name
+        """
+        return self._stats[label][0] if label in self._stats else 0
+
+    def get_seconds(self, label: str) -> float:
+        """
+        Returns the total time spent in a method.
+        param label: 'Class.method' name of the method
+        """
+        return self._stats[label][1] if label in self._stats else 0.0
+
+    def to_dict(self) -> dict:
+        """
+        Returns the statistics as a dictionary of label to calls, total and mean and max milliseconds.
+        """
+        stats = {}
+        for label, (calls, seconds, longest) in sorted(self._stats.items()):
+            stats[label] = {'calls': calls, 'total_ms': seconds * 1000,
+                            'mean_ms': seconds / calls * 1000 if calls else 0.0, 'max_ms': longest * 1000}
+        return {'wall_ms': self._seconds * 1000, 'methods': stats}
+
+    def to_json(self, path: str = None) -> str:
+        """
+        Writes the statistics as JSON.
+        param path: file to write to, or None to only return the JSON
+        return: JSON string
+        """
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as json_file:
+                json_file.write(text)
+        return text
+
+    def report(self) -> str:
+        """
+        Formats the statistics as a table sorted by total time, then by calls for untimed counters.
+        return: report text
+        """
+        lines = ['%-40s %10s %12s %10s %10s' % ('method', 'calls', 'total ms', 'mean us', 'max us')]
+        for label, (calls, seconds, longest) in sorted(self._stats.items(), key=lambda item: (-item[1][1],
+                                                                                             -item[1][0])):
+            lines.append('%-40s %10d %12.3f %10.2f %10.2f' % (label, calls, seconds * 1000,
+                                                            seconds / calls * 1e6 if calls else 0.0, longest * 1e6))
+        lines.append('wall time %.3f ms' % (self._seconds * 1000))
+        return '\n'.join(lines)
+
+
+def _wrap(cls, name: str) -> None:
+    """
+    Replaces a method on a class with one that times each call in to the active profile, remembering what
+    was on the class so disable can put it back. For set_valid_moves, also counts the board spaces the piece
+    read, which are the spaces it recorded as watched.
+    param cls: class to instrument
+    param name: method name
+    return: None
+    """
+    method = getattr(cls, name)
+    label = cls.__name__ + '.' + name
+    reads_label = label + SPACES_READ if name == 'set_valid_moves' else None
+    perf_counter = time.perf_counter
+
+    def timed(*args, **kwargs):
+        profile_data = _active
+        profile_data.enter(label)
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            profile_data.leave(label, perf_counter() - start)
+            if reads_label is not None:
+                profile_data.count(reads_label, len(args[0].get_watched()))
+
+    timed.__name__ = name
+    timed.__doc__ = method.__doc__
+    _originals.append((cls, name, cls.__dict__.get(name)))
+    setattr(cls, name, timed)
+
+
+def is_enabled() -> bool:
+    """
+    Returns whether instrumentation is installed.
+    """
+    return _active is not None
+
+
+def enable(profile_data: Profile = None) -> Profile:
+    """
+    Installs the instrumentation wrappers and starts collecting in to a profile.
+    param profile_data: profile to add to, a new one when None
+    return: profile being collected
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError('instrumentation is already enabled')
+    _active = profile_data if profile_data is not None else Profile()
+    for cls in PIECE_CLASSES:
+        for name in PIECE_METHODS:
+            _wrap(cls, name)
+    for cls in BOARD_CLASSES:
+        for name in BOARD_METHODS:
+            if name in cls.__dict__:
+                _wrap(cls, name)
+    for name in GAME_METHODS:
+        _wrap(JanggiGame, name)
+    return _active
+
+
+def disable() -> Profile:
+    """
+    Puts back the original methods and stops collecting.
+    return: profile that was being collected, or None when instrumentation was not enabled
+    """
+    global _active
+    for cls, name, original in reversed(_originals):
+        if original is None:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, original)
+    _originals.clear()
+    profile_data, _active = _active, None
+    return profile_data
+
+
+@contextlib.contextmanager
+def profile():
+    """
+    Collects a profile of the code run inside the with block, such as a single make_move.
+    return: context manager giving the Profile, complete once the block exits
+    """
+    profile_data = enable()
+    start = time.perf_counter()
+    try:
+        yield profile_data
+    finally:
+        profile_data.set_seconds(time.perf_counter() - start)
+        disable()
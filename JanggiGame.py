@@ -1,3 +1,5 @@
+import functools
+
 from Board import Board
 from Soldier import Soldier
 from Cannon import Cannon          
@@ -6,6 +8,69 @@ from Elephant import Elephant
 from Horse import Horse
 from Guard import Guard
 from General import General
+from MoveTables import PALACES, SQUARES, SLIDING_RAYS, HORSE_ATTACKS, ELEPHANT_ATTACKS, SOLDIER_ATTACKS, PALACE_ATTACKS
+from MoveCache import MoveCache
+from Zobrist import PIECE_KEYS, SIDE_KEY, hash_position, piece_key
+from Evaluation import SQUARE_SCORES, piece_score, score_pieces
+from PieceConstants import COLOR_CODES, GENERAL, GUARD, ELEPHANT, HORSE, CHARIOT, CANNON, SOLDIER, TYPE_LETTERS, \
+    TYPE_NAMES
+
+# piece class for each type code
+PIECE_CLASSES = (None, General, Guard, Elephant, Horse, Chariot, Cannon, Soldier)
+
+# piece class, color, type, and name prefix for each letter of a position string
+FEN_PIECES = {}
+for _type in range(GENERAL, SOLDIER + 1):
+    _letter = TYPE_LETTERS[_type]
+    FEN_PIECES[_letter.lower()] = (PIECE_CLASSES[_type], 'red', TYPE_NAMES[_type], 'r' + _letter)
+    FEN_PIECES[_letter] = (PIECE_CLASSES[_type], 'blue', TYPE_NAMES[_type], 'b' + _letter)
+FEN_EMPTY = {str(run): run for run in range(1, 10)}
+FEN_CHECKS = ('-', 'b', 'r', 'br', 'rb')
+
+START_FEN = 'reha1aehr/4g4/1c5c1/s1s1s1s1s/9/9/S1S1S1S1S/1C5C1/4G4/REHA1AEHR b -'
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_placement(placement: str) -> tuple:
+    """
+    Reads the ranks field of a position string, see JanggiGame.from_fen. Results are cached, so loading a
+    position seen recently only has to create its pieces.
+    param placement: ranks from 1 to 10 separated by '/'
+    return: tuple of a (piece class, color, type, name, coordinate) tuple for each piece, the position's hash
+    with blue to move, and its score
+    """
+    ranks = placement.split('/')
+    if len(ranks) != 10:
+        raise ValueError('position string needs 10 ranks ' + repr(placement))
+
+    pieces = []
+    counts = {}
+    key = 0
+    score = 0
+    for row, rank in enumerate(ranks):
+        col = 0
+        for letter in rank:
+            if letter in FEN_EMPTY:
+                col += FEN_EMPTY[letter]
+                continue
+            if letter not in FEN_PIECES or col > 8:
+                raise ValueError('invalid rank ' + repr(rank))
+            piece_class, color, piece_type, name = FEN_PIECES[letter]
+            color_code = COLOR_CODES[color]
+            type_code = PIECE_CLASSES.index(piece_class)
+            index = row * 9 + col
+            if type_code == GENERAL and SQUARES[index] not in PALACES[color_code]:
+                raise ValueError('general outside its palace ' + repr(rank))
+            count = counts[name] = counts.get(name, 0) + 1
+            pieces.append((piece_class, color, piece_type, name + str(count), SQUARES[index]))
+            key ^= PIECE_KEYS[color_code][type_code][index]
+            score += SQUARE_SCORES[color_code][type_code][index]
+            col += 1
+        if col != 9:
+            raise ValueError('rank does not have 9 spaces ' + repr(rank))
+    if counts.get('rG') != 1 or counts.get('bG') != 1:
+        raise ValueError('position needs one general for each player ' + repr(placement))
+    return tuple(pieces), key, score
           
 class JanggiGame:
     """
@@ -13,12 +78,16 @@ class JanggiGame:
     objects. Keeps track of whose turn it is to move, the state of the game, and whether or not a player is 
     in check. Instantiates a board and all pieces. Keeps track of current available pieces for each player. 
     """
-    def __init__(self):
+    def __init__(self, incremental: bool = True, board_type=Board, move_cache: MoveCache = None):
         """
         Initializes the board and pieces and places pieces on the board. Sets up the current state of
         the game and whose turn it is to move.
+        param incremental: when True only the pieces affected by a move have their valid moves recalculated,
+        when False every piece is recalculated after every move
+        param board_type: board class to store the pieces in, Board or ArrayBoard
+        param move_cache: cache for legal_moves, may be shared between games, a new one when None
         """
-        self._board = Board()
+        self._board = board_type()
         self._pieces = {Chariot('red', 'rR1', 'chariot', (0, 0)), Elephant('red', 'rE1', 'elephant', (0, 1)),
         Horse('red', 'rH1', 'horse', (0, 2)), Guard('red', 'rA1', 'guard', (0, 3)), Guard('red', 'rA2', 'guard', (0, 5)),
         Elephant('red', 'rE2', 'elephant', (0, 6)), Horse('red', 'rH2', 'horse', (0, 7)), Chariot('red', 'rR2', 'chariot', (0, 8)),
@@ -34,17 +103,119 @@ class JanggiGame:
         Elephant('blue', 'bE2', 'elephant', (9, 6)), Horse('blue', 'bH2', 'horse', (9, 7)), Chariot('blue', 'bR2', 'chariot', (9, 8)),
         General('blue', 'bG1', 'general', (8, 4)), General('red', 'rG1', 'general', (1, 4))}
 
+        self._setup(incremental, 'blue', True, move_cache)
+
+    def _setup(self, incremental: bool, player_turn: str, track_moves: bool, move_cache: MoveCache,
+               position_hash: int = None, score: int = None) -> None:
+        """
+        Sets up the game state, index, and hash for the pieces in self._pieces and places them on self._board.
+        Valid moves are not calculated here, pieces calculate them when first read.
+        param incremental: when True only the pieces affected by a move have their valid moves recalculated
+        param player_turn: color to move
+        param track_moves: when True every piece's valid moves are kept up to date, see set_move_tracking
+        param move_cache: cache for legal_moves, a new one when None
+        param position_hash: hash of the position when already known, else it is worked out from the pieces
+        param score: score of the position when already known, else it is worked out from the pieces
+        return: None
+        """
         self._red_in_check = False
         self._blue_in_check = False
         self._player_swap = {'blue': 'red', 'red': 'blue'}
-        self._player_turn = 'blue'
+        self._player_turn = player_turn
         self._game_state = 'UNFINISHED'
 
+        # maps each space to the pieces whose valid moves depend on what occupies it
+        self._incremental = incremental
+        self._track_moves = track_moves
+        self._watchers = {space: set() for space in SQUARES}
+
+        # records needed to take back each move made with push_move
+        self._undo_stack = []
+
         for piece in self._pieces:
             self._board.set_piece(piece)
 
-        # set initial valid moves
-        self.update_valid_moves()
+        # keep each general on hand so check detection does not search for it
+        self._generals = {piece.get_color(): piece for piece in self._pieces if piece.get_type_code() == GENERAL}
+
+        # Zobrist hash of the position, updated on each move
+        self._hash = hash_position(self._pieces, self._player_turn) if position_hash is None else position_hash
+
+        # material and piece-square score, blue's minus red's, updated on each move
+        self._score = score_pieces(self._pieces) if score is None else score
+        self._move_cache = move_cache if move_cache is not None else MoveCache()
+
+        # valid moves are calculated when first read
+        if track_moves:
+            for piece in self._pieces:
+                piece.mark_stale(self._refresh_piece)
+
+    @classmethod
+    def from_fen(cls, fen: str, incremental: bool = True, board_type=Board, track_moves: bool = True,
+                 move_cache: MoveCache = None):
+        """
+        Creates a game from a position string as written by to_fen. The string has three fields separated by
+        spaces. The first lists the ranks from 1 to 10 separated by '/', each giving files a to i as piece
+        letters (G general, A guard, E elephant, H horse, R chariot, C cannon, S soldier), lowercase for red
+        and uppercase for blue, and digits for runs of empty spaces. Generals must be in their own palace. The
+        second is the player to move, 'b' or 'r'. The third gives the players in check as 'b', 'r', or both,
+        '-' for neither; when it is left out it is worked out from the position. The game state is always
+        UNFINISHED. Placements are parsed once and cached, and valid moves are only calculated when first read.
+        param fen: position string
+        param incremental: when True only the pieces affected by a move have their valid moves recalculated
+        param board_type: board class to store the pieces in, Board or ArrayBoard
+        param track_moves: when False valid moves are not set on loading, see set_move_tracking
+        param move_cache: cache for legal_moves, may be shared between games, a new one when None
+        return: JanggiGame object
+        """
+        fields = fen.split()
+        if len(fields) not in (2, 3) or fields[1] not in ('b', 'r'):
+            raise ValueError('invalid position string ' + repr(fen))
+        if len(fields) == 3 and fields[2] not in FEN_CHECKS:
+            raise ValueError('invalid check field ' + repr(fen))
+        placement, key, score = _parse_placement(fields[0])
+        player_turn = 'blue' if fields[1] == 'b' else 'red'
+
+        game = cls.__new__(cls)
+        game._board = board_type()
+        game._pieces = {piece_class(color, name, piece_type, coord)
+                        for piece_class, color, piece_type, name, coord in placement}
+        game._setup(incremental, player_turn, track_moves, move_cache,
+                    key ^ SIDE_KEY if player_turn == 'red' else key, score)
+        if len(fields) == 3:
+            game._red_in_check = 'r' in fields[2]
+            game._blue_in_check = 'b' in fields[2]
+        else:
+            game._red_in_check = game.is_check('red')
+            game._blue_in_check = game.is_check('blue')
+        return game
+
+    def to_fen(self) -> str:
+        """
+        Writes the position as a string that from_fen reads, see from_fen for the format.
+        return: position string
+        """
+        spaces = self._board.get_board()
+        ranks = []
+        for row in range(10):
+            rank = ''
+            empty = 0
+            for col in range(9):
+                piece = spaces[(row, col)]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                letter = TYPE_LETTERS[piece.get_type_code()]
+                rank += letter.lower() if piece.get_color() == 'red' else letter
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+
+        checks = ('b' if self._blue_in_check else '') + ('r' if self._red_in_check else '')
+        return '/'.join(ranks) + ' ' + self._player_turn[0] + ' ' + (checks or '-')
     
     def get_game_state(self) -> str:
         """
@@ -64,14 +235,105 @@ class JanggiGame:
         """
         return self._player_turn
 
+    def get_pieces(self) -> set:
+        """
+        Returns the set of pieces still on the board. Used by search and evaluation.
+        """
+        return self._pieces
+
+    def get_position_hash(self) -> int:
+        """
+        Returns the 64-bit Zobrist hash of the piece placement and player turn. Equal positions have equal
+        hashes no matter which moves led to them.
+        """
+        return self._hash
+
+    def get_score(self) -> int:
+        """
+        Returns the material and piece-square score of the position, blue's score minus red's, in hundredths of
+        a soldier. Kept up to date on each move, see Evaluation.
+        """
+        return self._score
+
     def update_valid_moves(self) -> None:
         """
-        Updates the valid moves for each piece on the board.
+        Updates the valid moves for each piece on the board and rebuilds the index of which spaces each
+        piece's moves depend on.
         return: None
         """
+        for watchers in self._watchers.values():
+            watchers.clear()
         for piece in self._pieces:
             piece.set_valid_moves(self._board)
+            for space in piece.get_watched():
+                self._watchers[space].add(piece)
+
+    def _refresh_piece(self, piece) -> None:
+        """
+        Recalculates the valid moves of a piece marked stale and adds it back to the index of which spaces each
+        piece's moves depend on. Called by the piece when its valid moves are read.
+        param piece: piece to recalculate
+        return: None
+        """
+        piece.set_valid_moves(self._board)
+        if piece in self._pieces:
+            for space in piece.get_watched():
+                self._watchers[space].add(piece)
+
+    def update_moves_after(self, spaces: tuple, pieces: tuple) -> None:
+        """
+        Updates valid moves after the occupancy of the given spaces changed. Only the pieces whose moves
+        depend on one of the spaces, and the pieces passed in, are marked stale, and they are recalculated
+        when their moves are next read. The index only holds pieces with up to date moves, so stale pieces and
+        pieces no longer in play are dropped from it. Falls back to update_valid_moves when incremental
+        updates are off.
+        param spaces: coordinates whose occupancy changed
+        param pieces: pieces that moved, were captured, or were returned to the board (None is ignored)
+        return: None
+        """
+        if not self._track_moves:
+            return
+        if not self._incremental:
+            self.update_valid_moves()
+            return
+
+        affected = {piece for piece in pieces if piece is not None}
+        for space in spaces:
+            affected.update(self._watchers[space])
+
+        refresh = self._refresh_piece
+        for piece in affected:
+            for space in piece.get_watched():
+                self._watchers[space].discard(piece)
+            if piece in self._pieces:
+                piece.mark_stale(refresh)
     
+    def set_move_tracking(self, enabled: bool) -> None:
+        """
+        Turns upkeep of every piece's valid moves on or off. With tracking off, moves do not recalculate any
+        valid moves; make_move calculates the moving piece's moves itself and the mate search and legal move
+        generation calculate the moves of the side they look at. Used to replay recorded games quickly.
+        Turning tracking back on recalculates every piece.
+        param enabled: True to keep valid moves up to date after every move
+        return: None
+        """
+        if enabled and not self._track_moves:
+            self._track_moves = True
+            self.update_valid_moves()
+        self._track_moves = enabled
+
+    def refresh_untracked_moves(self, color: str) -> None:
+        """
+        Recalculates the valid moves of the color's pieces when move tracking is off, so they can be read.
+        param color: color of the pieces
+        return: None
+        """
+        if self._track_moves:
+            return
+        for piece in self._pieces:
+            if piece.get_color() == color:
+                piece.set_valid_moves(self._board)
+
     def is_in_check(self, color: str) -> bool:
         """
         Returns whether the given color general is in check.
@@ -89,6 +351,7 @@ class JanggiGame:
         return: None
         """
         self._player_turn = self._player_swap[self._player_turn]
+        self._hash ^= SIDE_KEY
 
     def is_valid_move(self, move_from: str, move_to: str):
         """
@@ -119,150 +382,375 @@ class JanggiGame:
     def make_move(self, move_from: str, move_to: str) -> bool:
         """
         Handles basic piece movements in the game. Calls is_valid_move to check move validity and moves the piece
-        and updates the board and game state when it is. After the move, it calls is_self_check to check if the move
+        and updates the board and game state when it is. After the move, it calls is_check to check if the move
         resulted in check for the moving player. It will then check if the move created check for the opposing player.
         When check is detected, it will check for a checkmate scenario and update the game status accordingly.
-        Upon a valid move with no game state updates, the player turn will be swapped using alternate_turn.
+        Upon a valid move the player turn is swapped by push_move.
         param move_from: space of the piece to move
         param move_to: space to move the piece to
         return: True when move is valid, otherwise False
         """
-        # allow player to pass a turn when not in check
-        if move_from == move_to and not self.is_in_check(self._player_turn):
-            self.alternate_turn()
-            return True
-        
-        # do not allow a pass when the player is in check
-        if move_from == move_to and self.is_in_check(self._player_turn):
-            return False
+        # a pass does not need to name a space on the board
+        if move_from == move_to:
+            coord = self._board.convert_coords(move_from)
+            return self.play_move(coord, coord)
 
         # check that the spaces are valid and piece belongs to the correct player
         valid_move = self.is_valid_move(move_from, move_to)
         if not valid_move:
             return False
-        
-        # unpack tuple to get the piece, current coordinate, and destination coordinate
-        piece = valid_move[0]
-        cur_coord = valid_move[1]
-        dest_coord = valid_move[2]
+        return self.play_move(valid_move[1], valid_move[2])
+
+    def play_move(self, cur_coord: tuple, dest_coord: tuple) -> bool:
+        """
+        Makes a move given as board coordinates, with the same checks and game state updates as make_move.
+        A move with both coordinates the same is a pass. Used when moves are already coordinates, such as
+        replaying stored games, to skip the conversion from algebraic notation.
+        param cur_coord: coordinate of the piece to move
+        param dest_coord: coordinate to move the piece to
+        return: True when move is valid, otherwise False
+        """
+        # allow player to pass a turn when not in check
+        if cur_coord == dest_coord:
+            if self.is_in_check(self._player_turn):
+                return False
+            self.push_move(cur_coord, dest_coord)
+            return True
+
+        # check that there is a piece that belongs to the moving player and game is not over
+        piece = self._board.get_piece(cur_coord)
+        if piece is None or piece.get_color() != self._player_turn or self._game_state != 'UNFINISHED':
+            return False
 
         # check that move is valid for the piece
+        if not self._track_moves:
+            piece.set_valid_moves(self._board)
         if dest_coord not in piece.get_valid_moves():
             return False        
 
-        # save current board and piece state to revert when needed
-        revert_pieces = self._pieces.copy()
-        revert_board = self._board.get_board().copy()
-
-        # remove captured piece from piece set when necessary
-        capture_piece = self._board.get_piece(dest_coord)
-        if capture_piece is not None:
-            self._pieces.remove(capture_piece)
-        
-        # update board state and piece location
-        piece.set_location(dest_coord)
-        self._board.remove_piece(cur_coord)
-        self._board.set_piece(piece)
+        mover = self._player_turn
+        opponent = self._player_swap[mover]
 
         # ensure that self-check has not been created
-        self.update_valid_moves()
-        if self.is_check(self._player_turn):
-
-            # when self-check occurs, revert board and pieces back to previous state
-            # set piece location back to previous
-            # re-calculate valid moves
-            self._pieces = revert_pieces
-            self._board.set_board(revert_board)
-            piece.set_location(cur_coord)
-            self.update_valid_moves()
+        if self.leaves_in_check(cur_coord, dest_coord, mover):
             return False
+        self.push_move(cur_coord, dest_coord)
 
         # detect if opponent has been placed in check
-        if self.is_check(self._player_swap[self._player_turn]):
-            if self._player_swap[self._player_turn] == 'blue':
+        if self.is_check(opponent):
+            if opponent == 'blue':
                 self._blue_in_check = True
             else:
                 self._red_in_check = True
             
-            if self.is_mate(self._player_swap[self._player_turn]):
-                self._game_state = self._player_turn.upper() + '_WON'
+            if self.is_mate(opponent):
+                self._game_state = mover.upper() + '_WON'
+
+                # turn stays with the winning player
+                self.alternate_turn()
                 return True
         
         # once a player completes a valid move they are guaranteed to not be in check
-        if self._player_turn == 'blue':
+        if mover == 'blue':
             self._blue_in_check = False
         else:
             self._red_in_check = False
+        return True
 
-        # update player turn and finish method
+    def push_move(self, cur_coord: tuple, dest_coord: tuple) -> None:
+        """
+        Moves the piece on cur_coord to dest_coord, capturing any piece there, and swaps the player turn. Does
+        not check that the move is valid. When both coordinates are the same the move is a pass. Saves what is
+        needed to take the move back with pop_move, so the board and piece set are never copied. Updates the
+        position hash by XORing the piece out of its old space, any captured piece out, and the piece in to its
+        new space, and the score the same way.
+        param cur_coord: coordinate of the piece to move
+        param dest_coord: coordinate to move the piece to
+        return: None
+        """
+        piece = None
+        capture_piece = None
+        position_hash = self._hash
+        score = self._score
+        if cur_coord != dest_coord:
+            piece = self._board.get_piece(cur_coord)
+            capture_piece = self._board.get_piece(dest_coord)
+            self._hash ^= piece_key(piece, cur_coord) ^ piece_key(piece, dest_coord)
+            self._score += piece_score(piece, dest_coord) - piece_score(piece, cur_coord)
+            if capture_piece is not None:
+                self._pieces.remove(capture_piece)
+                self._hash ^= piece_key(capture_piece, dest_coord)
+                self._score -= piece_score(capture_piece, dest_coord)
+            piece.set_location(dest_coord)
+            self._board.remove_piece(cur_coord)
+            self._board.set_piece(piece)
+            self.update_moves_after((cur_coord, dest_coord), (piece, capture_piece))
+
+        self._undo_stack.append((piece, cur_coord, capture_piece, self._red_in_check, self._blue_in_check,
+                                 self._player_turn, self._game_state, position_hash, score))
         self.alternate_turn()
-        return True
+
+    def pop_move(self) -> None:
+        """
+        Takes back the most recent move made with push_move. Restores the moved and captured pieces, the check
+        flags, the player turn, the game state, the position hash, and the score.
+        return: None
+        """
+        piece, cur_coord, capture_piece, red_in_check, blue_in_check, player_turn, game_state, position_hash, \
+            score = self._undo_stack.pop()
+        if piece is not None:
+            dest_coord = piece.get_location()
+            self._board.remove_piece(dest_coord)
+            piece.set_location(cur_coord)
+            self._board.set_piece(piece)
+
+            # captured piece still holds its location
+            if capture_piece is not None:
+                self._board.set_piece(capture_piece)
+                self._pieces.add(capture_piece)
+            self.update_moves_after((cur_coord, dest_coord), (piece, capture_piece))
+
+        self._red_in_check = red_in_check
+        self._blue_in_check = blue_in_check
+        self._player_turn = player_turn
+        self._game_state = game_state
+        self._hash = position_hash
+        self._score = score
+
+    def generate_legal_moves(self) -> list:
+        """
+        Generates every legal move for the player to move: each piece's valid moves that do not leave the
+        player's general attacked, and a pass when the player is not in check. A pass is given as a move from
+        the general's space to itself.
+        return: list of (current coordinate, destination coordinate) tuples, empty when the game is over
+        """
+        if self._game_state != 'UNFINISHED':
+            return []
+
+        color = self._player_turn
+        self.refresh_untracked_moves(color)
+        moves = []
+        for piece in list(self._pieces):
+            if piece.get_color() != color:
+                continue
+            piece_loc = piece.get_location()
+            for move in piece.get_valid_moves():
+                if not self.leaves_in_check(piece_loc, move, color):
+                    moves.append((piece_loc, move))
+
+        if not self.is_check(color):
+            general_loc = self._generals[color].get_location()
+            moves.append((general_loc, general_loc))
+        return moves
+
+    def legal_moves(self) -> list:
+        """
+        Returns every legal move of the player to move in the algebraic notation make_move accepts, with
+        moves that leave the mover in check already removed. A pass is the general's space to itself and is
+        included when the player is not in check. Results are kept in the game's move cache by position hash,
+        so asking again for a position seen recently does not generate its moves again.
+        return: list of (move from, move to) algebraic pairs, empty when the game is over
+        """
+        if self._game_state != 'UNFINISHED':
+            return []
+        moves = self._move_cache.get(self._hash)
+        if moves is None:
+            to_algebraic = self._board.convert_to_algebraic
+            moves = tuple((to_algebraic(cur), to_algebraic(dest)) for cur, dest in self.generate_legal_moves())
+            self._move_cache.put(self._hash, moves)
+        return list(moves)
+
+    def get_move_cache(self) -> MoveCache:
+        """
+        Returns the cache used by legal_moves, for its statistics.
+        """
+        return self._move_cache
+
+    def perft(self, depth: int) -> int:
+        """
+        Counts the positions reached by playing every sequence of legal moves of the given length. Used to
+        check move generation against known counts and to measure its speed.
+        param depth: number of moves to play
+        return: number of leaf positions
+        """
+        if depth == 0:
+            return 1
+        moves = self.generate_legal_moves()
+        if depth == 1:
+            return len(moves)
+
+        nodes = 0
+        for cur_coord, dest_coord in moves:
+            self.push_move(cur_coord, dest_coord)
+            nodes += self.perft(depth - 1)
+            self.pop_move()
+        return nodes
+
+    def perft_divide(self, depth: int) -> dict:
+        """
+        Runs perft below each legal move of the current position.
+        param depth: number of moves to play, including the first
+        return: dictionary of (move from, move to) algebraic pairs to leaf counts
+        """
+        divide = {}
+        for cur_coord, dest_coord in self.generate_legal_moves():
+            self.push_move(cur_coord, dest_coord)
+            move = (self._board.convert_to_algebraic(cur_coord), self._board.convert_to_algebraic(dest_coord))
+            divide[move] = self.perft(depth - 1)
+            self.pop_move()
+        return divide
 
     def is_check(self, color: str) -> bool:
         """
         Checks whether the most recent move of the player has created a check.
-        Locates the player's general and checks if it's location is a valid move for the opposing player.
+        Looks outward from the player's general for opposing pieces that can reach its location.
         This will serve dual-purpose, checking for self-check and opponent check based on the color passed. 
         param color: color of the player to check
-        param board: current state of the board
-        return: True if self-check created, otherwise False.
+        return: True if the general is attacked, otherwise False.
         """
-        # locate the general and get its location coordinate
-        for piece in self._pieces:
-            if piece.get_type() == 'general' and piece.get_color() == color:
-                general = piece
+        return self.is_square_attacked(self._generals[color].get_location(), self._player_swap[color])
+
+    def is_square_attacked(self, space: tuple, color: str) -> bool:
+        """
+        Determines whether any piece of the given color could move to the space on the current board.
+        Does not use the pieces' valid moves, so they do not need to be up to date.
+        param space: coordinate to check
+        param color: color of the attacking player
+        return: True if the space is attacked, else False
+        """
+        for _ in self.get_attackers(space, color):
+            return True
+        return False
+
+    def get_attackers(self, space: tuple, color: str):
+        """
+        Finds the pieces of the given color that could move to the space on the current board. Starts at the
+        space and looks outward along the sliding lines for chariots and cannons, counting screens, then at
+        the horse and elephant jumps with their blocking spaces, and at the soldier and palace steps.
+        param space: coordinate to check
+        param color: color of the attacking player
+        return: generator of (attacker coordinate, tuple of the spaces between the attacker and the space)
+        """
+        board = self._board
+        target = board.get_piece(space)
+        color_code = COLOR_CODES[color]
+
+        # pieces never move on to their own color
+        if target is not None and target.get_color_code() == color_code:
+            return
+        target_cannon = target is not None and target.get_type_code() == CANNON
+
+        # the first piece on each line may be an attacking chariot, or the screen for an attacking cannon
+        for ray in SLIDING_RAYS[space]:
+            screened = False
+            for index, square in enumerate(ray):
+                piece = board.get_piece(square)
+                if piece is None:
+                    continue
+                if not screened:
+                    if piece.get_type_code() == CHARIOT and piece.get_color_code() == color_code:
+                        yield square, ray[:index]
+                        break
+                    if piece.get_type_code() == CANNON:
+                        break
+                    screened = True
+                    continue
+                if piece.get_type_code() == CANNON and piece.get_color_code() == color_code and not target_cannon:
+                    yield square, ray[:index]
                 break
-        
-        coord = general.get_location()
 
-        # check if the general's location is a valid move for opposing players
+        for origin, leg in HORSE_ATTACKS[space]:
+            piece = board.get_piece(origin)
+            if piece is not None and piece.get_type_code() == HORSE and piece.get_color_code() == color_code \
+            and board.get_piece(leg) is None:
+                yield origin, (leg,)
+
+        for origin, legs in ELEPHANT_ATTACKS[space]:
+            piece = board.get_piece(origin)
+            if piece is not None and piece.get_type_code() == ELEPHANT and piece.get_color_code() == color_code \
+            and board.get_piece(legs[0]) is None and board.get_piece(legs[1]) is None:
+                yield origin, legs
+
+        for origin in SOLDIER_ATTACKS[color_code][space]:
+            piece = board.get_piece(origin)
+            if piece is not None and piece.get_type_code() == SOLDIER and piece.get_color_code() == color_code:
+                yield origin, ()
+
+        for origin in PALACE_ATTACKS[color_code][space]:
+            piece = board.get_piece(origin)
+            if piece is not None and piece.get_color_code() == color_code and piece.get_type_code() in (GENERAL, GUARD):
+                yield origin, ()
+
+    def leaves_in_check(self, cur_coord: tuple, dest_coord: tuple, color: str) -> bool:
+        """
+        Determines whether moving the piece on cur_coord to dest_coord would leave the color's general
+        attacked. Only the two spaces are changed on the board and put back afterward, valid moves and the
+        piece set are not touched.
+        param cur_coord: coordinate of the piece to move
+        param dest_coord: coordinate to move the piece to
+        param color: color of the general to check
+        return: True if the general would be attacked after the move, else False
+        """
+        board = self._board
+        piece = board.get_piece(cur_coord)
+        capture_piece = board.get_piece(dest_coord)
+
+        piece.set_location(dest_coord)
+        board.remove_piece(cur_coord)
+        board.set_piece(piece)
+        in_check = self.is_check(color)
+
+        # put the board back, captured piece still holds its location
+        piece.set_location(cur_coord)
+        board.remove_piece(dest_coord)
+        board.set_piece(piece)
+        if capture_piece is not None:
+            board.set_piece(capture_piece)
+        return in_check
+
+    def get_evasions(self, color: str) -> list:
+        """
+        Generates the moves that could get the color's general out of check: general moves, captures of the
+        checking pieces, moves on to the spaces between a checking piece and the general, and moves of a
+        cannon's screen. A move other than a general move must deal with every checking piece. Moves are
+        ordered with general moves and captures first. When the general is not in check every move is returned.
+        param color: color of the player in check
+        return: list of (current coordinate, destination coordinate) tuples
+        """
+        self.refresh_untracked_moves(color)
+        general = self._generals[color]
+        general_loc = general.get_location()
+        attackers = list(self.get_attackers(general_loc, self._player_swap[color]))
+        checks = [set(between) | {origin} for origin, between in attackers]
+        checkers = {origin for origin, _ in attackers}
+
+        evasions = [(general_loc, move) for move in general.get_valid_moves()]
+        captures = []
+        blocks = []
         for piece in self._pieces:
-            if piece.get_color() == self._player_swap[color] and coord in piece.get_valid_moves():
-                return True
-        return False
+            if piece is general or piece.get_color() != color:
+                continue
+            piece_loc = piece.get_location()
+            for move in piece.get_valid_moves():
+                if all(piece_loc in spaces or move in spaces for spaces in checks):
+                    if move in checkers:
+                        captures.append((piece_loc, move))
+                    else:
+                        blocks.append((piece_loc, move))
+        return evasions + captures + blocks
 
     def is_mate(self, color: str) -> bool:
         """
         Determines if a checkmate scenario has been created. Will only run if check was created on previous turn.
-        Runs through the color's valid moves and determines if any will eliminate the check scenario.
+        Runs through the color's check evasions and determines if any will eliminate the check scenario.
         param color: color of player to check
         return: True if checkmate, else False
         """
-        # iterate over player pieces and examine all moves to see if check can be eliminated
-        # create a new list object of pieces to iterate over
-        for piece in list(self._pieces):
-            if piece.get_color() == color:
-                moves = piece.get_valid_moves().copy()
-
-                # iterate over the piece's moves
-                for move in moves:
-                    revert_board = self._board.get_board().copy()
-                    revert_pieces = self._pieces.copy()
-                    old_coord = piece.get_location()
-
-                    # make the move and see if it removed check
-                    capture_piece = self._board.get_piece(move)
-                    if capture_piece is not None:
-                        self._pieces.remove(capture_piece)
-                    piece.set_location(move)
-                    self._board.remove_piece(old_coord)
-                    self._board.set_piece(piece)
-                    self.update_valid_moves()
-
-                    # when check is removed, the game is not in checkmate
-                    if not self.is_check(color):
-                        self._pieces = revert_pieces
-                        self._board.set_board(revert_board)
-                        piece.set_location(old_coord)
-                        self.update_valid_moves()
-                        return False
-
-                    # when check is not removed, reset the board and try again with next move
-                    else:
-                        self._pieces = revert_pieces
-                        self._board.set_board(revert_board)
-                        piece.set_location(old_coord)
-                        self.update_valid_moves()
+        for cur_coord, dest_coord in self.get_evasions(color):
+
+            # when check is removed, the game is not in checkmate
+            if not self.leaves_in_check(cur_coord, dest_coord, color):
+                return False
 
-        # when no piece can remove check, the game is in checkmate
+        # when no move can remove check, the game is in checkmate
         return True
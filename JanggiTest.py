@@ -1,5 +1,36 @@
 import unittest
-from JanggiGame import Board, Soldier, Guard, Chariot, Cannon, Horse, Elephant, JanggiGame
+import time
+import random
+import asyncio
+import json
+try:
+    import numpy
+except ImportError:
+    numpy = None
+import os
+import tempfile
+from JanggiGame import Board, Soldier, Guard, Chariot, Cannon, Horse, Elephant, General, JanggiGame, START_FEN
+from ArrayBoard import ArrayBoard, BLUE_BIT
+from MoveTables import SQUARES, PALACES
+from PieceConstants import RED, BLUE
+from Zobrist import hash_position
+import Evaluation
+from ScriptedGames import SCRIPTED_GAMES
+from Perft import REFERENCE_POSITIONS, setup_game
+from Engine import Engine, MATE_SCORE, MAX_PLY
+from SelfPlay import run_self_play
+from Replay import replay_game, replay_games, replay_archive
+from MoveCache import MoveCache
+from GameServer import GameServer
+from ParallelSearch import parallel_search, split_moves, measure_speedup
+import Instrumentation
+import BatchMoves
+import Benchmark
+from GameArchive import GameArchive, GameArchiveWriter, encode_moves, decode_moves
+from OpeningBook import OpeningBook, OpeningBookWriter, build_book
+import Tablebase
+from array import array
+from TranspositionTable import TranspositionTable, EXACT, LOWER, UPPER
 
 class BoardTest(unittest.TestCase):
 
@@ -12,16 +43,50 @@ class BoardTest(unittest.TestCase):
         self.assertIsNone(self.b.convert_coords('c11'))
         self.assertEqual(self.b.convert_coords('i10'), (9, 8))
 
+class ArrayBoardTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(13)
+
+    def test_same_as_dict_board(self):
+        # play the same random game on both boards
+        array_game = JanggiGame(board_type=ArrayBoard)
+        dict_game = JanggiGame()
+        for _ in range(100):
+            moves = sorted((piece.get_location(), move) for piece in dict_game._pieces
+                           if piece.get_color() == dict_game.get_player_turn() for move in piece.get_valid_moves())
+            cur, dest = self.rng.choice(moves)
+            move_from = 'abcdefghi'[cur[1]] + str(cur[0] + 1)
+            move_to = 'abcdefghi'[dest[1]] + str(dest[0] + 1)
+            self.assertEqual(array_game.make_move(move_from, move_to), dict_game.make_move(move_from, move_to))
+
+            array_board = array_game.get_board()
+            dict_board = dict_game.get_board().get_board()
+            for space in SQUARES:
+                piece = dict_board[space]
+                self.assertEqual(array_board.get_piece(space) is None, piece is None)
+                if piece is not None:
+                    self.assertEqual(array_board.get_piece(space).get_name(), piece.get_name())
+                    self.assertEqual(array_board.get_code(space) & 7, piece.get_type_code())
+                    self.assertEqual(array_board.get_code(space) >= BLUE_BIT, piece.get_color() == 'blue')
+                else:
+                    self.assertEqual(array_board.get_code(space), 0)
+
+    def test_copy(self):
+        board = JanggiGame(board_type=ArrayBoard).get_board()
+        copy = board.copy()
+        copy.remove_piece((0, 0))
+        self.assertIsNone(copy.get_piece((0, 0)))
+        self.assertIsNotNone(board.get_piece((0, 0)))
+        self.assertEqual(copy.get_code((0, 1)), board.get_code((0, 1)))
+
 class SoldierTest(unittest.TestCase):
     def setUp(self):
         self.sr = Soldier('red', 'redsold', 'soldier', (3, 0))
         self.sr2 = Soldier('red', 'soldred', 'soldier', (3, 2))
         self.sr3 = Soldier('red', 'red', 'soldier',(7, 3))
-        self.sr3._in_palace = True
         self.sb = Soldier('blue', 'bluesold', 'soldier',(6, 0))
         self.sb2 = Soldier('blue', 'blue', 'soldier',(6, 2))
         self.sb3 = Soldier('blue', 'blue', 'soldier',(2, 3))
-        self.sb3._in_palace = True
 
     def test_soldier_moves_red(self):
         # red vertical moves
@@ -63,6 +128,15 @@ class SoldierTest(unittest.TestCase):
         self.assertTrue(self.sb3.valid_move((0, 5)))
         self.assertTrue(self.sb3.valid_move((0, 3)))
 
+class SlotsTest(unittest.TestCase):
+    def test_slots(self):
+        piece = Cannon('blue', 'bC1', 'cannon', (7, 1))
+        self.assertFalse(hasattr(piece, '__dict__'))
+        self.assertEqual(piece.get_color(), 'blue')
+        self.assertEqual(piece.get_type(), 'cannon')
+        with self.assertRaises(AttributeError):
+            piece._in_palace = True
+
 class MasterValidMove(unittest.TestCase):
     def setUp(self):
         self.bg = Guard('blue', 'blue', 'soldier',(9, 3))
@@ -190,101 +264,909 @@ class BlockedTest(unittest.TestCase):
         re.set_location((2, 2))
         self.assertTrue(re.is_blocked((4, 5), self.g._board))
 
+class MoveTableTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(7)
+        self.types = [(Chariot, 'chariot'), (Cannon, 'cannon'), (Horse, 'horse'), (Elephant, 'elephant'),
+                      (Soldier, 'soldier'), (Guard, 'guard'), (General, 'general')]
+
+    def random_board(self):
+        board = Board()
+        pieces = []
+        for space in self.rng.sample(SQUARES, self.rng.randint(1, 32)):
+            piece_class, piece_type = self.rng.choice(self.types)
+            piece = piece_class(self.rng.choice(['red', 'blue']), 'test', piece_type, space)
+            board.set_piece(piece)
+            pieces.append(piece)
+        return board, pieces
+
+    def test_tables_match_predicates(self):
+        # table driven moves should match checking valid_move and is_blocked on every space
+        for _ in range(300):
+            board, pieces = self.random_board()
+            for piece in pieces:
+                piece.set_valid_moves(board)
+                expected = {space for space in board.get_board() if piece.valid_move(space)
+                            and not piece.is_blocked(space, board)}
+                self.assertEqual(piece.get_valid_moves(), expected)
+
+    def test_attacks_match_moves(self):
+        # looking outward from a space should agree with the attacking pieces' valid moves
+        game = JanggiGame()
+        for _ in range(100):
+            board, pieces = self.random_board()
+            for piece in pieces:
+                piece.set_valid_moves(board)
+            game._board = board
+            for space in SQUARES:
+                for color in ('red', 'blue'):
+                    expected = any(space in piece.get_valid_moves() for piece in pieces
+                                   if piece.get_color() == color)
+                    self.assertEqual(game.is_square_attacked(space, color), expected)
+
+class IncrementalMovesTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(11)
+
+    def valid_moves(self, game):
+        return {piece.get_location(): piece.get_valid_moves().copy() for piece in game._pieces}
+
+    def test_matches_full_recompute(self):
+        # play the same random games with and without incremental updates
+        for _ in range(5):
+            fast = JanggiGame()
+            full = JanggiGame(incremental=False)
+            for _ in range(80):
+                moves = [(piece.get_location(), move) for piece in fast._pieces
+                         if piece.get_color() == fast.get_player_turn() for move in piece.get_valid_moves()]
+                if not moves or fast.get_game_state() != 'UNFINISHED':
+                    break
+                cur, dest = self.rng.choice(sorted(moves))
+                move_from = 'abcdefghi'[cur[1]] + str(cur[0] + 1)
+                move_to = 'abcdefghi'[dest[1]] + str(dest[0] + 1)
+                self.assertEqual(fast.make_move(move_from, move_to), full.make_move(move_from, move_to))
+                self.assertEqual(self.valid_moves(fast), self.valid_moves(full))
+                self.assertEqual(fast.get_game_state(), full.get_game_state())
+
+class LazyMovesTest(unittest.TestCase):
+    def calculated(self, profile):
+        return sum(profile.get_calls(cls.__name__ + '.set_valid_moves') for cls in Instrumentation.PIECE_CLASSES)
+
+    def test_single_move_calculates_moving_piece(self):
+        game = JanggiGame()
+        with Instrumentation.profile() as profile:
+            self.assertTrue(game.make_move('c10', 'd8'))
+        self.assertEqual(self.calculated(profile), 1)
+        self.assertTrue(all(piece.is_stale() for piece in game.get_pieces() if piece.get_color() == 'red'))
+
+        # an invalid move is rejected after calculating only the piece asked about
+        with Instrumentation.profile() as profile:
+            self.assertFalse(game.make_move('a1', 'b2'))
+        self.assertEqual(self.calculated(profile), 1)
+
+    def test_matches_eager_update(self):
+        # read moves only now and then so stale pieces build up between reads
+        rng = random.Random(21)
+        for _ in range(4):
+            game = JanggiGame()
+            for turn in range(120):
+                moves = game.generate_legal_moves()
+                if not moves:
+                    break
+                cur, dest = rng.choice(sorted(moves))
+                game.push_move(cur, dest)
+                if turn % 7 == 0:
+                    game.pop_move()
+                if turn % 5 == 0:
+                    lazy = {piece.get_location(): piece.get_valid_moves().copy() for piece in game.get_pieces()}
+                    watchers = {space: set(pieces) for space, pieces in game._watchers.items()}
+                    game.update_valid_moves()
+                    self.assertEqual(lazy, {piece.get_location(): piece.get_valid_moves()
+                                            for piece in game.get_pieces()})
+                    self.assertEqual(watchers, game._watchers)
+
+class UndoTest(unittest.TestCase):
+    def setUp(self):
+        self.g = JanggiGame()
+        self.rng = random.Random(3)
+
+    def snapshot(self):
+        return (dict(self.g._board.get_board()), set(self.g._pieces), self.g.get_player_turn(),
+                {piece: piece.get_valid_moves().copy() for piece in self.g._pieces})
+
+    def test_push_pop_restores(self):
+        before = self.snapshot()
+        for _ in range(30):
+            moves = [(piece.get_location(), move) for piece in self.g._pieces
+                     if piece.get_color() == self.g.get_player_turn() for move in piece.get_valid_moves()]
+            self.g.push_move(*self.rng.choice(sorted(moves)))
+        for _ in range(30):
+            self.g.pop_move()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_pop_after_make_move(self):
+        before = self.snapshot()
+        self.g.make_move('c10', 'd8')
+        self.g.make_move('e4', 'e4')
+        self.g.pop_move()
+        self.g.pop_move()
+        self.assertEqual(self.snapshot(), before)
+
+class MateTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(5)
+
+    def random_check(self):
+        # build random positions until blue is in check and red is not
+        while True:
+            cells = {self.rng.choice(sorted(PALACES[RED])): 'g', self.rng.choice(sorted(PALACES[BLUE])): 'G'}
+            spaces = [space for space in SQUARES if space not in cells]
+            for space in self.rng.sample(spaces, self.rng.randint(2, 16)):
+                letter = self.rng.choice('RCHESA')
+                cells[space] = letter if self.rng.random() < 0.5 else letter.lower()
+            ranks = [''.join(cells.get((row, col), '1') for col in range(9)) for row in range(10)]
+            game = JanggiGame.from_fen('/'.join(ranks) + ' b')
+            if game.is_check('blue') and not game.is_check('red'):
+                return game
+
+    def test_matches_trying_every_move(self):
+        for _ in range(300):
+            game = self.random_check()
+            expected = True
+            for piece in [piece for piece in game._pieces if piece.get_color() == 'blue']:
+                for move in list(piece.get_valid_moves()):
+                    game.push_move(piece.get_location(), move)
+                    if not game.is_check('blue'):
+                        expected = False
+                    game.pop_move()
+            self.assertEqual(game.is_mate('blue'), expected)
+
+class FenTest(unittest.TestCase):
+    def test_start(self):
+        game = JanggiGame()
+        self.assertEqual(game.to_fen(), START_FEN)
+        loaded = JanggiGame.from_fen(START_FEN)
+        self.assertEqual(loaded.get_position_hash(), game.get_position_hash())
+        self.assertEqual(loaded.perft(2), 1024)
+
+    def test_round_trip(self):
+        for position in REFERENCE_POSITIONS:
+            game = setup_game(position['moves'])
+            loaded = JanggiGame.from_fen(game.to_fen())
+            self.assertEqual(loaded.to_fen(), game.to_fen())
+            self.assertEqual(loaded.get_position_hash(), game.get_position_hash())
+            self.assertEqual(loaded.get_player_turn(), game.get_player_turn())
+            self.assertEqual(loaded.perft(2), position['counts'][1])
+            for board_type in (Board, ArrayBoard):
+                untracked = JanggiGame.from_fen(game.to_fen(), board_type=board_type, track_moves=False)
+                self.assertEqual(sorted(untracked.generate_legal_moves()), sorted(game.generate_legal_moves()))
+
+    def test_check_flags(self):
+        game = setup_game([('c10', 'd8'), ('e4', 'f4'), ('b8', 'e8')])
+        self.assertEqual(game.to_fen().split()[1:], ['r', 'r'])
+        self.assertTrue(JanggiGame.from_fen(game.to_fen()).is_in_check('red'))
+        self.assertTrue(JanggiGame.from_fen(game.to_fen().rsplit(' ', 1)[0]).is_in_check('red'))
+        self.assertFalse(JanggiGame.from_fen(game.to_fen().rsplit(' ', 1)[0] + ' -').is_in_check('red'))
+
+    def test_invalid(self):
+        for fen in ['', START_FEN.replace('b -', 'x -'), START_FEN.replace('/9/9/', '/9/'),
+                    START_FEN.replace('4g4', '4g3'), START_FEN.replace('4g4', '4x4'), START_FEN.replace('4g4', '9'),
+                    # generals outside their palace, and junk in the check field
+                    START_FEN.replace('4g4/1c5c1', '9/1g5c1'), START_FEN.replace('4G4', 'G8'),
+                    START_FEN.replace('b -', 'b x'),
+                    START_FEN.replace('b -', 'b r-'), START_FEN.replace('b -', 'b bb')]:
+            with self.assertRaises(ValueError):
+                JanggiGame.from_fen(fen)
+
+    def test_cached_placement(self):
+        # games loaded from the same string share no pieces
+        first = JanggiGame.from_fen(START_FEN)
+        second = JanggiGame.from_fen(START_FEN)
+        first.make_move('c10', 'd8')
+        self.assertEqual(second.to_fen(), START_FEN)
+        self.assertEqual(second.get_score(), 0)
+        red = JanggiGame.from_fen(START_FEN.replace(' b ', ' r '))
+        self.assertEqual(red.get_position_hash(), hash_position(red.get_pieces(), 'red'))
+        self.assertTrue(JanggiGame.from_fen(START_FEN.replace('b -', 'b rb')).is_in_check('blue'))
+
+class MoveCacheTest(unittest.TestCase):
+    def test_matches_make_move(self):
+        game = setup_game(REFERENCE_POSITIONS[3]['moves'])
+        moves = game.legal_moves()
+        self.assertEqual(len(moves), REFERENCE_POSITIONS[3]['counts'][0])
+        for move_from, move_to in moves:
+            trial = setup_game(REFERENCE_POSITIONS[3]['moves'])
+            self.assertTrue(trial.make_move(move_from, move_to))
+        self.assertNotIn(('e2', 'e2'), moves)
+        self.assertIn(('e9', 'e9'), JanggiGame().legal_moves())
+
+    def test_hits(self):
+        game = JanggiGame()
+        first = game.legal_moves()
+        first.clear()
+        self.assertEqual(len(game.legal_moves()), 32)
+        game.make_move('c10', 'd8')
+        game.legal_moves()
+        game.pop_move()
+        game.legal_moves()
+        self.assertEqual(game.get_move_cache().get_stats()['hits'], 2)
+        self.assertEqual(game.get_move_cache().get_stats()['misses'], 2)
+
+    def test_shared_and_evicts(self):
+        cache = MoveCache(2)
+        game = JanggiGame(move_cache=cache)
+        game.legal_moves()
+        JanggiGame.from_fen(START_FEN, move_cache=cache).legal_moves()
+        setup = JanggiGame(move_cache=cache)
+        setup.make_move('c10', 'd8')
+        setup.legal_moves()
+        setup.make_move('c1', 'd3')
+        setup.legal_moves()
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['entries']), (1, 3, 1, 2))
+        self.assertEqual(MoveCache(0).get_stats()['size'], 0)
+
+    def test_game_over(self):
+        game = JanggiGame.from_fen('R3g4/R8/9/9/9/9/9/9/4G4/9 r')
+        self.assertTrue(game.is_in_check('red'))
+        self.assertEqual(game.legal_moves(), [])
+
+class HashTest(unittest.TestCase):
+    def setUp(self):
+        self.g = JanggiGame()
+        self.rng = random.Random(17)
+
+    def test_incremental_matches_full(self):
+        start = self.g.get_position_hash()
+        for _ in range(60):
+            moves = [(piece.get_location(), move) for piece in self.g._pieces
+                     if piece.get_color() == self.g.get_player_turn() for move in piece.get_valid_moves()]
+            self.g.push_move(*self.rng.choice(sorted(moves)))
+            self.assertEqual(self.g.get_position_hash(), hash_position(self.g._pieces, self.g.get_player_turn()))
+        for _ in range(60):
+            self.g.pop_move()
+        self.assertEqual(self.g.get_position_hash(), start)
+
+    def test_transposition(self):
+        # same position by different move orders
+        other = JanggiGame()
+        self.g.make_move('a7', 'b7')
+        self.g.make_move('a4', 'b4')
+        self.g.make_move('c10', 'd8')
+        other.make_move('c10', 'd8')
+        other.make_move('a4', 'b4')
+        other.make_move('a7', 'b7')
+        self.assertEqual(self.g.get_position_hash(), other.get_position_hash())
+
+        # passing changes the player to move
+        self.g.make_move('e2', 'e2')
+        self.assertNotEqual(self.g.get_position_hash(), other.get_position_hash())
+
+class EvaluationTest(unittest.TestCase):
+    def setUp(self):
+        self.g = JanggiGame()
+        self.rng = random.Random(25)
+
+    def test_incremental_matches_full(self):
+        # the starting setup is the same for both players
+        self.assertEqual(self.g.get_score(), 0)
+        for _ in range(80):
+            self.g.push_move(*self.rng.choice(sorted(self.g.generate_legal_moves())))
+            self.assertEqual(self.g.get_score(), Evaluation.score_pieces(self.g.get_pieces()))
+        for _ in range(80):
+            self.g.pop_move()
+        self.assertEqual(self.g.get_score(), 0)
+
+    def test_capture_and_side_to_move(self):
+        self.g.make_move('a7', 'b7')
+        self.g.make_move('a4', 'b4')
+        self.g.make_move('a10', 'a1')
+        self.assertGreater(self.g.get_score(), 1300)
+        self.assertEqual(Evaluation.evaluate(self.g), -self.g.get_score())
+        self.assertEqual(Engine(self.g, table_mb=1).evaluate(), Evaluation.evaluate(self.g))
+
+        # soldiers are worth more as they advance
+        blue_soldier = Soldier('blue', 'bS1', 'soldier', (6, 4))
+        self.assertGreater(Evaluation.piece_score(blue_soldier, (2, 4)), Evaluation.piece_score(blue_soldier, (6, 4)))
+        red_soldier = Soldier('red', 'rS1', 'soldier', (3, 4))
+        self.assertLess(Evaluation.piece_score(red_soldier, (7, 4)), Evaluation.piece_score(red_soldier, (3, 4)))
+
+    @unittest.skipUnless(numpy, 'numpy is not installed')
+    def test_batch(self):
+        games = []
+        for record in run_self_play(3, workers=1, seed=9, max_moves=40):
+            for length in range(0, len(record['moves']), 7):
+                games.append(setup_game(record['moves'][:length]))
+        boards, turns = BatchMoves.encode_games(games)
+        self.assertEqual(list(Evaluation.evaluate_batch(boards, turns)), [Evaluation.evaluate(game) for game in games])
+
+class PerftTest(unittest.TestCase):
+    def test_reference_positions(self):
+        for position in REFERENCE_POSITIONS:
+            game = setup_game(position['moves'])
+            for depth, expected in enumerate(position['counts'][:2], 1):
+                self.assertEqual(game.perft(depth), expected, position['name'])
+
+    def test_divide(self):
+        game = setup_game([])
+        divide = game.perft_divide(2)
+        self.assertEqual(len(divide), 32)
+        self.assertEqual(sum(divide.values()), 1024)
+        self.assertIn(('e9', 'e9'), divide)
+
+class EngineTest(unittest.TestCase):
+    def setUp(self):
+        self.g = JanggiGame()
+
+    def test_wins_free_chariot(self):
+        # opening the a file leaves the red chariot undefended
+        self.g.make_move('a7', 'b7')
+        self.g.make_move('a4', 'b4')
+        position_hash = self.g.get_position_hash()
+        engine = Engine(self.g)
+        self.assertEqual(engine.search(10, 2), ('a10', 'a1'))
+        # a chariot up, give or take the piece-square scores
+        self.assertGreaterEqual(engine.get_score(), 1200)
+        self.assertLess(engine.get_score(), 1400)
+        self.assertGreater(engine.get_nodes(), 0)
+
+        # search leaves the game where it was
+        self.assertEqual(self.g.get_position_hash(), position_hash)
+        self.assertEqual(self.g.get_player_turn(), 'blue')
+        self.assertTrue(self.g.make_move('a10', 'a1'))
+
+    def test_time_limit(self):
+        engine = Engine(self.g)
+        for limit in (0.01, 0.2):
+            start = time.perf_counter()
+            move = engine.search(limit)
+            self.assertLess(time.perf_counter() - start, limit + 0.05)
+        self.assertTrue(self.g.make_move(*move))
+        self.assertGreaterEqual(engine.get_depth(), 1)
+
+    def test_quiesce_in_check_at_max_ply(self):
+        game = setup_game([('c10', 'd8'), ('e4', 'f4'), ('b8', 'e8')])
+        engine = Engine(game, table_mb=1)
+        engine.search(0.01)
+        engine._deadline = float('inf')
+        for ply in (MAX_PLY - 1, MAX_PLY):
+            self.assertEqual(engine._quiesce(-MATE_SCORE, MATE_SCORE, ply), engine.evaluate())
+
+class TranspositionTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = TranspositionTable(0.001)
+
+    def test_store_probe(self):
+        self.assertIsNone(self.table.probe(12345))
+        self.table.store(12345, 3, -250, LOWER, ((9, 0), (8, 0)))
+        self.assertEqual(self.table.probe(12345), (3, -250, LOWER, ((9, 0), (8, 0))))
+        self.assertEqual(self.table.get_stats()['hits'], 1)
+        self.assertEqual(self.table.get_stats()['misses'], 1)
+
+    def test_bounded_size(self):
+        self.assertEqual(self.table.get_capacity(), 1024 * 1024 // 1000 // 32 * 2)
+        for key in range(1, 10000):
+            self.table.store(key, 1, key, EXACT, None)
+        self.assertGreater(self.table.get_stats()['collisions'], 0)
+        self.assertEqual(self.table.get_capacity(), 1024 * 1024 // 1000 // 32 * 2)
+
+    def test_replacement(self):
+        buckets = self.table.get_capacity() // 2
+        deep, shallow, newer = 7, 7 + buckets, 7 + 2 * buckets
+
+        # deep result keeps its slot, shallow results share the always replace slot
+        self.table.store(deep, 6, 10, EXACT, None)
+        self.table.store(shallow, 2, 20, UPPER, None)
+        self.table.store(newer, 1, 30, UPPER, None)
+        self.assertEqual(self.table.probe(deep)[1], 10)
+        self.assertIsNone(self.table.probe(shallow))
+        self.assertEqual(self.table.probe(newer)[1], 30)
+
+        # a deeper result takes the first slot and moves the old one over
+        self.table.store(shallow, 8, 40, EXACT, None)
+        self.assertEqual(self.table.probe(shallow)[1], 40)
+        self.assertEqual(self.table.probe(deep)[1], 10)
+        self.assertIsNone(self.table.probe(newer))
+
+    def test_torn_entry(self):
+        self.table.store(12345, 3, -250, LOWER, ((9, 0), (8, 0)))
+        index = 12345 % (self.table.get_capacity() // 2) * 2
+
+        # another position's score written over half of the slot does not match the stored key
+        self.table._scores[index] = 400
+        self.assertIsNone(self.table.probe(12345))
+        self.table._scores[index] = -250
+        self.assertEqual(self.table.probe(12345), (3, -250, LOWER, ((9, 0), (8, 0))))
+        self.table._bounds[index] = EXACT
+        self.assertIsNone(self.table.probe(12345))
+
+    def test_engine_uses_table(self):
+        game = JanggiGame()
+        engine = Engine(game, table_mb=1)
+        engine.search(10, 3)
+        stats = engine.get_table().get_stats()
+        self.assertGreater(stats['stores'], 0)
+        self.assertGreater(stats['hits'], 0)
+
+class ParallelSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.fen = setup_game(REFERENCE_POSITIONS[-1]['moves']).to_fen()
+
+    def test_split_moves(self):
+        shares = split_moves(self.fen, 4)
+        moves = [move for share in shares for move in share]
+        self.assertEqual(len(shares), 4)
+        self.assertEqual(sorted(moves), sorted(JanggiGame.from_fen(self.fen).generate_legal_moves()))
+
+    def test_split_matches_single_core_score(self):
+        engine = Engine(JanggiGame.from_fen(self.fen))
+        engine.search(float('inf'), 2)
+        result = parallel_search(self.fen, 3, 'split', float('inf'), 2)
+        self.assertEqual(result['score'], engine.get_score())
+        self.assertEqual(result['depth'], 2)
+        self.assertEqual(len(result['workers']), 3)
+        self.assertEqual(result['nodes'], sum(report['nodes'] for report in result['workers']))
+        self.assertTrue(JanggiGame.from_fen(self.fen).make_move(*result['move']))
+
+    def test_smp(self):
+        result = parallel_search(self.fen, 2, 'smp', float('inf'), 2)
+        self.assertEqual(result['depth'], 2)
+        self.assertEqual([report['worker'] for report in result['workers']], [0, 1])
+        self.assertTrue(all(report['nodes'] > 0 for report in result['workers']))
+        self.assertTrue(JanggiGame.from_fen(self.fen).make_move(*result['move']))
+
+    def test_finds_mate(self):
+        fen = 'R8/4g4/R8/9/9/9/9/9/4G4/8R b'
+        for mode in ('split', 'smp'):
+            result = parallel_search(fen, 2, mode, float('inf'), 3)
+            self.assertEqual(result['move'], ('i10', 'i2'))
+        speedup = measure_speedup(fen, 2, 'split', 2)
+        self.assertGreater(speedup['speedup'], 0)
+        self.assertGreater(speedup['single_nodes'], 0)
+        with self.assertRaises(ValueError):
+            parallel_search(fen, 2, 'threads')
+
+class SelfPlayTest(unittest.TestCase):
+    def test_pool_matches_serial(self):
+        pooled = sorted(run_self_play(4, workers=2, seed=5, max_moves=30), key=lambda game: game['index'])
+        serial = list(run_self_play(4, workers=1, seed=5, max_moves=30))
+        self.assertEqual([game['index'] for game in pooled], [0, 1, 2, 3])
+        self.assertEqual(pooled, serial)
+
+    def test_games_replay(self):
+        opening = [('c10', 'd8'), ('c1', 'd3')]
+        for record in run_self_play(2, workers=1, openings=[opening], max_moves=40):
+            self.assertEqual(record['moves'][:2], opening)
+            game = JanggiGame()
+            for move_from, move_to in record['moves']:
+                self.assertTrue(game.make_move(move_from, move_to))
+            self.assertEqual(game.get_game_state(), record['result'])
+
+    def test_bad_opening(self):
+        # c10 d9 is not a horse move, and a mistyped space is not a move at all
+        for opening in ([('c10', 'd8'), ('c1', 'd3'), ('c10', 'd9')], [('c10', 'z8')]):
+            with self.assertRaises(ValueError):
+                list(run_self_play(1, workers=1, openings=[opening], max_moves=10))
+            with self.assertRaises(ValueError):
+                list(run_self_play(2, workers=2, openings=[opening], max_moves=10))
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.games = [record['moves'] for record in run_self_play(4, workers=1, seed=11, max_moves=60)]
+
+    def test_matches_tracked_game(self):
+        for moves in self.games:
+            game = JanggiGame()
+            checks = []
+            for index, (move_from, move_to) in enumerate(moves):
+                mover = game.get_player_turn()
+                self.assertTrue(game.make_move(move_from, move_to))
+                if game.is_in_check('blue' if mover == 'red' else 'red'):
+                    checks.append(index)
+            result = replay_game(moves)
+            self.assertEqual(result, {'result': game.get_game_state(), 'illegal_move': None, 'checks': checks,
+                                      'moves': len(moves)})
+
+    def test_illegal_move(self):
+        moves = [('c10', 'd8'), ('c1', 'd3'), ('b8', 'b2'), ('a1', 'a2')]
+        self.assertEqual(replay_game(moves)['illegal_move'], 2)
+        self.assertEqual(replay_game(moves)['moves'], 2)
+        self.assertEqual(replay_game([('c10', 'd8'), ('e4', 'f4'), ('b8', 'e8'), ('e2', 'e2')]),
+                         {'result': 'UNFINISHED', 'illegal_move': 3, 'checks': [2], 'moves': 3})
+
+    def test_coordinates(self):
+        board = Board()
+        moves = [(board.convert_coords(move_from), board.convert_coords(move_to)) for move_from, move_to in self.games[0]]
+        self.assertEqual(replay_game(moves), replay_game(self.games[0]))
+
+    def test_pool_matches_serial(self):
+        serial = list(replay_games(self.games, workers=1))
+        self.assertEqual(list(replay_games(self.games, workers=2, chunksize=1)), serial)
+        self.assertEqual([result['index'] for result in serial], [0, 1, 2, 3])
+
+class GameArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.records = list(run_self_play(5, workers=1, seed=3, max_moves=80))
+        handle, self.path = tempfile.mkstemp(suffix='.jga')
+        os.close(handle)
+        with GameArchiveWriter(self.path) as writer:
+            for record in self.records:
+                writer.add_game(record['moves'], record['result'])
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_encode_decode(self):
+        moves = [('a1', 'a2'), ('i10', 'i10'), ('e9', 'f10')]
+        packed = encode_moves(moves)
+        self.assertEqual(len(packed), 6)
+        board = Board()
+        self.assertEqual(list(decode_moves(packed)),
+                         [(board.convert_coords(move_from), board.convert_coords(move_to)) for move_from, move_to in moves])
+        self.assertEqual(encode_moves(decode_moves(packed)), packed)
+
+    def test_read_by_index(self):
+        board = Board()
+        with GameArchive(self.path) as archive:
+            self.assertEqual(len(archive), len(self.records))
+            for index in reversed(range(len(self.records))):
+                moves, result = archive.get_game(index)
+                self.assertEqual(result, self.records[index]['result'])
+                self.assertEqual([(board.convert_to_algebraic(move_from), board.convert_to_algebraic(move_to))
+                                  for move_from, move_to in moves], self.records[index]['moves'])
+                self.assertIsInstance(archive.get_moves(index), bytes)
+
+    def test_replay_archive(self):
+        expected = list(replay_games([record['moves'] for record in self.records]))
+        for workers in (1, 2):
+            results = list(replay_archive(self.path, workers=workers, chunksize=2))
+            self.assertEqual([result.pop('recorded') for result in results], [record['result'] for record in self.records])
+            self.assertEqual(results, expected)
+
+    def test_bad_files(self):
+        with open(self.path, 'rb') as archive_file:
+            data = archive_file.read()
+        # empty, cut short, cut before the trailer, and not an archive
+        for contents in (b'', data[:10], data[:-8], b'x' * len(data)):
+            with open(self.path, 'wb') as archive_file:
+                archive_file.write(contents)
+            with self.assertRaises(ValueError):
+                GameArchive(self.path)
+
+    def test_moves_outlive_archive(self):
+        with GameArchive(self.path) as archive:
+            moves = archive.get_moves(0)
+            games = iter(archive)
+            first = next(games)
+        self.assertEqual(len(moves), len(self.records[0]['moves']) * 2)
+        self.assertEqual(list(decode_moves(moves)), list(first))
+        archive.close()
+
+    def test_index_bounds(self):
+        with GameArchive(self.path) as archive:
+            self.assertEqual(archive.get_game(-1), archive.get_game(len(self.records) - 1))
+            with self.assertRaises(IndexError):
+                archive.get_moves(len(self.records))
+
+class OpeningBookTest(unittest.TestCase):
+    def setUp(self):
+        self.records = list(run_self_play(30, workers=1, seed=5, max_moves=30))
+        handle, self.path = tempfile.mkstemp(suffix='.jgb')
+        os.close(handle)
+        self.summary = build_book(((record['moves'], record['result']) for record in self.records), self.path,
+                                  max_ply=8)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_counts(self):
+        first_moves = {}
+        for record in self.records:
+            move = tuple(record['moves'][0])
+            first_moves[move] = first_moves.get(move, 0) + 1
+        self.assertEqual(self.summary['games'], 30)
+        with OpeningBook(self.path) as book:
+            game = JanggiGame()
+            moves = book.get_moves(game)
+            self.assertEqual({entry['move']: entry['games'] for entry in moves}, first_moves)
+            self.assertEqual([entry['games'] for entry in moves], sorted(first_moves.values(), reverse=True))
+            self.assertEqual(book.lookup(game.get_position_hash() ^ 1), [])
+            self.assertEqual(book.get_move(game), book.lookup(game.get_position_hash())[0][:2])
+
+            # only the first eight plies are added
+            game = setup_game(self.records[0]['moves'][:8])
+            self.assertEqual(book.get_moves(game), [])
+
+    def test_archive_and_min_games(self):
+        handle, archive_path = tempfile.mkstemp(suffix='.jga')
+        os.close(handle)
+        try:
+            with GameArchiveWriter(archive_path) as writer:
+                for record in self.records:
+                    writer.add_game(record['moves'], record['result'])
+            writer = OpeningBookWriter(max_ply=8)
+            with GameArchive(archive_path) as archive:
+                for index in range(len(archive)):
+                    writer.add_game(archive.get_moves(index), archive.get_result(index))
+            self.assertEqual(writer.write(archive_path), self.summary['entries'])
+            with open(archive_path, 'rb') as archive_book, open(self.path, 'rb') as book:
+                self.assertEqual(archive_book.read(), book.read())
+            self.assertLess(writer.write(archive_path, min_games=2), self.summary['entries'])
+            with self.assertRaises(ValueError):
+                OpeningBook(os.path.join(os.path.dirname(__file__), 'README.md'))
+        finally:
+            os.remove(archive_path)
+
+    def test_engine_uses_book(self):
+        with OpeningBook(self.path) as book:
+            game = JanggiGame()
+            engine = Engine(game, table_mb=1, book=book)
+            expected = book.get_moves(game)[0]['move']
+            self.assertEqual(engine.search(5.0), expected)
+            self.assertEqual(engine.get_nodes(), 0)
+
+            # out of book the engine searches
+            game = JanggiGame.from_fen('R8/4g4/R8/9/9/9/9/9/4G4/8R b')
+            engine = Engine(game, table_mb=1, book=book)
+            self.assertEqual(engine.search(1.0, 3), ('i10', 'i2'))
+            self.assertGreater(engine.get_nodes(), 0)
+
+    def test_bad_files(self):
+        with open(self.path, 'rb') as book_file:
+            data = book_file.read()
+        # keys are little endian whatever the machine
+        with OpeningBook(self.path) as book:
+            self.assertEqual(int.from_bytes(data[16:24], 'little'), book._get_key(0))
+        # empty, cut short, cut in the entries, and not a book
+        for contents in (b'', data[:10], data[:-3], b'x' * len(data)):
+            with open(self.path, 'wb') as book_file:
+                book_file.write(contents)
+            with self.assertRaises(ValueError):
+                OpeningBook(self.path)
+
+class TablebaseTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.summaries = Tablebase.generate('sgG', cls.directory, workers=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        for name in os.listdir(cls.directory):
+            os.remove(os.path.join(cls.directory, name))
+        os.rmdir(cls.directory)
+
+    def test_materials(self):
+        self.assertEqual(Tablebase.canonical_material('gaRGa'), 'GRgaa')
+        self.assertEqual(Tablebase.sub_materials('GRgaa'), ['Gg', 'Gga', 'Ggaa', 'GRg', 'GRga'])
+        with self.assertRaises(ValueError):
+            Tablebase.canonical_material('GRR')
+
+    def test_generate(self):
+        self.assertEqual([summary['material'] for summary in self.summaries], ['Gg', 'Ggs'])
+        summary = self.summaries[1]
+        self.assertEqual(summary['positions'], 9 * 9 * 63 * 2)
+        self.assertEqual(summary['win'] + summary['loss'] + summary['draw'] + summary['invalid'],
+                         summary['positions'])
+        self.assertEqual(sorted(os.listdir(self.directory)), ['Gg.jtb', 'Ggs.jtb'])
+        self.assertEqual(Tablebase.generate('Ggs', self.directory, workers=1), [])
+
+    def test_probe(self):
+        with Tablebase.Tablebases(self.directory) as tables:
+            game = JanggiGame.from_fen('4g4/9/9/9/4s4/9/9/9/4G4/9 r')
+            self.assertEqual(tables.probe(game), ('DRAW', None))
+            self.assertIn(tables.get_move(game), game.generate_legal_moves())
+            self.assertIsNone(tables.probe(JanggiGame.from_fen('4g4/9/9/9/4s4/9/9/9/4G4/R8 r')))
+
+            # blue to move while red's soldier checks blue is not a position that can be reached
+            self.assertIsNone(tables.probe(JanggiGame.from_fen('4g4/9/9/9/9/9/9/4s4/4G4/9 r')))
+            self.assertEqual(tables.probe(JanggiGame.from_fen('4g4/9/9/9/9/9/9/4s4/4G4/9 b')), ('DRAW', None))
+            self.assertEqual(tables.get_table('Ggs').get_material(), 'Ggs')
+
+    def test_passes(self):
+        # six positions: 0 is mated, 1 mates in one, 2 can only move to 1, 3 can move to 1 or 2, 4 can pass or
+        # capture in to a position lost in four, 5 can only capture in to a position won in one
+        moves = [[], [0], [1], [1, 2], [4, 6 + 5], [6 + 2]]
+        with open(Tablebase._table_path(self.directory, 'test'), 'wb') as table_file:
+            table_file.write(Tablebase.MAGIC + Tablebase.HEADER.pack(6, b'test'))
+            table_file.write(bytes([Tablebase.MATED, 0, 0, 0, 0, 0]))
+        with open(Tablebase._moves_path(self.directory, 'test', 0), 'wb') as moves_file:
+            moves_file.write(Tablebase.MOVES_HEADER.pack(6, sum(map(len, moves))))
+            offsets = [0]
+            for position_moves in moves:
+                offsets.append(offsets[-1] + len(position_moves))
+            array('I', offsets).tofile(moves_file)
+            array('I', [move for position_moves in moves for move in position_moves]).tofile(moves_file)
+        try:
+            self.assertEqual(Tablebase._run_passes(None, self.directory, 'test', [(0, 0, 6)], 4), 6)
+            with open(Tablebase._table_path(self.directory, 'test'), 'rb') as table_file:
+                self.assertEqual(list(table_file.read()[Tablebase.DATA_OFFSET:]), [1, 2, 3, 4, 6, 3])
+        finally:
+            os.remove(Tablebase._table_path(self.directory, 'test'))
+            os.remove(Tablebase._moves_path(self.directory, 'test', 0))
+
+class GameServerTest(unittest.TestCase):
+    def run_client(self, workers, requests):
+        # start a server, send each request over one connection, and collect the responses
+        async def run():
+            server = GameServer(workers=workers)
+            port = await server.start()
+            try:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                responses = []
+                for request in requests:
+                    writer.write(request.encode() + b'\n')
+                    await writer.drain()
+                    responses.append(json.loads(await reader.readline()))
+                writer.write(b'QUIT\n')
+                await writer.drain()
+                writer.close()
+                return responses
+            finally:
+                await server.close()
+        return asyncio.run(run())
+
+    def test_play(self):
+        for workers in (0, 1):
+            responses = self.run_client(workers, ['NEW', 'MOVE 1 c10 d8', 'MOVE 1 c10 d8', 'MOVES 1', 'STATE 1',
+                                                  'STATS 1', 'CLOSE 1', 'STATE 1', 'JUMP'])
+            self.assertTrue(responses[0]['ok'])
+            self.assertEqual(responses[0]['fen'], START_FEN)
+            self.assertTrue(responses[1]['ok'])
+            self.assertEqual(responses[1]['turn'], 'red')
+            self.assertFalse(responses[2]['ok'])
+            self.assertEqual(len(responses[3]['moves']), 32)
+            self.assertEqual(responses[4]['fen'], setup_game([('c10', 'd8')]).to_fen())
+            self.assertEqual(responses[5]['latency']['requests'], 4)
+            self.assertTrue(responses[6]['ok'])
+            self.assertFalse(responses[7]['ok'])
+            self.assertFalse(responses[8]['ok'])
+
+    def test_mate(self):
+        responses = self.run_client(1, ['NEW R8/4g4/R8/9/9/9/9/9/4G4/8R b', 'MOVE 1 i10 i2', 'MOVE 1 e2 e1',
+                                        'MOVES 1'])
+        self.assertTrue(responses[1]['ok'])
+        self.assertEqual(responses[1]['state'], 'BLUE_WON')
+        self.assertTrue(responses[1]['red_in_check'])
+        self.assertFalse(responses[2]['ok'])
+        self.assertEqual(responses[3]['moves'], [])
+
+    def test_bad_request_keeps_connection(self):
+        for workers in (0, 1):
+            responses = self.run_client(workers, ['NEW', 'MOVE 1 a0 a1', 'MOVE 1 c10 d8', 'STATE 1'])
+            self.assertFalse(responses[1]['ok'])
+            self.assertIn('error', responses[1])
+            self.assertTrue(responses[2]['ok'])
+            self.assertEqual(responses[3]['turn'], 'red')
+
+    def test_close_with_open_connection(self):
+        async def run():
+            server = GameServer(workers=1)
+            port = await server.start()
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'NEW\nMOVES 1\n')
+            await writer.drain()
+            await reader.readline()
+            moves = json.loads(await reader.readline())['moves']
+
+            # the connection is still open, closing the server ends its handler instead of leaving it running
+            await server.close()
+            closed = await reader.readline()
+            writer.close()
+            return moves, closed, asyncio.all_tasks() - {asyncio.current_task()}
+
+        moves, closed, tasks = asyncio.run(run())
+        self.assertEqual(sorted(moves), sorted(map(list, JanggiGame().legal_moves())))
+        self.assertEqual(closed, b'')
+        self.assertEqual(tasks, set())
+
+class InstrumentationTest(unittest.TestCase):
+    def test_profile_move(self):
+        game = setup_game([('c10', 'd8'), ('e4', 'f4')])
+        make_move = JanggiGame.make_move
+        with Instrumentation.profile() as profile:
+            self.assertTrue(game.make_move('b8', 'e8'))
+            game.get_board().copy()
+        self.assertEqual(profile.get_calls('JanggiGame.make_move'), 1)
+        self.assertEqual(profile.get_calls('JanggiGame.is_mate'), 1)
+        self.assertEqual(profile.get_calls('Board.copy'), 1)
+        self.assertGreater(profile.get_calls('Cannon.set_valid_moves'), 0)
+        self.assertGreater(profile.get_calls(Instrumentation.MATE_TRIAL), 0)
+        self.assertGreater(profile.get_seconds('JanggiGame.make_move'), 0)
+        self.assertIn('JanggiGame.make_move', profile.report())
+        self.assertEqual(json.loads(profile.to_json())['methods']['JanggiGame.make_move']['calls'], 1)
+
+        # disabled leaves the original methods in place
+        self.assertFalse(Instrumentation.is_enabled())
+        self.assertIs(JanggiGame.make_move, make_move)
+        self.assertNotIn('set_valid_moves', General.__dict__)
+
+    def test_spaces_read(self):
+        board = JanggiGame().get_board()
+        chariot = board.get_piece((0, 0))
+        with Instrumentation.profile() as profile:
+            chariot.set_valid_moves(board)
+            General('red', 'rG', 'general', (1, 4)).set_valid_moves(board)
+        # the chariot reads up the file to the soldier and along the rank to the elephant
+        self.assertEqual(profile.get_calls('Chariot.set_valid_moves'), 1)
+        self.assertEqual(profile.get_calls('Chariot.set_valid_moves' + Instrumentation.SPACES_READ), 4)
+        self.assertEqual(profile.get_calls('General.set_valid_moves' + Instrumentation.SPACES_READ), 8)
+        self.assertIn('Chariot.set_valid_moves spaces read', profile.report())
+        with self.assertRaises(RuntimeError):
+            with Instrumentation.profile():
+                Instrumentation.enable()
+        self.assertFalse(Instrumentation.is_enabled())
+
+class BenchmarkTest(unittest.TestCase):
+    def test_compare(self):
+        baseline = {'construct': {'value': 1.0, 'unit': 's', 'higher_is_better': False},
+                    'make_move_throughput': {'value': 100.0, 'unit': 'moves/s', 'higher_is_better': True}}
+        current = {'construct': {'value': 1.05, 'unit': 's', 'higher_is_better': False},
+                   'make_move_throughput': {'value': 80.0, 'unit': 'moves/s', 'higher_is_better': True},
+                   'new': {'value': 5.0, 'unit': 's', 'higher_is_better': False}}
+        regressions = Benchmark.compare(baseline, current)
+        self.assertEqual([regression['name'] for regression in regressions], ['make_move_throughput'])
+        self.assertAlmostEqual(regressions[0]['change'], 0.2)
+        self.assertEqual(len(Benchmark.compare(baseline, current, threshold=0.01)), 2)
+
+    def test_endgame_reachable(self):
+        record = next(run_self_play(1, workers=1, seed=123, max_moves=372))
+        self.assertEqual(setup_game(record['moves']).to_fen(), Benchmark.ENDGAME_FEN)
+
+    def test_scripted_games(self):
+        games = Benchmark.scripted_games()
+        self.assertIn([('e1', 'e1')], games)
+        self.assertIn('BLUE_WON', [Benchmark.play(moves).get_game_state() for moves in games])
+
+@unittest.skipUnless(numpy, 'numpy is not installed')
+class BatchMovesTest(unittest.TestCase):
+    def test_perft_suite(self):
+        boards, turns = BatchMoves.encode_games(setup_game(position['moves']) for position in REFERENCE_POSITIONS)
+        self.assertEqual(boards.shape, (len(REFERENCE_POSITIONS), 10, 9))
+        counts = BatchMoves.perft(boards, turns, 3)
+        self.assertEqual(counts.tolist(), [position['counts'][2] for position in REFERENCE_POSITIONS])
+
+    def test_matches_games(self):
+        games = []
+        for record in run_self_play(3, workers=1, seed=8, max_moves=60):
+            game = JanggiGame()
+            for move_from, move_to in record['moves']:
+                game.make_move(move_from, move_to)
+                if game.get_game_state() == 'UNFINISHED':
+                    games.append(JanggiGame.from_fen(game.to_fen()))
+        boards, turns = BatchMoves.encode_games(games)
+        masks, passes = BatchMoves.legal_move_masks(boards, turns)
+        for game, moves, can_pass in zip(games, BatchMoves.legal_moves(boards, turns), passes):
+            self.assertEqual(sorted(moves), sorted(game.generate_legal_moves()))
+            self.assertEqual(can_pass, not game.is_check(game.get_player_turn()))
+        self.assertEqual(masks.sum() + passes.sum(), sum(len(game.generate_legal_moves()) for game in games))
+
+    def test_mate(self):
+        boards, turns = BatchMoves.encode_games([JanggiGame.from_fen('R3g4/R8/9/9/9/9/9/9/4G4/9 r')])
+        self.assertEqual(BatchMoves.legal_moves(boards, turns), [[]])
+
 class GameTest(unittest.TestCase):
     def setUp(self):
         self.g = JanggiGame()
+
+    def play(self, name):
+        for move_from, move_to in SCRIPTED_GAMES[name]:
+            self.assertTrue(self.g.make_move(move_from, move_to))
     
     def test_pass_turn(self):
-        self.g.make_move('e1', 'e1')
+        self.play('pass_turn')
         self.assertEqual(self.g.get_player_turn(), 'red')
     
     def test_red_check(self):
-        self.g.make_move('c10', 'd8')
-        self.g.make_move('e4', 'f4')
-        self.g.make_move('b8', 'e8')
+        self.play('red_check')
         self.assertTrue(self.g.is_in_check('red'))
     
     def test_blue_check(self):
-        self.g.make_move('e7', 'f7')
-        self.g.make_move('e4', 'd4')
-        self.g.make_move('a7', 'a7')
-        self.g.make_move('e2', 'e1')
-        self.g.make_move('a7', 'a7')
-        self.g.make_move('a1', 'a2')
-        self.g.make_move('a7', 'a7')
-        self.g.make_move('a2', 'e2')
+        self.play('blue_check')
         self.assertTrue(self.g.is_in_check('blue'))
     
     def test_checkmate(self):
-        self.g.make_move('a7', 'b7')
-        self.g.make_move('i4', 'h4')
-        self.g.make_move('h10', 'g8')
-        self.g.make_move('c1', 'd3')
-        self.g.make_move('h8', 'e8')
-        self.g.make_move('i1', 'i2')
-        self.g.make_move('e7', 'f7')
-        self.g.make_move('b3', 'e3')
-        self.g.make_move('g10', 'e7')
-        self.g.make_move('e4', 'd4')
-        self.g.make_move('c10', 'd8')
-        self.g.make_move('g1', 'e4')
-        self.g.make_move('f10', 'f9')
-        self.g.make_move('h1', 'g3')
-        self.g.make_move('a10', 'a6')
-        self.g.make_move('d4', 'd5')
-        self.g.make_move('e9', 'f10')
-        self.g.make_move('h3', 'f3')
-        self.g.make_move('e8', 'h8')
-        self.g.make_move('i2', 'h2')
-        self.g.make_move('h8', 'f8')
-        self.g.make_move('f1', 'f2')
-        self.g.make_move('b8', 'e8')
-        self.g.make_move('f3', 'f1')
-        self.g.make_move('i7', 'h7')
-        self.g.make_move('f1', 'c1')
-        self.g.make_move('d10', 'e9')
-        self.g.make_move('a4', 'b4')
-        self.g.make_move('a6', 'a1')
-        self.g.make_move('c1', 'a1')
-        self.g.make_move('f8', 'd10')
-        self.g.make_move('d5', 'c5')
-        self.g.make_move('i10', 'i6')
-        self.g.make_move('b1', 'd4')
-        self.g.make_move('c7', 'c6')
-        self.g.make_move('c5', 'b5')
-        self.g.make_move('b10', 'd7')
-        self.g.make_move('d4', 'f7')
-        self.g.make_move('g7', 'f7')
-        self.g.make_move('a1', 'f1')
-        self.g.make_move('g8', 'f6')
-        self.g.make_move('f1', 'f5')
-        self.g.make_move('f6', 'd5')
-        self.g.make_move('e3', 'e5')
-        self.g.make_move('f7', 'f6')
-        self.g.make_move('f5', 'f7')
-        self.g.make_move('f10', 'e10')
-        self.g.make_move('e2', 'f1')
-        self.g.make_move('i6', 'i3')
-        self.g.make_move('h2', 'g2')
-        self.g.make_move('i3', 'i1')
-        self.g.make_move('f1', 'e2')
-        self.g.make_move('f6', 'f5')
-        self.g.make_move('c4', 'd4')
-        self.g.make_move('f5', 'e5')
-        self.g.make_move('f7', 'd7')
-        self.g.make_move('e7', 'g4')
-        self.g.make_move('d4', 'd5')
-        self.g.make_move('e5', 'e4')
-        self.g.make_move('d3', 'e5')
-        self.g.make_move('e4', 'e3')
-        self.g.make_move('e2', 'd2')
-        self.g.make_move('e3', 'e2')
-        self.g.make_move('d2', 'd3')
-        self.g.make_move('e8', 'e4')
-        self.g.make_move('f2', 'e2')
-        self.g.make_move('i1', 'd1')
-        self.g.make_move('e2', 'd2')
-        self.g.make_move('d1', 'f3')
+        self.play('checkmate')
         self.assertTrue(self.g.get_game_state(), 'BLUE_WON')
 
 
@@ -1,20 +1,31 @@
+from MoveTables import PALACE_MOVES
+from PieceConstants import BLUE, COLOR_CODES, COLOR_NAMES, TYPE_CODES, TYPE_NAMES
+
+
 class MasterPiece:
     """
     Holds data common to all pieces of the game. Individual pieces will inherit from this class.
     Named after my code for this assignment (joke). Some of the methods will be called in the game class
     to get and set data, or to check for valid moves and whether a piece is blocked. It will also
-    interact with Board class to check for valid moves of a piece.
+    interact with Board class to check for valid moves of a piece. Uses __slots__ to keep each piece
+    small, and stores color and type as the int codes from PieceConstants.
     """
+    __slots__ = ('_color', '_name', '_type', '_location', '_valid_moves', '_watched', '_refresh')
+
     def __init__(self, color: str, name: str, type: str, location: tuple):
         """
         Initializes the piece color, name, type, and location. Holds data member of the piece's current valid
         moves given the most recently updated board.
         """
-        self._color = color
+        self._color = COLOR_CODES[color]
         self._name = name
-        self._type = type
+        self._type = TYPE_CODES[type]
         self._location = location
         self._valid_moves = set()
+        self._watched = ()
+
+        # called to recalculate the valid moves on next access after the board changed, None when up to date
+        self._refresh = None
     
     def get_name(self) -> str:
         """
@@ -28,6 +39,13 @@ class MasterPiece:
         Getter method for accessing the piece's color.
         return: color of the piece
         """
+        return COLOR_NAMES[self._color]
+
+    def get_color_code(self) -> int:
+        """
+        Getter method for accessing the piece's color code.
+        return: RED or BLUE from PieceConstants
+        """
         return self._color
 
     def get_type(self) -> str:
@@ -35,6 +53,13 @@ class MasterPiece:
         Getter method for accessing piece type.
         return: type of the piece
         """
+        return TYPE_NAMES[self._type]
+
+    def get_type_code(self) -> int:
+        """
+        Getter method for accessing the piece's type code.
+        return: type code from PieceConstants
+        """
         return self._type
 
     def get_location(self) -> tuple:
@@ -46,11 +71,35 @@ class MasterPiece:
     
     def get_valid_moves(self) -> set:
         """
-        Getter method for accessing a piece's valid moves.
+        Getter method for accessing a piece's valid moves. Recalculates them first when they were marked stale.
         return: set of the pieces valid move-to coordinates
         """
+        if self._refresh is not None:
+            self._refresh(self)
         return self._valid_moves
 
+    def mark_stale(self, refresh) -> None:
+        """
+        Marks the piece's valid moves as out of date, so they are recalculated on next access instead of now.
+        param refresh: function called with the piece to recalculate its valid moves
+        return: None
+        """
+        self._refresh = refresh
+
+    def is_stale(self) -> bool:
+        """
+        Returns whether the piece's valid moves are waiting to be recalculated.
+        """
+        return self._refresh is not None
+
+    def get_watched(self) -> tuple:
+        """
+        Getter method for accessing the spaces read the last time the piece's valid moves were set. A change
+        of occupancy on any other space cannot change the piece's valid moves.
+        return: sequence of coordinates
+        """
+        return self._watched
+
     def set_location(self, location: tuple) -> None:
         """
         Sets the piece's location.
@@ -70,20 +119,25 @@ class MasterPiece:
         Clears the piece's list of valid moves. Used before refilling so invalid moves do not persist.
         return: None
         """
+        self._refresh = None
         self._valid_moves.clear()
     
     def set_valid_moves(self, board) -> None:
         """
-        Loops through each space on the board and checks if it is a valid destination for the piece.
-        Adds all valid destinations to the piece's valid moves set. Set is wiped clean before looping.
+        Looks up the spaces the piece could reach from its location and adds each one that is not blocked
+        to the piece's valid moves. Set is wiped clean before looping. Guard and general use this method,
+        other pieces override it with their own lookup tables. Records the spaces that were read.
         return: None
         """
         # clear set before adding spaces
         self.clear_moves()
 
-        for space in board.get_board():
-            if self.valid_move(space) and not self.is_blocked(space, board):
+        spaces = PALACE_MOVES[self._color][self._location]
+        for space in spaces:
+            piece = board.get_piece(space)
+            if piece is None or piece.get_color_code() != self._color:
                 self.add_move(space)
+        self._watched = spaces
 
     def valid_move(self, next_loc: tuple):
         """
@@ -96,7 +150,7 @@ class MasterPiece:
         cur_loc = self._location
 
         # handle blue moves
-        if self._color == 'blue':
+        if self._color == BLUE:
 
             # cannot move out of the palace
             if (next_loc[0] < 7 or next_loc[0] > 9) or (next_loc[1] < 3 or next_loc[1] > 5):
@@ -138,7 +192,7 @@ class MasterPiece:
         return: True if piece is blocked, else False
         """
         # for soldier, general, and guards, if space is occupied by same color piece it is blocked
-        if board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_color() == self._color:
+        if board.get_piece(next_loc) is not None and board.get_piece(next_loc).get_color_code() == self._color:
             return True
         return False
         
\ No newline at end of file
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+
+DEFAULT_SIZE = 1024
+
+
+class MoveCache:
+    """
+    Least recently used cache of legal move lists keyed by position hash. Holds at most size positions, dropping
+    the one used longest ago when full. Keeps counts of hits, misses, and evictions. May be shared by several
+    games, since equal positions have equal hashes no matter which game reached them.
+    """
+    def __init__(self, size: int = DEFAULT_SIZE):
+        """
+        Initializes an empty cache.
+        param size: number of positions to hold, 0 turns caching off
+        """
+        if size < 0:
+            raise ValueError('cache size must not be negative')
+        self._size = size
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_size(self) -> int:
+        """
+        Returns the number of positions the cache can hold.
+        """
+        return self._size
+
+    def get_stats(self) -> dict:
+        """
+        Returns the cache's counters and the share of lookups that found their position.
+        """
+        lookups = self._hits + self._misses
+        return {'hits': self._hits, 'misses': self._misses, 'evictions': self._evictions,
+                'hit_rate': self._hits / lookups if lookups else 0.0, 'entries': len(self._entries),
+                'size': self._size}
+
+    def clear(self) -> None:
+        """
+        Empties the cache and resets the counters.
+        return: None
+        """
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: int):
+        """
+        Looks up the moves stored for a position and marks it as most recently used.
+        param key: position hash
+        return: tuple of moves, or None when the position is not stored
+        """
+        moves = self._entries.get(key)
+        if moves is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return moves
+
+    def put(self, key: int, moves: tuple) -> None:
+        """
+        Stores the moves of a position, dropping the least recently used position when the cache is full.
+        param key: position hash
+        param moves: tuple of moves
+        return: None
+        """
+        if not self._size:
+            return
+        self._entries[key] = moves
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
@@ -0,0 +1,197 @@
+"""
+Lookup tables of candidate destinations for every piece type, color and origin square. The tables are
+built once at import time so that a piece only examines the squares it could actually reach instead of
+looping over every space on the board. Occupancy is still checked by the pieces against the current board.
+Tables that depend on color are keyed by the color codes in PieceConstants.
+"""
+from PieceConstants import RED, BLUE
+
+BOARD_ROWS = 10
+BOARD_COLS = 9
+
+# every board coordinate in row major order
+SQUARES = tuple((row, col) for row in range(BOARD_ROWS) for col in range(BOARD_COLS))
+
+# palace spaces for each color, and the points of each palace connected by diagonal lines
+PALACES = {
+    RED: frozenset((row, col) for row in range(0, 3) for col in range(3, 6)),
+    BLUE: frozenset((row, col) for row in range(7, 10) for col in range(3, 6))
+}
+PALACE_X = {
+    RED: ((0, 3), (0, 5), (1, 4), (2, 3), (2, 5)),
+    BLUE: ((7, 3), (7, 5), (8, 4), (9, 3), (9, 5))
+}
+PALACE_CENTERS = ((1, 4), (8, 4))
+
+COLORS = (RED, BLUE)
+
+
+def on_board(coord: tuple) -> bool:
+    """
+    Returns whether the coordinate lies on the board.
+    param coord: coordinate to check
+    return: True if coordinate is on the board, else False
+    """
+    return 0 <= coord[0] < BOARD_ROWS and 0 <= coord[1] < BOARD_COLS
+
+
+def _build_orthogonal_rays(origin: tuple) -> tuple:
+    """
+    Builds the four horizontal and vertical rays leaving the origin, ordered outward from the origin.
+    param origin: square the rays start from (not included in the rays)
+    return: tuple of rays, each a tuple of coordinates
+    """
+    rays = []
+    for row_step, col_step in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        ray = []
+        space = (origin[0] + row_step, origin[1] + col_step)
+        while on_board(space):
+            ray.append(space)
+            space = (space[0] + row_step, space[1] + col_step)
+        if ray:
+            rays.append(tuple(ray))
+    return tuple(rays)
+
+
+def _build_palace_diagonal_rays(origin: tuple) -> tuple:
+    """
+    Builds the rays along the palace diagonal lines leaving the origin. A corner has a single ray through
+    the center to the opposite corner, the center has a ray of length one to each corner.
+    param origin: square the rays start from
+    return: tuple of rays, empty when the origin is not on a palace diagonal
+    """
+    for center in PALACE_CENTERS:
+        if origin == center:
+            return tuple(((center[0] + row_step, center[1] + col_step),)
+                         for row_step in (-1, 1) for col_step in (-1, 1))
+        if abs(origin[0] - center[0]) == 1 and abs(origin[1] - center[1]) == 1:
+            opposite = (2 * center[0] - origin[0], 2 * center[1] - origin[1])
+            return ((center, opposite),)
+    return ()
+
+
+def _build_horse_moves(origin: tuple) -> tuple:
+    """
+    Builds the horse destinations from the origin along with the orthogonal space that blocks each jump.
+    param origin: square the horse starts from
+    return: tuple of (destination, leg) pairs
+    """
+    moves = []
+    for row_step, col_step in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        leg = (origin[0] + row_step, origin[1] + col_step)
+        for side in (-1, 1):
+            # step one space orthogonally, then one space diagonally outward
+            dest = (leg[0] + row_step + side * col_step, leg[1] + col_step + side * row_step)
+            if on_board(dest):
+                moves.append((dest, leg))
+    return tuple(moves)
+
+
+def _build_elephant_moves(origin: tuple) -> tuple:
+    """
+    Builds the elephant destinations from the origin along with the two spaces that block each jump.
+    param origin: square the elephant starts from
+    return: tuple of (destination, (first leg, second leg)) pairs
+    """
+    moves = []
+    for row_step, col_step in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        first = (origin[0] + row_step, origin[1] + col_step)
+        for side in (-1, 1):
+            # step one space orthogonally, then two spaces diagonally outward
+            second = (first[0] + row_step + side * col_step, first[1] + col_step + side * row_step)
+            dest = (second[0] + row_step + side * col_step, second[1] + col_step + side * row_step)
+            if on_board(dest):
+                moves.append((dest, (first, second)))
+    return tuple(moves)
+
+
+def _build_soldier_moves(color: int, origin: tuple) -> tuple:
+    """
+    Builds the soldier destinations from the origin: one space forward, one space sideways, and the
+    forward diagonal steps inside the enemy palace.
+    param color: color code of the soldier
+    param origin: square the soldier starts from
+    return: tuple of destinations
+    """
+    forward = -1 if color == BLUE else 1
+    enemy = RED if color == BLUE else BLUE
+    moves = [(origin[0] + forward, origin[1]), (origin[0], origin[1] - 1), (origin[0], origin[1] + 1)]
+
+    # diagonal steps toward the far side of the enemy palace
+    enemy_x = PALACE_X[enemy]
+    if origin in enemy_x:
+        for col_step in (-1, 1):
+            dest = (origin[0] + forward, origin[1] + col_step)
+            if dest in enemy_x:
+                moves.append(dest)
+    return tuple(dest for dest in moves if on_board(dest))
+
+
+def _build_palace_moves(color: int, origin: tuple) -> tuple:
+    """
+    Builds the general and guard destinations from the origin. Moves are one space along the palace lines
+    and may never leave the color's palace.
+    param color: color code of the piece
+    param origin: square the piece starts from
+    return: tuple of destinations
+    """
+    palace = PALACES[color]
+    palace_x = PALACE_X[color]
+    moves = []
+    for row_step in (-1, 0, 1):
+        for col_step in (-1, 0, 1):
+            dest = (origin[0] + row_step, origin[1] + col_step)
+            if dest == origin or dest not in palace:
+                continue
+
+            # diagonal steps must follow the palace lines
+            if row_step and col_step and (origin not in palace_x or dest not in palace_x):
+                continue
+            moves.append(dest)
+    return tuple(moves)
+
+
+ORTHOGONAL_RAYS = {square: _build_orthogonal_rays(square) for square in SQUARES}
+PALACE_DIAGONAL_RAYS = {square: _build_palace_diagonal_rays(square) for square in SQUARES}
+
+# chariots and cannons slide along both the orthogonal lines and the palace diagonals
+SLIDING_RAYS = {square: ORTHOGONAL_RAYS[square] + PALACE_DIAGONAL_RAYS[square] for square in SQUARES}
+
+HORSE_MOVES = {square: _build_horse_moves(square) for square in SQUARES}
+ELEPHANT_MOVES = {square: _build_elephant_moves(square) for square in SQUARES}
+SOLDIER_MOVES = {color: {square: _build_soldier_moves(color, square) for square in SQUARES} for color in COLORS}
+PALACE_MOVES = {color: {square: _build_palace_moves(color, square) for square in SQUARES} for color in COLORS}
+
+
+def _invert_jumps(table: dict) -> dict:
+    """
+    Inverts a table of jumping moves so it can be read from the destination. Used to find the pieces that
+    could reach a space by starting from the space and looking outward.
+    param table: maps origin to (destination, blocking spaces) pairs
+    return: maps destination to tuple of (origin, blocking spaces) pairs
+    """
+    inverted = {square: [] for square in SQUARES}
+    for origin in SQUARES:
+        for dest, legs in table[origin]:
+            inverted[dest].append((origin, legs))
+    return {square: tuple(moves) for square, moves in inverted.items()}
+
+
+def _invert_steps(table: dict) -> dict:
+    """
+    Inverts a table of single step moves so it can be read from the destination.
+    param table: maps origin to tuple of destinations
+    return: maps destination to tuple of origins
+    """
+    inverted = {square: [] for square in SQUARES}
+    for origin in SQUARES:
+        for dest in table[origin]:
+            inverted[dest].append(origin)
+    return {square: tuple(origins) for square, origins in inverted.items()}
+
+
+# reverse tables, read from the attacked space
+HORSE_ATTACKS = _invert_jumps(HORSE_MOVES)
+ELEPHANT_ATTACKS = _invert_jumps(ELEPHANT_MOVES)
+SOLDIER_ATTACKS = {color: _invert_steps(SOLDIER_MOVES[color]) for color in COLORS}
+PALACE_ATTACKS = {color: _invert_steps(PALACE_MOVES[color]) for color in COLORS}
@@ -0,0 +1,284 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+
+from GameArchive import MAGIC as ARCHIVE_MAGIC, GameArchive, decode_moves
+from JanggiGame import JanggiGame
+from MoveTables import BOARD_COLS, SQUARES
+
+# file layout: magic, header of the entry count, the sorted position hashes, then one entry per hash in the same
+# order, all numbers little endian. A position has an entry for each move played from it, most played first. An entry holds the square
+# indexes moved from and to, where a pass moves from a square to itself, the number of games that played the move,
+# and how many of them blue and red went on to win.
+MAGIC = b'JOB1'
+HEADER = struct.Struct('<4xQ')
+KEY = struct.Struct('<Q')
+ENTRY = struct.Struct('<BBIII')
+
+# plies of each game added to the book
+MAX_PLY = 24
+
+
+class OpeningBookWriter:
+    """
+    Collects the moves played from each position over the opening plies of recorded games, then writes them to a
+    book file sorted by position hash.
+    """
+    def __init__(self, max_ply: int = MAX_PLY):
+        """
+        Initializes an empty book.
+        param max_ply: number of plies of each game to add
+        """
+        self._max_ply = max_ply
+        self._entries = {}
+        self._games = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_games(self) -> int:
+        """
+        Returns the number of games added.
+        """
+        return self._games
+
+    def add_game(self, moves, result: str = None) -> int:
+        """
+        Replays a game's opening and counts each move under the position it was played from. Stops at the first
+        illegal move.
+        param moves: iterable of (move from, move to) pairs, algebraic strings or board coordinates, or packed
+        moves from a GameArchive
+        param result: final game state, or None to find it by playing the whole game
+        return: number of plies added
+        """
+        if isinstance(moves, (bytes, bytearray, memoryview)):
+            moves = decode_moves(moves)
+        game = JanggiGame()
+        game.set_move_tracking(False)
+        board = game.get_board()
+        played = []
+        for ply, (move_from, move_to) in enumerate(moves):
+            if ply >= self._max_ply and result is not None:
+                break
+            if isinstance(move_from, str):
+                move_from = board.convert_coords(move_from)
+                move_to = board.convert_coords(move_to)
+            key = game.get_position_hash()
+            if move_from is None or move_to is None or not game.play_move(tuple(move_from), tuple(move_to)):
+                break
+            if ply < self._max_ply:
+                played.append((key, move_from[0] * BOARD_COLS + move_from[1],
+                               move_to[0] * BOARD_COLS + move_to[1]))
+
+        if result is None:
+            result = game.get_game_state()
+        for entry in played:
+            counts = self._entries.get(entry)
+            if counts is None:
+                counts = self._entries[entry] = [0, 0, 0]
+            counts[0] += 1
+            counts[1] += result == 'BLUE_WON'
+            counts[2] += result == 'RED_WON'
+        self._games += 1
+        return len(played)
+
+    def write(self, path: str, min_games: int = 1) -> int:
+        """
+        Writes the book file.
+        param path: file to write
+        param min_games: fewest games a move must have been played in to be written
+        return: number of entries written
+        """
+        entries = sorted(((key, -counts[0], move_from, move_to, counts)
+                          for (key, move_from, move_to), counts in self._entries.items() if counts[0] >= min_games))
+        with open(path, 'wb') as book_file:
+            book_file.write(MAGIC)
+            book_file.write(HEADER.pack(len(entries)))
+            book_file.write(struct.pack('<%dQ' % len(entries), *(entry[0] for entry in entries)))
+            for _, _, move_from, move_to, counts in entries:
+                book_file.write(ENTRY.pack(move_from, move_to, *counts))
+        return len(entries)
+
+
+class OpeningBook:
+    """
+    Reads a book file by memory mapping it. Lookups binary search the sorted position hashes in place, so opening
+    a book reads nothing and each lookup only touches a few pages. Can be used as a context manager.
+    """
+    def __init__(self, path: str):
+        """
+        Maps the book file and reads its header. Raises ValueError when the file is not a whole book.
+        param path: file to read
+        """
+        self._file = open(path, 'rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < len(MAGIC) + HEADER.size:
+                raise ValueError(path + ' is too short to be an opening book')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map[:len(MAGIC)] != MAGIC:
+                raise ValueError(path + ' is not an opening book')
+            count = HEADER.unpack_from(self._map, len(MAGIC))[0]
+            if size != len(MAGIC) + HEADER.size + count * (KEY.size + ENTRY.size):
+                raise ValueError(path + ' is a truncated or damaged opening book')
+        except BaseException:
+            self.close()
+            raise
+        self._count = count
+        self._keys = len(MAGIC) + HEADER.size
+        self._entries = self._keys + count * KEY.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _get_key(self, index: int) -> int:
+        """
+        Reads the position hash of an entry.
+        param index: index of the entry
+        return: position hash
+        """
+        return KEY.unpack_from(self._map, self._keys + index * KEY.size)[0]
+
+    def lookup(self, key: int) -> list:
+        """
+        Finds the moves played from a position.
+        param key: position hash
+        return: list of (current coordinate, destination coordinate, games, blue wins, red wins) tuples, most
+        played first, empty when the position is not in the book
+        """
+        # binary search for the first entry of the position
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        index = low
+        moves = []
+        while index < self._count and self._get_key(index) == key:
+            move_from, move_to, games, blue_wins, red_wins = ENTRY.unpack_from(self._map, self._entries +
+                                                                               index * ENTRY.size)
+            moves.append((SQUARES[move_from], SQUARES[move_to], games, blue_wins, red_wins))
+            index += 1
+        return moves
+
+    def get_moves(self, game: JanggiGame) -> list:
+        """
+        Finds the book moves of a game's position in algebraic notation, for suggesting moves.
+        param game: game at the position to look up
+        return: list of dictionaries with the move as a (move from, move to) pair, the games that played it, and
+        the share of them the player to move went on to win, most played first
+        """
+        board = game.get_board()
+        blue = game.get_player_turn() == 'blue'
+        return [{'move': (board.convert_to_algebraic(move_from), board.convert_to_algebraic(move_to)),
+                 'games': games, 'win_rate': (blue_wins if blue else red_wins) / games}
+                for move_from, move_to, games, blue_wins, red_wins in self.lookup(game.get_position_hash())]
+
+    def get_move(self, game: JanggiGame, min_games: int = 1):
+        """
+        Picks the book move for a game's position: the most played move, the one the player to move won more
+        often on a tie. Moves are checked to be legal, so a hash collision cannot give a bad move.
+        param game: game at the position to look up
+        param min_games: fewest games a move must have been played in
+        return: (current coordinate, destination coordinate) tuple, or None when the book has no move
+        """
+        if game.get_game_state() != 'UNFINISHED':
+            return None
+        color = game.get_player_turn()
+        wins = 3 if color == 'blue' else 4
+        for move in sorted(self.lookup(game.get_position_hash()), key=lambda move: (-move[2], -move[wins])):
+            if move[2] < min_games:
+                break
+            if _is_legal(game, move[0], move[1]):
+                return move[0], move[1]
+        return None
+
+    def close(self) -> None:
+        """
+        Releases the mapping and closes the file.
+        return: None
+        """
+        if self._file.closed:
+            return
+        try:
+            if hasattr(self, '_map'):
+                self._map.close()
+        finally:
+            self._file.close()
+
+
+def _is_legal(game: JanggiGame, cur_coord: tuple, dest_coord: tuple) -> bool:
+    """
+    Checks a move for the player to move without making it.
+    param game: game at the position
+    param cur_coord: coordinate of the piece to move, or of the pass square
+    param dest_coord: coordinate to move to
+    return: True when the move is legal
+    """
+    color = game.get_player_turn()
+    if cur_coord == dest_coord:
+        return not game.is_check(color)
+    piece = game.get_board().get_piece(cur_coord)
+    if piece is None or piece.get_color() != color:
+        return False
+    game.refresh_untracked_moves(color)
+    return dest_coord in piece.get_valid_moves() and not game.leaves_in_check(cur_coord, dest_coord, color)
+
+
+def build_book(games, path: str, max_ply: int = MAX_PLY, min_games: int = 1) -> dict:
+    """
+    Builds a book file from recorded games.
+    param games: iterable of (moves, result) pairs, result None when it is not recorded
+    param path: book file to write
+    param max_ply: number of plies of each game to add
+    param min_games: fewest games a move must have been played in to be kept
+    return: dictionary with the number of games read and entries written
+    """
+    writer = OpeningBookWriter(max_ply)
+    for moves, result in games:
+        writer.add_game(moves, result)
+    return {'games': writer.get_games(), 'entries': writer.write(path, min_games)}
+
+
+def main(args=None) -> int:
+    """
+    Command line entry point. Builds a book from a GameArchive or a file of JSON lines.
+    param args: command line arguments, sys.argv when None
+    return: exit status
+    """
+    parser = argparse.ArgumentParser(description='Build a Janggi opening book from recorded games.')
+    parser.add_argument('games', help='game archive, or file of games with one JSON list of move pairs or '
+                                      'SelfPlay game per line')
+    parser.add_argument('book', help='book file to write')
+    parser.add_argument('--max-ply', type=int, default=MAX_PLY, help='plies of each game to add')
+    parser.add_argument('--min-games', type=int, default=1, help='fewest games a move must be played in')
+    options = parser.parse_args(args)
+
+    with open(options.games, 'rb') as game_file:
+        is_archive = game_file.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+    if is_archive:
+        with GameArchive(options.games) as archive:
+            games = ((archive.get_moves(index), archive.get_result(index)) for index in range(len(archive)))
+            summary = build_book(games, options.book, options.max_ply, options.min_games)
+    else:
+        with open(options.games) as game_file:
+            records = (json.loads(line) for line in game_file if line.strip())
+            games = ((record['moves'], record.get('result')) if isinstance(record, dict) else (record, None)
+                     for record in records)
+            summary = build_book(games, options.book, options.max_ply, options.min_games)
+    print('games', summary['games'], 'entries', summary['entries'])
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,267 @@
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from multiprocessing import shared_memory
+
+from Engine import Engine, MATE_SCORE, MAX_PLY
+from Evaluation import PIECE_VALUES
+from JanggiGame import JanggiGame, START_FEN
+from OpeningBook import OpeningBook
+from TranspositionTable import TranspositionTable, encode_move, decode_move
+
+MODES = ('split', 'smp')
+
+
+def _report(worker: int, engine: Engine, seconds: float) -> dict:
+    """
+    Collects what a worker sends back: its node count, deepest finished depth, and the result of each depth with
+    the move packed by encode_move.
+    param worker: index of the worker
+    param engine: engine that ran the worker's search
+    param seconds: time the worker's search took
+    return: dictionary of the worker's results
+    """
+    return {'worker': worker, 'nodes': engine.get_nodes(), 'depth': engine.get_depth(), 'seconds': seconds,
+            'iterations': [(depth, score, encode_move(move)) for depth, score, move in engine.get_iterations()]}
+
+
+def _is_mate_score(report: dict) -> bool:
+    """
+    Returns whether a worker's last finished depth found a forced mate for either side.
+    param report: worker's results, see _report
+    """
+    return bool(report['iterations']) and abs(report['iterations'][-1][1]) >= MATE_SCORE - MAX_PLY
+
+
+def _split_task(task: dict) -> dict:
+    """
+    Searches a share of the root moves, run in a worker process. The position comes as a position string and the
+    moves as packed ints, so no boards or pieces are pickled.
+    param task: dictionary with the worker index, position string, packed root moves, time limit, deepest depth,
+    and transposition table size
+    return: dictionary of the worker's results, see _report
+    """
+    start = time.perf_counter()
+    engine = Engine(JanggiGame.from_fen(task['fen']), table_mb=task['table_mb'])
+    engine.search(task['time_limit'], task['max_depth'], [decode_move(code) for code in task['moves']])
+    return _report(task['worker'], engine, time.perf_counter() - start)
+
+
+def _smp_task(task: dict) -> dict:
+    """
+    Searches the whole position with a transposition table laid over shared memory, run in a worker process.
+    Workers other than the first try the root moves in a shuffled order so they spread out over the tree and
+    fill the shared table with results the others can use.
+    param task: dictionary with the worker index, position string, shared memory name, seed, time limit, and
+    deepest depth
+    return: dictionary of the worker's results, see _report
+    """
+    start = time.perf_counter()
+    # the worker only attaches, the parent process unlinks the memory once every worker is done
+    memory = shared_memory.SharedMemory(task['memory'])
+    table = TranspositionTable(buffer=memory.buf)
+    try:
+        game = JanggiGame.from_fen(task['fen'])
+        root_moves = None
+        if task['worker']:
+            root_moves = sorted(game.generate_legal_moves())
+            random.Random(task['seed']).shuffle(root_moves)
+        engine = Engine(game, table)
+        engine.search(task['time_limit'], task['max_depth'], root_moves)
+        return _report(task['worker'], engine, time.perf_counter() - start)
+    finally:
+        table.release()
+        memory.close()
+
+
+def split_moves(fen: str, workers: int) -> list:
+    """
+    Deals the legal moves of a position out to workers, captures of the most valuable pieces first, so each
+    worker gets a similar mix of likely good moves.
+    param fen: position string
+    param workers: number of workers
+    return: list of move lists, one per worker that gets at least one move
+    """
+    game = JanggiGame.from_fen(fen)
+    board = game.get_board()
+
+    def victim(move):
+        piece = board.get_piece(move[1]) if move[0] != move[1] else None
+        return -PIECE_VALUES[piece.get_type()] if piece is not None else 0
+
+    moves = sorted(sorted(game.generate_legal_moves()), key=victim)
+    return [moves[index::workers] for index in range(min(workers, len(moves)))]
+
+
+def _run_tasks(function, tasks: list, workers: int) -> list:
+    """
+    Runs tasks across a pool of worker processes, or in this process when there is one task.
+    param function: task function
+    param tasks: list of task dictionaries
+    param workers: number of worker processes
+    return: list of task results in the order of the tasks
+    """
+    if len(tasks) == 1:
+        return [function(tasks[0])]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(function, tasks)
+
+
+def parallel_search(fen: str = START_FEN, workers: int = None, mode: str = 'split', time_limit: float = 1.0,
+                    max_depth: int = MAX_PLY - 1, table_mb: float = 16, seed: int = 0, book: str = None) -> dict:
+    """
+    Searches a position across several worker processes.
+
+    In 'split' mode the root moves are dealt out to the workers and each searches its share with its own
+    engine. The best move is taken at the deepest depth every worker finished, since scores from different
+    depths cannot be compared. In 'smp' mode every worker searches the whole position and they share one
+    transposition table in shared memory; the result of the worker that finished the deepest depth is used,
+    the first worker's on a tie. Entries are written without locks, so one worker can read an entry another is
+    half way through writing; each entry's key is stored XORed with its fields, so such a torn entry fails its
+    check and is treated as a miss rather than giving a wrong score or bound.
+
+    param fen: position string of the position to search
+    param workers: number of worker processes, the number of cores when None
+    param mode: 'split' or 'smp'
+    param time_limit: seconds each worker searches for
+    param max_depth: deepest depth to search
+    param table_mb: transposition table size, per worker in 'split' mode and shared in 'smp' mode
+    param seed: seed for the root move order of the 'smp' helper workers
+    param book: opening book file to take the move from before starting any workers, or None
+    return: dictionary with the best move as an algebraic pair, or None when there are no legal moves, its score,
+    the depth it was found at, total nodes, seconds, nodes per second, a list of each worker's index, nodes,
+    deepest depth, and seconds, and whether the move came from the book
+    """
+    if mode not in MODES:
+        raise ValueError('mode must be one of ' + ', '.join(MODES))
+    workers = workers or multiprocessing.cpu_count()
+    game = JanggiGame.from_fen(fen)
+    start = time.perf_counter()
+    board = game.get_board()
+
+    if book is not None:
+        with OpeningBook(book) as opening_book:
+            best = opening_book.get_move(game)
+        if best is not None:
+            return {'move': (board.convert_to_algebraic(best[0]), board.convert_to_algebraic(best[1])), 'score': 0,
+                    'depth': 0, 'nodes': 0, 'seconds': time.perf_counter() - start, 'nps': 0.0, 'workers': [],
+                    'book': True}
+
+    if mode == 'split':
+        shares = split_moves(fen, workers)
+        tasks = [{'worker': index, 'fen': fen, 'moves': [encode_move(move) for move in moves],
+                  'time_limit': time_limit, 'max_depth': max_depth, 'table_mb': table_mb}
+                 for index, moves in enumerate(shares)]
+        reports = _run_tasks(_split_task, tasks, workers) if tasks else []
+
+        # compare every worker's result at the deepest depth they all finished, a worker that found a mate
+        # stops early and its result holds for any deeper depth
+        depths = [report['depth'] for report in reports if not _is_mate_score(report)]
+        depth = min(depths) if depths else max((report['depth'] for report in reports), default=0)
+        results = [report['iterations'][min(depth, report['depth']) - 1] for report in reports
+                   if depth and report['depth']]
+        if results:
+            _, score, code = max(results, key=lambda result: result[1])
+            best = decode_move(code)
+        else:
+            score = 0
+            best = shares[0][0] if shares else None
+    else:
+        memory = shared_memory.SharedMemory(create=True, size=TranspositionTable.bytes_needed(table_mb))
+        try:
+            tasks = [{'worker': index, 'fen': fen, 'memory': memory.name, 'seed': seed + index,
+                      'time_limit': time_limit, 'max_depth': max_depth} for index in range(workers)]
+            reports = _run_tasks(_smp_task, tasks, workers)
+        finally:
+            memory.close()
+            memory.unlink()
+
+        deepest = max(reports, key=lambda report: (report['depth'], -report['worker']))
+        depth = deepest['depth']
+        if deepest['iterations']:
+            _, score, code = deepest['iterations'][-1]
+            best = decode_move(code)
+        else:
+            moves = game.generate_legal_moves()
+            score = 0
+            best = moves[0] if moves else None
+
+    seconds = time.perf_counter() - start
+    nodes = sum(report['nodes'] for report in reports)
+    move = None
+    if best is not None:
+        move = board.convert_to_algebraic(best[0]), board.convert_to_algebraic(best[1])
+    return {'move': move, 'score': score, 'depth': depth, 'nodes': nodes, 'seconds': seconds,
+            'nps': nodes / seconds if seconds else 0.0,
+            'workers': [{key: report[key] for key in ('worker', 'nodes', 'depth', 'seconds')} for report in reports],
+            'book': False}
+
+
+def measure_speedup(fen: str = START_FEN, workers: int = None, mode: str = 'split', depth: int = 4,
+                    table_mb: float = 16) -> dict:
+    """
+    Times a search to a fixed depth on one core and across workers.
+    param fen: position string of the position to search
+    param workers: number of worker processes, the number of cores when None
+    param mode: 'split' or 'smp'
+    param depth: depth both searches finish
+    param table_mb: transposition table size
+    return: dictionary with the single core seconds and nodes, the parallel search result, and the speedup as
+    single core seconds over parallel seconds
+    """
+    start = time.perf_counter()
+    engine = Engine(JanggiGame.from_fen(fen), table_mb=table_mb)
+    engine.search(float('inf'), depth)
+    single_seconds = time.perf_counter() - start
+
+    result = parallel_search(fen, workers, mode, float('inf'), depth, table_mb)
+    return {'single_seconds': single_seconds, 'single_nodes': engine.get_nodes(), 'parallel': result,
+            'speedup': single_seconds / result['seconds'] if result['seconds'] else 0.0}
+
+
+def main(args=None) -> int:
+    """
+    Command line entry point. Searches a position across worker processes and prints the best move and each
+    worker's node count, or the speedup over one core.
+    param args: command line arguments, sys.argv when None
+    return: exit status
+    """
+    parser = argparse.ArgumentParser(description='Search a Janggi position across worker processes.')
+    parser.add_argument('--fen', default=START_FEN, help='position string, defaults to the starting setup')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, defaults to the core count')
+    parser.add_argument('--mode', choices=MODES, default='split', help='root move split or shared table search')
+    parser.add_argument('--time', type=float, default=5.0, help='seconds to search')
+    parser.add_argument('--depth', type=int, default=None,
+                        help='deepest depth to search, or the depth to time with --speedup, 4 by default')
+    parser.add_argument('--table-mb', type=float, default=16, help='transposition table size in megabytes')
+    parser.add_argument('--speedup', action='store_true', help='time a fixed depth search against one core')
+    parser.add_argument('--book', help='opening book file to take the move from before searching')
+    options = parser.parse_args(args)
+
+    try:
+        if options.speedup:
+            speedup = measure_speedup(options.fen, options.workers, options.mode, options.depth or 4,
+                                      options.table_mb)
+            result = speedup['parallel']
+        else:
+            result = parallel_search(options.fen, options.workers, options.mode, options.time,
+                                     options.depth or MAX_PLY - 1, options.table_mb, book=options.book)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    for report in result['workers']:
+        print('worker %2d %12d nodes  depth %2d  %.3f s' % (report['worker'], report['nodes'], report['depth'],
+                                                            report['seconds']))
+    print('move', ' '.join(result['move']) if result['move'] else None, 'score', result['score'], 'depth',
+          result['depth'], 'nodes', result['nodes'], 'nps %.0f' % result['nps'])
+    if options.speedup:
+        print('one core %.3f s, %d workers %.3f s, speedup %.2f' % (speedup['single_seconds'],
+              len(result['workers']), result['seconds'], speedup['speedup']))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+import argparse
+import time
+
+from JanggiGame import JanggiGame
+
+# positions reached by playing moves from the starting setup, with the leaf counts for depths 1, 2, 3
+# every count includes passing when the player to move is not in check
+REFERENCE_POSITIONS = [
+    {
+        'name': 'start',
+        'description': 'starting setup, horse and elephant legs blocked by guards and soldiers',
+        'moves': [],
+        'counts': [32, 1024, 33506]
+    },
+    {
+        'name': 'cannon',
+        'description': 'blue cannon has jumped a horse, both sides have horses screening cannons',
+        'moves': [('c10', 'd8'), ('c1', 'd3'), ('b8', 'e8')],
+        'counts': [41, 1720, 62742]
+    },
+    {
+        'name': 'palace',
+        'description': 'blue chariot on a palace corner with an empty center, red chariot inside its palace',
+        'moves': [('b10', 'd7'), ('c1', 'd3'), ('c10', 'd8'), ('b1', 'd4'), ('d10', 'd9'), ('a1', 'a2'),
+                  ('a10', 'd10'), ('a2', 'd2'), ('e9', 'e10'), ('e2', 'e2')],
+        'counts': [35, 1258, 44918]
+    },
+    {
+        'name': 'check',
+        'description': 'red is in check from a cannon, no passing allowed',
+        'moves': [('c10', 'd8'), ('e4', 'f4'), ('b8', 'e8')],
+        'counts': [6, 264, 7725]
+    },
+    {
+        'name': 'midgame',
+        'description': 'open middle game with pieces blocking horse and elephant legs in the palaces',
+        'moves': [('a7', 'b7'), ('i4', 'h4'), ('h10', 'g8'), ('c1', 'd3'), ('h8', 'e8'), ('i1', 'i2'),
+                  ('e7', 'f7'), ('b3', 'e3'), ('g10', 'e7'), ('e4', 'd4'), ('c10', 'd8'), ('g1', 'e4'),
+                  ('f10', 'f9'), ('h1', 'g3'), ('a10', 'a6'), ('d4', 'd5'), ('e9', 'f10'), ('h3', 'f3'),
+                  ('e8', 'h8'), ('i2', 'h2'), ('h8', 'f8'), ('f1', 'f2'), ('b8', 'e8'), ('f3', 'f1')],
+        'counts': [58, 3063, 166542]
+    }
+]
+
+
+def setup_game(moves: list, fen: str = None) -> JanggiGame:
+    """
+    Creates a game and plays the moves from the starting setup or a given position.
+    param moves: list of (move from, move to) algebraic pairs
+    param fen: position string to start from, see JanggiGame.from_fen, or None for the starting setup
+    return: JanggiGame object
+    """
+    game = JanggiGame.from_fen(fen) if fen else JanggiGame()
+    for move_from, move_to in moves:
+        if not game.make_move(move_from, move_to):
+            raise ValueError('illegal move ' + move_from + ' ' + move_to)
+    return game
+
+
+def run_perft(game: JanggiGame, depth: int, divide: bool = False) -> dict:
+    """
+    Runs perft on the game's current position and times it.
+    param game: game to run on, left in the same position afterward
+    param depth: number of moves to play
+    param divide: when True also count the leaves below each first move
+    return: dictionary of nodes, seconds, nodes per second, and the divide counts when requested
+    """
+    start = time.perf_counter()
+    if divide:
+        counts = game.perft_divide(depth)
+        nodes = sum(counts.values())
+    else:
+        counts = None
+        nodes = game.perft(depth)
+    seconds = time.perf_counter() - start
+    return {'nodes': nodes, 'seconds': seconds, 'nps': nodes / seconds if seconds else 0.0, 'divide': counts}
+
+
+def run_suite(max_depth: int = 3) -> list:
+    """
+    Runs perft on each reference position up to the given depth and compares with the known counts.
+    param max_depth: deepest depth to run, at most the number of known counts
+    return: list of dictionaries with the position name, depth, expected and actual nodes, and timing
+    """
+    results = []
+    for position in REFERENCE_POSITIONS:
+        game = setup_game(position['moves'])
+        for depth, expected in enumerate(position['counts'][:max_depth], 1):
+            result = run_perft(game, depth)
+            result.update({'name': position['name'], 'depth': depth, 'expected': expected,
+                           'passed': result['nodes'] == expected})
+            results.append(result)
+    return results
+
+
+def main(args=None) -> int:
+    """
+    Command line entry point. Runs perft on a position or the reference suite and prints node counts and speed.
+    param args: command line arguments, sys.argv when None
+    return: exit status, 1 when a suite count does not match
+    """
+    parser = argparse.ArgumentParser(description='Count legal move sequences to test move generation speed.')
+    parser.add_argument('--depth', type=int, default=3, help='number of moves to play')
+    parser.add_argument('--moves', default='', help='moves to play from the start, e.g. "c10 d8 c1 d3"')
+    parser.add_argument('--fen', help='position string to start from instead of the starting setup')
+    parser.add_argument('--divide', action='store_true', help='print the count below each first move')
+    parser.add_argument('--suite', action='store_true', help='run the reference positions instead')
+    options = parser.parse_args(args)
+
+    if options.suite:
+        results = run_suite(options.depth)
+        for result in results:
+            print('%-8s depth %d  %9d nodes  %8.0f nps  %s' % (result['name'], result['depth'], result['nodes'],
+                  result['nps'], 'ok' if result['passed'] else 'FAILED expected %d' % result['expected']))
+        return 0 if all(result['passed'] for result in results) else 1
+
+    squares = options.moves.split()
+    game = setup_game(list(zip(squares[::2], squares[1::2])), options.fen)
+    result = run_perft(game, options.depth, options.divide)
+    if options.divide:
+        for move, count in sorted(result['divide'].items()):
+            print(move[0], move[1], count)
+    print('nodes', result['nodes'])
+    print('seconds %.3f' % result['seconds'])
+    print('nps %.0f' % result['nps'])
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
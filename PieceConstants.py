@@ -0,0 +1,22 @@
+"""
+Small int constants for piece colors and types. Pieces store these codes and compare them on the hot path,
+while get_color and get_type translate them back to the strings used by the game's public methods.
+"""
+
+RED = 0
+BLUE = 1
+COLOR_NAMES = ('red', 'blue')
+COLOR_CODES = {name: code for code, name in enumerate(COLOR_NAMES)}
+
+GENERAL = 1
+GUARD = 2
+ELEPHANT = 3
+HORSE = 4
+CHARIOT = 5
+CANNON = 6
+SOLDIER = 7
+TYPE_NAMES = (None, 'general', 'guard', 'elephant', 'horse', 'chariot', 'cannon', 'soldier')
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES) if name is not None}
+
+# letters used for each type in position strings, lowercase for red and uppercase for blue
+TYPE_LETTERS = (None, 'G', 'A', 'E', 'H', 'R', 'C', 'S')
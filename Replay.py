@@ -0,0 +1,177 @@
+import argparse
+import json
+import multiprocessing
+import sys
+
+from GameArchive import MAGIC, GameArchive, decode_moves
+from JanggiGame import JanggiGame
+
+
+def replay_game(moves) -> dict:
+    """
+    Plays a recorded game and reports whether every move was legal. Move tracking is turned off so each
+    move only calculates the moving piece's valid moves, and a mate search only runs after a move gives check.
+    Replay stops at the first illegal move, including any move made after the game has ended.
+    param moves: iterable of (move from, move to) pairs, either algebraic strings as make_move accepts or
+    board coordinates as play_move accepts, or packed moves from a GameArchive
+    return: dictionary with the final game state, index of the first illegal move or None, indexes of the
+    moves that gave check, and the number of legal moves played
+    """
+    if isinstance(moves, (bytes, bytearray, memoryview)):
+        moves = decode_moves(moves)
+    game = JanggiGame()
+    game.set_move_tracking(False)
+    checks = []
+    illegal_move = None
+    played = 0
+    for index, (move_from, move_to) in enumerate(moves):
+        if game.get_game_state() != 'UNFINISHED':
+            illegal_move = index
+            break
+
+        mover = game.get_player_turn()
+        if isinstance(move_from, str):
+            legal = game.make_move(move_from, move_to)
+        else:
+            legal = game.play_move(tuple(move_from), tuple(move_to))
+        if not legal:
+            illegal_move = index
+            break
+        played += 1
+
+        # a move that left the opponent in check, or that mated, gave check
+        opponent = 'blue' if mover == 'red' else 'red'
+        if game.is_in_check(opponent):
+            checks.append(index)
+
+    return {'result': game.get_game_state(), 'illegal_move': illegal_move, 'checks': checks, 'moves': played}
+
+
+def _replay_task(task: tuple) -> dict:
+    """
+    Replays one indexed game in a worker process.
+    param task: tuple of the game's index and its moves
+    return: replay result with the game's index added
+    """
+    index, moves = task
+    result = replay_game(moves)
+    result['index'] = index
+    return result
+
+
+def replay_games(games, workers: int = 1, chunksize: int = 64):
+    """
+    Replays a stream of recorded games and yields a result for each, in the same order as the games. Games
+    are read from the iterable as they are needed, so the whole archive is never held in memory.
+    param games: iterable of move lists, each in a form replay_game accepts
+    param workers: number of worker processes, the number of cores when None, games run in this process when 1
+    param chunksize: games sent to a worker at a time
+    return: generator of replay_game results with the game's index added
+    """
+    tasks = enumerate(games)
+    if workers == 1:
+        for task in tasks:
+            yield _replay_task(task)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap(_replay_task, tasks, chunksize):
+            yield result
+
+
+def _replay_archive_range(task: tuple) -> list:
+    """
+    Replays a range of games from an archive in a worker process, which maps the archive itself so games are
+    never copied between processes.
+    param task: tuple of the archive path and the first and one past the last game index
+    return: list of replay results with each game's index and recorded result added
+    """
+    path, start, stop = task
+    results = []
+    with GameArchive(path) as archive:
+        for index in range(start, stop):
+            result = replay_game(archive.get_moves(index))
+            result['index'] = index
+            result['recorded'] = archive.get_result(index)
+            results.append(result)
+    return results
+
+
+def replay_archive(path: str, workers: int = 1, chunksize: int = 64):
+    """
+    Replays every game in a binary GameArchive and yields a result for each, in archive order.
+    param path: archive file
+    param workers: number of worker processes, the number of cores when None, games run in this process when 1
+    param chunksize: games given to a worker at a time
+    return: generator of replay_game results with the game's index and the result recorded in the archive
+    """
+    with GameArchive(path) as archive:
+        count = len(archive)
+    tasks = [(path, start, min(start + chunksize, count)) for start in range(0, count, chunksize)]
+    if workers == 1:
+        for task in tasks:
+            yield from _replay_archive_range(task)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        for results in pool.imap(_replay_archive_range, tasks):
+            yield from results
+
+
+def read_games(lines):
+    """
+    Reads move lists from lines of JSON, each either a list of move pairs or an object with a 'moves' list
+    such as the games written by SelfPlay.
+    param lines: iterable of lines
+    return: generator of move lists
+    """
+    for line in lines:
+        if line.strip():
+            record = json.loads(line)
+            yield record['moves'] if isinstance(record, dict) else record
+
+
+def main(args=None) -> int:
+    """
+    Command line entry point. Replays games from a GameArchive or a file of JSON lines, writes each result as a
+    line of JSON, and prints a count of the results.
+    param args: command line arguments, sys.argv when None
+    return: exit status, 1 when any game has an illegal move
+    """
+    parser = argparse.ArgumentParser(description='Replay recorded Janggi games and check that every move is legal.')
+    parser.add_argument('games', help='game archive, or file of games with one JSON list of move pairs or '
+                                      'SelfPlay game per line')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes, 0 for the core count')
+    parser.add_argument('--chunksize', type=int, default=64, help='games sent to a worker at a time')
+    parser.add_argument('--output', help='file to write results to, one JSON object per line')
+    options = parser.parse_args(args)
+
+    with open(options.games, 'rb') as game_file:
+        is_archive = game_file.read(len(MAGIC)) == MAGIC
+    game_file = None if is_archive else open(options.games)
+    output = open(options.output, 'w') if options.output else sys.stdout
+    results = {}
+    illegal = 0
+    try:
+        if is_archive:
+            replayed = replay_archive(options.games, options.workers or None, options.chunksize)
+        else:
+            replayed = replay_games(read_games(game_file), options.workers or None, options.chunksize)
+        for result in replayed:
+            output.write(json.dumps(result) + '\n')
+            results[result['result']] = results.get(result['result'], 0) + 1
+            illegal += result['illegal_move'] is not None
+    finally:
+        if game_file is not None:
+            game_file.close()
+        if output is not sys.stdout:
+            output.close()
+
+    for result, count in sorted(results.items()):
+        print(result, count, file=sys.stderr)
+    print('ILLEGAL', illegal, file=sys.stderr)
+    return 1 if illegal else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,21 @@
+"""
+Move sequences of scripted games from the starting setup, in the algebraic notation make_move accepts. The game
+tests replay them to check checks and mate, and Benchmark replays them to time moves.
+"""
+
+SCRIPTED_GAMES = {
+    'pass_turn': [('e1', 'e1')],
+    'red_check': [('c10', 'd8'), ('e4', 'f4'), ('b8', 'e8')],
+    'blue_check': [('e7', 'f7'), ('e4', 'd4'), ('a7', 'a7'), ('e2', 'e1'), ('a7', 'a7'), ('a1', 'a2'), ('a7', 'a7'),
+                   ('a2', 'e2')],
+    'checkmate': [('a7', 'b7'), ('i4', 'h4'), ('h10', 'g8'), ('c1', 'd3'), ('h8', 'e8'), ('i1', 'i2'), ('e7', 'f7'),
+                  ('b3', 'e3'), ('g10', 'e7'), ('e4', 'd4'), ('c10', 'd8'), ('g1', 'e4'), ('f10', 'f9'), ('h1', 'g3'),
+                  ('a10', 'a6'), ('d4', 'd5'), ('e9', 'f10'), ('h3', 'f3'), ('e8', 'h8'), ('i2', 'h2'), ('h8', 'f8'),
+                  ('f1', 'f2'), ('b8', 'e8'), ('f3', 'f1'), ('i7', 'h7'), ('f1', 'c1'), ('d10', 'e9'), ('a4', 'b4'),
+                  ('a6', 'a1'), ('c1', 'a1'), ('f8', 'd10'), ('d5', 'c5'), ('i10', 'i6'), ('b1', 'd4'), ('c7', 'c6'),
+                  ('c5', 'b5'), ('b10', 'd7'), ('d4', 'f7'), ('g7', 'f7'), ('a1', 'f1'), ('g8', 'f6'), ('f1', 'f5'),
+                  ('f6', 'd5'), ('e3', 'e5'), ('f7', 'f6'), ('f5', 'f7'), ('f10', 'e10'), ('e2', 'f1'), ('i6', 'i3'),
+                  ('h2', 'g2'), ('i3', 'i1'), ('f1', 'e2'), ('f6', 'f5'), ('c4', 'd4'), ('f5', 'e5'), ('f7', 'd7'),
+                  ('e7', 'g4'), ('d4', 'd5'), ('e5', 'e4'), ('d3', 'e5'), ('e4', 'e3'), ('e2', 'd2'), ('e3', 'e2'),
+                  ('d2', 'd3'), ('e8', 'e4'), ('f2', 'e2'), ('i1', 'd1'), ('e2', 'd2'), ('d1', 'f3')],
+}
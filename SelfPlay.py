@@ -0,0 +1,140 @@
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+
+from JanggiGame import JanggiGame
+from Engine import Engine
+from OpeningBook import OpeningBook
+
+PLAYERS = ('random', 'engine')
+
+
+def play_game(task: dict) -> dict:
+    """
+    Plays one game from the starting setup, or from the position after the task's opening moves. Each game
+    gets its own random generator from the task's seed, so a game's moves do not depend on which worker
+    played it or how many workers there are.
+    param task: dictionary with the game index, seed, players for blue and red, opening moves, the move limit,
+    the engine's time limit and table size, and the opening book file or None
+    return: dictionary with the game index, seed, moves played in algebraic pairs, and the final game state
+    """
+    rng = random.Random(task['seed'])
+    game = JanggiGame()
+    moves = []
+    for move_from, move_to in task['opening']:
+        if not game.make_move(move_from, move_to):
+            raise ValueError('illegal opening move %s %s after %d moves' % (move_from, move_to, len(moves)))
+        moves.append((move_from, move_to))
+
+    engine = None
+    book = OpeningBook(task['book']) if task.get('book') else None
+    if 'engine' in task['players'].values():
+        engine = Engine(game, table_mb=task['table_mb'], book=book)
+
+    board = game.get_board()
+    try:
+        while game.get_game_state() == 'UNFINISHED' and len(moves) < task['max_moves']:
+            if task['players'][game.get_player_turn()] == 'engine':
+                move = engine.search(task['time_limit'])
+            else:
+                # sort since move order follows the piece set, which differs between processes
+                legal_moves = sorted(game.generate_legal_moves())
+                move = rng.choice(legal_moves) if legal_moves else None
+                if move is not None:
+                    move = board.convert_to_algebraic(move[0]), board.convert_to_algebraic(move[1])
+            if move is None or not game.make_move(move[0], move[1]):
+                break
+            moves.append(move)
+    finally:
+        if book is not None:
+            book.close()
+
+    return {'index': task['index'], 'seed': task['seed'], 'moves': moves, 'result': game.get_game_state()}
+
+
+def run_self_play(games: int, workers: int = None, blue: str = 'random', red: str = 'random',
+                  openings: list = None, seed: int = 0, max_moves: int = 200, time_limit: float = 0.05,
+                  table_mb: float = 4, book: str = None):
+    """
+    Plays independent games spread across a pool of worker processes and yields each game as it finishes.
+    param games: number of games to play
+    param workers: number of worker processes, the number of cores when None, games run in this process when 1
+    param blue: 'random' or 'engine' player for blue
+    param red: 'random' or 'engine' player for red
+    param openings: list of opening move lists to start games from, used in turn, or None for the start
+    param seed: base seed, game i uses seed + i
+    param max_moves: moves after which an unfinished game is stopped
+    param time_limit: engine seconds per move
+    param table_mb: engine transposition table size per worker
+    param book: opening book file the engine takes moves from, or None
+    return: generator of finished game dictionaries from play_game, in the order they finish, raising ValueError
+    when an opening has an illegal move
+    """
+    if blue not in PLAYERS or red not in PLAYERS:
+        raise ValueError('players must be one of ' + ', '.join(PLAYERS))
+    openings = openings or [[]]
+    # check openings here so a bad one stops the run before any worker starts
+    for opening in openings:
+        play_game({'index': 0, 'seed': seed, 'players': {}, 'opening': opening, 'max_moves': 0})
+    tasks = [{'index': index, 'seed': seed + index, 'players': {'blue': blue, 'red': red},
+              'opening': openings[index % len(openings)], 'max_moves': max_moves, 'time_limit': time_limit,
+              'table_mb': table_mb, 'book': book} for index in range(games)]
+
+    if workers == 1:
+        for task in tasks:
+            yield play_game(task)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(play_game, tasks):
+            yield result
+
+
+def main(args=None) -> int:
+    """
+    Command line entry point. Plays games across worker processes, writes each finished game as a line of
+    JSON, and prints a count of the results.
+    param args: command line arguments, sys.argv when None
+    return: exit status
+    """
+    parser = argparse.ArgumentParser(description='Play Janggi games against itself across worker processes.')
+    parser.add_argument('--games', type=int, default=100, help='number of games to play')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, defaults to the core count')
+    parser.add_argument('--blue', choices=PLAYERS, default='random', help='player for blue')
+    parser.add_argument('--red', choices=PLAYERS, default='random', help='player for red')
+    parser.add_argument('--seed', type=int, default=0, help='base random seed')
+    parser.add_argument('--max-moves', type=int, default=200, help='stop unfinished games after this many moves')
+    parser.add_argument('--time', type=float, default=0.05, help='engine seconds per move')
+    parser.add_argument('--openings', help='file of opening move lists, one JSON list of pairs per line')
+    parser.add_argument('--book', help='opening book file the engine takes moves from')
+    parser.add_argument('--output', help='file to write games to, one JSON object per line')
+    options = parser.parse_args(args)
+
+    openings = None
+    if options.openings:
+        with open(options.openings) as opening_file:
+            openings = [json.loads(line) for line in opening_file if line.strip()]
+
+    output = open(options.output, 'w') if options.output else sys.stdout
+    results = {}
+    try:
+        for game in run_self_play(options.games, options.workers, options.blue, options.red, openings,
+                                  options.seed, options.max_moves, options.time, book=options.book):
+            output.write(json.dumps(game) + '\n')
+            results[game['result']] = results.get(game['result'], 0) + 1
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    for result, count in sorted(results.items()):
+        print(result, count, file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
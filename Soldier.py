@@ -1,10 +1,14 @@
 from MasterPiece import MasterPiece
+from MoveTables import SOLDIER_MOVES
+from PieceConstants import BLUE
 
 class Soldier(MasterPiece):
     """
     Represents a soldier piece. Inherits from MasterPiece. Will be instantiated by Game class, and contained
     in the Board class. 
     """
+    __slots__ = ()
+
     def __init__(self, color: str, name: str, type: str, location: tuple):
         """
         Uses MasterPiece init method to initialize the piece. 
@@ -22,7 +26,7 @@ class Soldier(MasterPiece):
         cur_loc = self._location
         
         # handle blue piece moves
-        if self._color == 'blue':
+        if self._color == BLUE:
 
             # one space forward is valid
             if cur_loc[0] - next_loc[0] == 1 and next_loc[1] == cur_loc[1]:
@@ -52,4 +56,18 @@ class Soldier(MasterPiece):
             elif cur_loc == (8, 4) and (next_loc == (9, 3) or next_loc == (9, 5)):
                 return True
             return False
-            
\ No newline at end of file
+
+    def set_valid_moves(self, board) -> None:
+        """
+        Looks up the forward, sideways, and palace spaces the soldier could reach and adds each one that is
+        not occupied by a piece of the same color to the soldier's valid moves. Records the spaces read.
+        return: None
+        """
+        self.clear_moves()
+
+        spaces = SOLDIER_MOVES[self._color][self._location]
+        for space in spaces:
+            piece = board.get_piece(space)
+            if piece is None or piece.get_color_code() != self._color:
+                self.add_move(space)
+        self._watched = spaces
@@ -0,0 +1,647 @@
+"""
+Endgame tablebases for positions with little material. A table holds one byte per position of a material set: the
+distance to mate in plies for the player to move, or that neither side can force mate. Players may pass whenever
+they are not in check, so there is no stalemate and a position is only lost when its player is mated.
+
+Tables are built by iterative retrograde analysis, working back from the mated positions. The first step plays
+every position through JanggiGame, so the movement rules, palaces, and check come from the piece classes, and
+streams each position's moves to a file per chunk. Then each pass decides the positions whose distance to mate is
+one more than the previous pass, until a pass decides nothing. Both steps run across a pool of worker processes,
+each taking a chunk of positions. Captures lead to tables with one piece fewer, so those are built first.
+
+    generate('GRgaa', 'tables', workers=8)
+    with Tablebases('tables') as tables:
+        print(tables.probe(game))
+"""
+import argparse
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+from array import array
+
+from JanggiGame import JanggiGame, FEN_PIECES
+from MoveTables import BOARD_COLS, PALACES, SQUARES
+from PieceConstants import BLUE, RED, TYPE_LETTERS
+
+# file layout: magic, header of the position count and material, then one byte per position
+MAGIC = b'JTB1'
+HEADER = struct.Struct('<Q32s')
+DATA_OFFSET = len(MAGIC) + HEADER.size
+
+# a moves file holds the chunk's position and move counts, the offset of each position's moves, then the moves
+MOVES_HEADER = struct.Struct('<II')
+
+# position bytes: 0 when neither side can force mate, otherwise the distance to mate in plies plus one, so an odd
+# byte is a loss for the player to move and an even byte a win
+DRAW = 0
+MATED = 1
+INVALID = 255
+MAX_DTM = 253
+
+# positions handled by a worker at a time
+CHUNK_SIZE = 4096
+
+PIECE_ORDER = ''.join(TYPE_LETTERS[1:]) + ''.join(TYPE_LETTERS[1:]).lower()
+
+
+def canonical_material(material: str) -> str:
+    """
+    Puts a material set in the order used for file names and indexes: blue pieces then red, each by type.
+    param material: piece letters as in a position string, uppercase for blue and lowercase for red
+    return: material with the letters sorted
+    """
+    if any(letter not in FEN_PIECES for letter in material):
+        raise ValueError('invalid material ' + repr(material))
+    if material.count('G') != 1 or material.count('g') != 1:
+        raise ValueError('material needs one general for each player ' + repr(material))
+    return ''.join(sorted(material, key=PIECE_ORDER.index))
+
+
+def sub_materials(material: str) -> list:
+    """
+    Finds the material sets a capture can lead to, directly or after further captures.
+    param material: material set
+    return: list of material sets, each after every set it can lead to
+    """
+    found = []
+    for letter in sorted(set(material) - {'G', 'g'}, key=PIECE_ORDER.index):
+        captured = material.replace(letter, '', 1)
+        for sub in sub_materials(captured) + [captured]:
+            if sub not in found:
+                found.append(sub)
+    return found
+
+
+def _domain(letter: str) -> tuple:
+    """
+    Finds the squares a piece may stand on: the palace for generals and guards, squares on or past the starting
+    rank for soldiers, and any square for the other pieces.
+    param letter: piece letter
+    return: tuple of square indexes
+    """
+    color = BLUE if letter.isupper() else RED
+    if letter in 'GgAa':
+        squares = PALACES[color]
+    elif letter == 'S':
+        squares = [square for square in SQUARES if square[0] <= 6]
+    elif letter == 's':
+        squares = [square for square in SQUARES if square[0] >= 3]
+    else:
+        squares = SQUARES
+    return tuple(sorted(row * BOARD_COLS + col for row, col in squares))
+
+
+class _Layout:
+    """
+    Numbers the positions of a material set. A position's index counts through each piece's squares in
+    material order, then the player to move. Pieces of the same type may be in either order, both indexes
+    hold the same result, and encode always gives the one with the squares sorted.
+    """
+    def __init__(self, material: str):
+        """
+        Initializes the piece domains and the number of positions.
+        param material: material set in canonical order
+        """
+        self.material = material
+        self.domains = [_domain(letter) for letter in material]
+        self.places = [{square: place for place, square in enumerate(domain)} for domain in self.domains]
+        self.count = 2
+        for domain in self.domains:
+            self.count *= len(domain)
+
+        # runs of pieces of the same type, sorted together when encoding
+        self.groups = []
+        start = 0
+        for end in range(1, len(material) + 1):
+            if end == len(material) or material[end] != material[start]:
+                if end - start > 1:
+                    self.groups.append((start, end))
+                start = end
+
+    def encode(self, squares: list, blue_to_move: bool):
+        """
+        Finds the index of a position.
+        param squares: square index of each piece in material order
+        param blue_to_move: True when blue is the player to move
+        return: index, or None when a piece is on a square outside its domain
+        """
+        squares = list(squares)
+        for start, end in self.groups:
+            squares[start:end] = sorted(squares[start:end])
+        index = 0
+        for place, domain, square in zip(self.places, self.domains, squares):
+            position = place.get(square)
+            if position is None:
+                return None
+            index = index * len(domain) + position
+        return index * 2 + blue_to_move
+
+    def decode(self, index: int) -> tuple:
+        """
+        Finds the position of an index.
+        param index: index of the position
+        return: tuple of the square index of each piece in material order and whether blue is to move
+        """
+        blue_to_move = bool(index & 1)
+        index >>= 1
+        squares = []
+        for domain in reversed(self.domains):
+            index, position = divmod(index, len(domain))
+            squares.append(domain[position])
+        squares.reverse()
+        return squares, blue_to_move
+
+
+def _material_of(game: JanggiGame) -> tuple:
+    """
+    Finds a game's material set and each piece's square in material order.
+    param game: game to look at
+    return: tuple of the canonical material and the list of square indexes
+    """
+    pieces = []
+    for piece in game.get_pieces():
+        letter = TYPE_LETTERS[piece.get_type_code()]
+        row, col = piece.get_location()
+        pieces.append((PIECE_ORDER.index(letter if piece.get_color() == 'blue' else letter.lower()),
+                       row * BOARD_COLS + col))
+    pieces.sort()
+    return ''.join(PIECE_ORDER[order] for order, _ in pieces), [square for _, square in pieces]
+
+
+def _fen(material: str, squares: list, blue_to_move: bool):
+    """
+    Writes a position as a position string.
+    param material: material set
+    param squares: square index of each piece in material order
+    param blue_to_move: True when blue is the player to move
+    return: position string, or None when two pieces share a square
+    """
+    spaces = ['1'] * len(SQUARES)
+    for letter, square in zip(material, squares):
+        if spaces[square] != '1':
+            return None
+        spaces[square] = letter
+    ranks = [''.join(spaces[row * BOARD_COLS:(row + 1) * BOARD_COLS]) for row in range(len(SQUARES) // BOARD_COLS)]
+    return '/'.join(ranks) + (' b' if blue_to_move else ' r')
+
+
+def _table_path(directory: str, material: str) -> str:
+    return os.path.join(directory, material + '.jtb')
+
+
+def _moves_path(directory: str, material: str, chunk: int) -> str:
+    return os.path.join(directory, '%s.moves.%d' % (material, chunk))
+
+
+class Tablebase:
+    """
+    Reads one material set's table by memory mapping it. Can be used as a context manager.
+    """
+    def __init__(self, path: str):
+        """
+        Maps the table file and reads its header.
+        param path: file to read
+        """
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        count, material = HEADER.unpack_from(self._map, len(MAGIC))
+        if self._map[:len(MAGIC)] != MAGIC or len(self._map) != DATA_OFFSET + count:
+            self.close()
+            raise ValueError(path + ' is not a tablebase')
+        self._layout = _Layout(material.rstrip(b'\0').decode())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._layout.count
+
+    def get_material(self) -> str:
+        """
+        Returns the table's material set.
+        """
+        return self._layout.material
+
+    def get_counts(self) -> dict:
+        """
+        Counts the table's positions by result for the player to move.
+        return: dictionary of the number of wins, losses, draws, and invalid positions, and the longest distance to
+        mate
+        """
+        data = self._map[DATA_OFFSET:]
+        counts = {'win': 0, 'loss': 0, 'draw': data.count(DRAW), 'invalid': data.count(INVALID), 'max_dtm': 0}
+        for value in range(MATED, MAX_DTM + 2):
+            found = data.count(value)
+            if found:
+                counts['loss' if value & 1 else 'win'] += found
+                counts['max_dtm'] = value - 1
+        return counts
+
+    def probe_index(self, index: int) -> int:
+        """
+        Returns the byte stored for a position, see the position byte constants.
+        param index: index of the position
+        """
+        return self._map[DATA_OFFSET + index]
+
+    def probe_squares(self, squares: list, blue_to_move: bool):
+        """
+        Looks up a position given by its pieces' squares.
+        param squares: square index of each piece in material order
+        param blue_to_move: True when blue is the player to move
+        return: tuple of 'WIN', 'LOSS', or 'DRAW' for the player to move and the distance to mate in plies, None for
+        a draw, or None when the position is outside the table
+        """
+        index = self._layout.encode(squares, blue_to_move)
+        if index is None:
+            return None
+        value = self.probe_index(index)
+        if value == INVALID:
+            return None
+        if value == DRAW:
+            return 'DRAW', None
+        return ('LOSS' if value & 1 else 'WIN'), value - 1
+
+    def probe(self, game: JanggiGame):
+        """
+        Looks up a game's position.
+        param game: game at the position to look up
+        return: see probe_squares, None when the game's material is not the table's
+        """
+        material, squares = _material_of(game)
+        if material != self._layout.material:
+            return None
+        return self.probe_squares(squares, game.get_player_turn() == 'blue')
+
+    def close(self) -> None:
+        """
+        Releases the mapping and closes the file.
+        return: None
+        """
+        if self._file.closed:
+            return
+        self._map.close()
+        self._file.close()
+
+
+class Tablebases:
+    """
+    Reads every table in a directory, opening each the first time a position with its material is probed. Can
+    be used as a context manager.
+    """
+    def __init__(self, directory: str):
+        """
+        Initializes the set without opening any table.
+        param directory: directory holding the table files
+        """
+        self._directory = directory
+        self._tables = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_table(self, material: str):
+        """
+        Returns the table of a material set.
+        param material: material set in canonical order
+        return: Tablebase, or None when the directory does not have it
+        """
+        if material not in self._tables:
+            path = _table_path(self._directory, material)
+            self._tables[material] = Tablebase(path) if os.path.exists(path) else None
+        return self._tables[material]
+
+    def probe(self, game: JanggiGame):
+        """
+        Looks up a game's position in the table of its material.
+        param game: game at the position to look up
+        return: see Tablebase.probe_squares, None when there is no table for the game's material
+        """
+        material, squares = _material_of(game)
+        table = self.get_table(material)
+        if table is None:
+            return None
+        return table.probe_squares(squares, game.get_player_turn() == 'blue')
+
+    def get_move(self, game: JanggiGame):
+        """
+        Picks the move that keeps the best result: the fastest mate when winning, the slowest when losing, and any
+        move that keeps a draw.
+        param game: game at the position, left in the same position
+        return: (current coordinate, destination coordinate) tuple, or None when the position is not in the tables
+        or there are no legal moves
+        """
+        if self.probe(game) is None:
+            return None
+        best = None
+        best_rank = None
+        for move in game.generate_legal_moves():
+            game.push_move(move[0], move[1])
+            try:
+                result = self.probe(game)
+            finally:
+                game.pop_move()
+            if result is None:
+                continue
+
+            # rank the result for the player making the move, higher is better
+            outcome, dtm = result
+            if outcome == 'LOSS':
+                rank = (2, -dtm)
+            elif outcome == 'DRAW':
+                rank = (1, 0)
+            else:
+                rank = (0, dtm)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = move, rank
+        return best
+
+    def close(self) -> None:
+        """
+        Closes every open table.
+        return: None
+        """
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        self._tables.clear()
+
+
+def _generate_chunk(task: tuple) -> int:
+    """
+    Plays each position of a chunk, run in a worker process. Writes each position's byte to the table file,
+    INVALID when two pieces share a space or the player not to move is in check and MATED when the player to move
+    has no legal moves, and writes the moves of the other positions to the chunk's moves file. A move that stays
+    in the material set is stored as the index of the position it leads to. A capture is looked up in the smaller
+    table and stored as the position count plus its byte.
+    param task: tuple of the directory, material, chunk number, and first and one past the last position index
+    return: longest distance to mate of a capture, or -1 when there is none
+    """
+    directory, material, chunk, start, stop = task
+    layout = _Layout(material)
+    captures = {}
+    values = bytearray(stop - start)
+    offsets = array('I', [0])
+    moves = array('I')
+    longest = -1
+    with Tablebases(directory) as tables:
+        for index in range(start, stop):
+            squares, blue_to_move = layout.decode(index)
+            fen = _fen(material, squares, blue_to_move)
+            if fen is None:
+                values[index - start] = INVALID
+                offsets.append(len(moves))
+                continue
+            game = JanggiGame.from_fen(fen, track_moves=False)
+            opponent = 'red' if blue_to_move else 'blue'
+            if game.is_check(opponent):
+                values[index - start] = INVALID
+                offsets.append(len(moves))
+                continue
+
+            legal_moves = game.generate_legal_moves()
+            if not legal_moves:
+                values[index - start] = MATED
+            for cur_coord, dest_coord in legal_moves:
+                cur = cur_coord[0] * BOARD_COLS + cur_coord[1]
+                dest = dest_coord[0] * BOARD_COLS + dest_coord[1]
+                after = [dest if square == cur else square for square in squares]
+                if cur != dest and dest in squares:
+                    captured = squares.index(dest)
+                    if captured not in captures:
+                        sub = material[:captured] + material[captured + 1:]
+                        captures[captured] = tables.get_table(sub), _Layout(sub)
+                    table, sub_layout = captures[captured]
+                    value = table.probe_index(sub_layout.encode(after[:captured] + after[captured + 1:],
+                                                                not blue_to_move))
+                    if value != DRAW:
+                        longest = max(longest, value - 1)
+                    moves.append(layout.count + value)
+                else:
+                    moves.append(layout.encode(after, not blue_to_move))
+            offsets.append(len(moves))
+
+    with open(_moves_path(directory, material, chunk), 'wb') as moves_file:
+        moves_file.write(MOVES_HEADER.pack(stop - start, len(moves)))
+        offsets.tofile(moves_file)
+        moves.tofile(moves_file)
+    with open(_table_path(directory, material), 'r+b') as table_file:
+        table_file.seek(DATA_OFFSET + start)
+        table_file.write(values)
+    return longest
+
+
+def _iterate_chunk(task: tuple) -> int:
+    """
+    Runs one pass over a chunk, run in a worker process. An undecided position is won when one of its moves leads
+    to a loss for the opponent, taking the fastest, and lost when every move leads to a win for the opponent,
+    taking the slowest. Only results with a distance to mate below the pass number count, so each pass decides
+    exactly the positions one ply further from mate than the pass before. Reads the previous pass's table and
+    writes the chunk's part of the next one.
+    param task: tuple of the directory, material, chunk number, first and one past the last position index, pass
+    number, and the files holding the previous and next pass's table
+    return: number of positions decided
+    """
+    directory, material, chunk, start, stop, depth, source, target = task
+    with open(source, 'rb') as source_file, open(_moves_path(directory, material, chunk), 'rb') as moves_file:
+        table = mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ)
+        moves_map = mmap.mmap(moves_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            count, total = MOVES_HEADER.unpack_from(moves_map)
+            offsets = array('I', moves_map[MOVES_HEADER.size:MOVES_HEADER.size + (count + 1) * 4])
+            moves = array('I', moves_map[MOVES_HEADER.size + (count + 1) * 4:])
+            values = bytearray(table[DATA_OFFSET + start:DATA_OFFSET + stop])
+            positions = len(table) - DATA_OFFSET
+            decided = 0
+            for position in range(count):
+                if values[position] != DRAW:
+                    continue
+                fastest = None
+                slowest = -1
+                for move in moves[offsets[position]:offsets[position + 1]]:
+                    value = table[DATA_OFFSET + move] if move < positions else move - positions
+                    if value == DRAW or value - 1 >= depth:
+                        slowest = None
+                    elif value & 1:
+                        if fastest is None or value < fastest:
+                            fastest = value
+                    elif slowest is not None and value > slowest:
+                        slowest = value
+                if fastest is not None:
+                    value = fastest + 1
+                elif slowest is not None and slowest >= 0:
+                    value = slowest + 1
+                else:
+                    continue
+                if value - 1 > MAX_DTM:
+                    raise ValueError('distance to mate is longer than a table holds')
+                values[position] = value
+                decided += 1
+        finally:
+            table.close()
+            moves_map.close()
+
+    with open(target, 'r+b') as target_file:
+        target_file.seek(DATA_OFFSET + start)
+        target_file.write(values)
+    return decided
+
+
+def _run(pool, function, tasks: list) -> list:
+    """
+    Runs tasks in the pool, or in this process when there is no pool.
+    param pool: multiprocessing pool, or None
+    param function: task function
+    param tasks: list of tasks
+    return: list of results in task order
+    """
+    if pool is None:
+        return [function(task) for task in tasks]
+    return pool.map(function, tasks)
+
+
+def _run_passes(pool, directory: str, material: str, chunks: list, longest: int) -> int:
+    """
+    Runs passes over a table whose first step is done until every position that can be decided is. Each pass
+    reads the table written by the one before and writes a spare file, and the two swap, so a pass never sees
+    a result from itself.
+    param pool: multiprocessing pool, or None to run in this process
+    param directory: directory holding the table and its moves files
+    param material: material set in canonical order
+    param chunks: list of (chunk number, first position index, one past the last position index) tuples
+    param longest: longest distance to mate of a capture, from the first step
+    return: number of passes
+    """
+    path = _table_path(directory, material)
+    spare = path + '.next'
+    with open(path, 'rb') as table_file, open(spare, 'wb') as spare_file:
+        spare_file.write(table_file.read(DATA_OFFSET))
+        spare_file.truncate(os.path.getsize(path))
+
+    # passes go on while they decide positions, or while a capture's result has yet to be counted
+    depth = 1
+    source, target = path, spare
+    try:
+        while True:
+            decided = sum(_run(pool, _iterate_chunk, [(directory, material, chunk, first, last, depth, source,
+                                                       target) for chunk, first, last in chunks]))
+            source, target = target, source
+            depth += 1
+            if not decided and depth > longest + 1:
+                break
+        if source != path:
+            os.replace(source, path)
+    finally:
+        if os.path.exists(spare):
+            os.remove(spare)
+    return depth - 1
+
+
+def _generate_table(material: str, directory: str, pool, chunk_size: int) -> dict:
+    """
+    Builds one material set's table, with the tables its captures lead to already in the directory.
+    param material: material set in canonical order
+    param directory: directory to write to
+    param pool: multiprocessing pool, or None to run in this process
+    param chunk_size: positions per task
+    return: dictionary of the material, its position counts by result, the number of passes, and seconds taken
+    """
+    start = time.perf_counter()
+    layout = _Layout(material)
+    if layout.count + MAX_DTM + 2 >= 1 << 32:
+        raise ValueError('material ' + material + ' has too many positions for a table')
+    path = _table_path(directory, material)
+    with open(path, 'wb') as table_file:
+        table_file.write(MAGIC + HEADER.pack(layout.count, material.encode()))
+        table_file.truncate(DATA_OFFSET + layout.count)
+
+    chunks = [(chunk, index, min(index + chunk_size, layout.count))
+              for chunk, index in enumerate(range(0, layout.count, chunk_size))]
+    try:
+        longest = max(_run(pool, _generate_chunk, [(directory, material, chunk, first, last)
+                                                   for chunk, first, last in chunks]))
+        passes = _run_passes(pool, directory, material, chunks, longest)
+    finally:
+        for chunk, _, _ in chunks:
+            if os.path.exists(_moves_path(directory, material, chunk)):
+                os.remove(_moves_path(directory, material, chunk))
+
+    with Tablebase(path) as table:
+        summary = table.get_counts()
+    summary.update({'material': material, 'positions': layout.count, 'passes': passes,
+                    'seconds': time.perf_counter() - start})
+    return summary
+
+
+def generate(material: str, directory: str, workers: int = None, chunk_size: int = CHUNK_SIZE,
+             overwrite: bool = False) -> list:
+    """
+    Builds the table of a material set, and first the tables of every material set its captures can lead to.
+    param material: piece letters as in a position string, uppercase for blue and lowercase for red, with one
+    general for each player
+    param directory: directory to write the tables to, created when missing
+    param workers: number of worker processes, the number of cores when None, tables are built in this process
+    when 1
+    param chunk_size: positions per task
+    param overwrite: when False tables already in the directory are kept
+    return: list of dictionaries for each table built, see _generate_table
+    """
+    material = canonical_material(material)
+    os.makedirs(directory, exist_ok=True)
+    pool = None if workers == 1 else multiprocessing.Pool(workers)
+    summaries = []
+    try:
+        for table_material in sub_materials(material) + [material]:
+            if overwrite or not os.path.exists(_table_path(directory, table_material)):
+                summaries.append(_generate_table(table_material, directory, pool, chunk_size))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return summaries
+
+
+def main(args=None) -> int:
+    """
+    Command line entry point. Builds tables, or probes a position in the tables of a directory.
+    param args: command line arguments, sys.argv when None
+    return: exit status
+    """
+    parser = argparse.ArgumentParser(description='Build and probe Janggi endgame tablebases.')
+    parser.add_argument('material', nargs='*', help='material sets to build, such as GRgaa, uppercase for blue')
+    parser.add_argument('--directory', default='tables', help='directory holding the tables')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, defaults to the core count')
+    parser.add_argument('--overwrite', action='store_true', help='rebuild tables already in the directory')
+    parser.add_argument('--probe', help='position string to look up')
+    options = parser.parse_args(args)
+
+    try:
+        for material in options.material:
+            for summary in generate(material, options.directory, options.workers, overwrite=options.overwrite):
+                print('%-12s %10d positions %9d win %9d loss %9d draw  longest mate %3d  %d passes  %.1f s' % (
+                      summary['material'], summary['positions'], summary['win'], summary['loss'],
+                      summary['draw'], summary['max_dtm'], summary['passes'], summary['seconds']))
+        if options.probe:
+            with Tablebases(options.directory) as tables:
+                game = JanggiGame.from_fen(options.probe)
+                result = tables.probe(game)
+                move = tables.get_move(game)
+            board = game.get_board()
+            print('result', result, 'move', move and (board.convert_to_algebraic(move[0]),
+                                                      board.convert_to_algebraic(move[1])))
+    except ValueError as error:
+        print(error)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+from MoveTables import BOARD_COLS, SQUARES
+
+# bound types of a stored score
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+# bytes per slot: 8 key, 4 score, 2 move, 1 depth, 1 bound
+SLOT_BYTES = 16
+BUCKET_SLOTS = 2
+
+
+def encode_move(move) -> int:
+    """
+    Packs a move in to a small int for storage.
+    param move: (current coordinate, destination coordinate) tuple, or None
+    return: 0 for None, else from index * 90 + to index + 1
+    """
+    if move is None:
+        return 0
+    return (move[0][0] * BOARD_COLS + move[0][1]) * len(SQUARES) + move[1][0] * BOARD_COLS + move[1][1] + 1
+
+
+def decode_move(code: int):
+    """
+    Unpacks a move stored by encode_move.
+    param code: packed move
+    return: (current coordinate, destination coordinate) tuple, or None
+    """
+    if code == 0:
+        return None
+    return SQUARES[(code - 1) // len(SQUARES)], SQUARES[(code - 1) % len(SQUARES)]
+
+
+class TranspositionTable:
+    """
+    Fixed size table of search results keyed by position hash. Memory is allocated once from the size in MB
+    and never grows. Each bucket holds two slots: the first keeps the deepest result, the second is always
+    replaced, so deep results survive while recent shallow ones still get stored. Keeps counts of hits,
+    misses, stores, and collisions where a store overwrote a different position.
+
+    Processes sharing a table write it without locks, so a slot can be read while another process is half way
+    through writing it. Each slot stores its position hash XORed with its packed fields, and a probe only
+    accepts a slot whose key and fields give back the hash it looks up, so a torn slot reads as a miss.
+    """
+    def __init__(self, size_mb: float = 16, buffer=None):
+        """
+        Allocates the table's arrays, or lays them over an existing buffer such as shared memory.
+        param size_mb: memory cap in megabytes, ignored when a buffer is given
+        param buffer: writable buffer to hold the table, its length sets the size
+        """
+        if buffer is None:
+            buffer = bytearray(int(size_mb * 1024 * 1024))
+        self._buckets = max(1, len(buffer) // (SLOT_BYTES * BUCKET_SLOTS))
+        slots = self._buckets * BUCKET_SLOTS
+        self._buffer = buffer
+
+        # parallel typed views in to the one buffer
+        view = memoryview(buffer)
+        self._keys = view[0:slots * 8].cast('Q')
+        self._scores = view[slots * 8:slots * 12].cast('i')
+        self._moves = view[slots * 12:slots * 14].cast('H')
+        self._depths = view[slots * 14:slots * 15].cast('b')
+        self._bounds = view[slots * 15:slots * 16].cast('B')
+
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._collisions = 0
+
+    @staticmethod
+    def bytes_needed(size_mb: float) -> int:
+        """
+        Returns the number of bytes a table of the given size uses, for allocating shared memory.
+        param size_mb: memory cap in megabytes
+        return: number of bytes
+        """
+        return int(size_mb * 1024 * 1024) // (SLOT_BYTES * BUCKET_SLOTS) * SLOT_BYTES * BUCKET_SLOTS
+
+    def get_capacity(self) -> int:
+        """
+        Returns the number of entries the table can hold.
+        """
+        return self._buckets * BUCKET_SLOTS
+
+    def get_stats(self) -> dict:
+        """
+        Returns the table's counters and the share of probes that found their position.
+        """
+        probes = self._hits + self._misses
+        return {'hits': self._hits, 'misses': self._misses, 'stores': self._stores,
+                'collisions': self._collisions, 'hit_rate': self._hits / probes if probes else 0.0,
+                'capacity': self.get_capacity()}
+
+    def clear(self) -> None:
+        """
+        Empties every slot and resets the counters.
+        return: None
+        """
+        slots = self._buckets * BUCKET_SLOTS
+        memoryview(self._buffer)[0:slots * SLOT_BYTES] = bytes(slots * SLOT_BYTES)
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._collisions = 0
+
+    def release(self) -> None:
+        """
+        Lets go of the views in to the buffer so shared memory holding the table can be closed. The table
+        cannot be used afterward.
+        return: None
+        """
+        for view in (self._keys, self._scores, self._moves, self._depths, self._bounds):
+            view.release()
+        self._buffer = None
+
+    def probe(self, key: int):
+        """
+        Looks up the result stored for a position.
+        param key: position hash
+        return: tuple of depth, score, bound, and best move, or None when the position is not stored
+        """
+        slot = key % self._buckets * BUCKET_SLOTS
+        for index in (slot, slot + 1):
+            # read each field once, so the check and the result see the same values
+            depth = self._depths[index]
+            score = self._scores[index]
+            bound = self._bounds[index]
+            move = self._moves[index]
+            if bound and self._keys[index] ^ _pack(depth, score, bound, move) == key:
+                self._hits += 1
+                return depth, score, bound, decode_move(move)
+        self._misses += 1
+        return None
+
+    def store(self, key: int, depth: int, score: int, bound: int, move) -> None:
+        """
+        Stores a search result. Goes in the depth preferred slot when it is for the same position or at least
+        as deep as what is there, moving the old result to the always replace slot. Otherwise it goes in the
+        always replace slot.
+        param key: position hash
+        param depth: depth the position was searched to
+        param score: score of the position
+        param bound: EXACT, LOWER, or UPPER
+        param move: best move found, or None
+        return: None
+        """
+        slot = key % self._buckets * BUCKET_SLOTS
+        stored = self._get_key(slot)
+        if stored == key or depth >= self._depths[slot] or not self._bounds[slot]:
+            if stored != key and self._bounds[slot]:
+                self._replace(slot + 1, stored, self._depths[slot], self._scores[slot], self._bounds[slot],
+                              self._moves[slot])
+            index = slot
+        else:
+            index = slot + 1
+        self._replace(index, key, depth, score, bound, encode_move(move))
+        self._stores += 1
+
+    def _replace(self, index: int, key: int, depth: int, score: int, bound: int, move: int) -> None:
+        """
+        Writes an entry in to a slot, counting a collision when a different position was there.
+        param index: slot to write
+        param key: position hash
+        param depth: search depth
+        param score: score of the position
+        param bound: bound type
+        param move: packed best move
+        return: None
+        """
+        if self._bounds[index] and self._get_key(index) != key:
+            self._collisions += 1
+        depth = max(-128, min(127, depth))
+        self._keys[index] = key ^ _pack(depth, score, bound, move)
+        self._depths[index] = depth
+        self._scores[index] = score
+        self._bounds[index] = bound
+        self._moves[index] = move
+
+    def _get_key(self, index: int) -> int:
+        """
+        Returns the position hash stored in a slot, taking its packed fields back out of the stored key.
+        param index: slot to read
+        return: position hash
+        """
+        return self._keys[index] ^ _pack(self._depths[index], self._scores[index], self._bounds[index],
+                                         self._moves[index])
+
+
+def _pack(depth: int, score: int, bound: int, move: int) -> int:
+    """
+    Packs a slot's fields in to one 64 bit int, XORed with the position hash to make the stored key.
+    param depth: search depth
+    param score: score of the position
+    param bound: bound type
+    param move: packed best move
+    return: 64 bit int
+    """
+    return (score & 0xFFFFFFFF) | move << 32 | (depth & 0xFF) << 48 | bound << 56
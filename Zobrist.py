@@ -0,0 +1,38 @@
+"""
+Random 64-bit keys for Zobrist hashing of positions. A position's hash is the XOR of the key for each piece
+on its space, plus SIDE_KEY when red is to move, so a move only needs a few XORs to update it. Keys come from
+a fixed seed so hashes are the same in every process and can be stored.
+"""
+import random
+
+from MoveTables import BOARD_COLS, SQUARES
+from PieceConstants import COLOR_NAMES, TYPE_NAMES
+
+_rng = random.Random(0x4A414E474749)
+
+# indexed by color code, type code, then row * 9 + col
+PIECE_KEYS = tuple(tuple(tuple(_rng.getrandbits(64) for _ in SQUARES) for _ in TYPE_NAMES) for _ in COLOR_NAMES)
+SIDE_KEY = _rng.getrandbits(64)
+
+
+def piece_key(piece, coord: tuple) -> int:
+    """
+    Returns the key for the piece standing on the coordinate.
+    param piece: piece object
+    param coord: coordinate of the piece
+    return: 64-bit key
+    """
+    return PIECE_KEYS[piece.get_color_code()][piece.get_type_code()][coord[0] * BOARD_COLS + coord[1]]
+
+
+def hash_position(pieces, player_turn: str) -> int:
+    """
+    Computes a position's hash from scratch. Used to set the starting hash and to check incremental updates.
+    param pieces: pieces on the board
+    param player_turn: color of the player to move
+    return: 64-bit hash
+    """
+    key = SIDE_KEY if player_turn == 'red' else 0
+    for piece in pieces:
+        key ^= piece_key(piece, piece.get_location())
+    return key